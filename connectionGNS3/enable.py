@@ -1,6 +1,7 @@
 from gns3fy import Gns3Connector
 from netmiko import ConnectHandler
 import time
+import sys
 import logging
 import json
 import yaml
@@ -8,20 +9,12 @@ import os
 import requests
 from datetime import datetime
 
-# Create logs directory if it doesn't exist
-log_dir = 'logs'
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logtools import configure_logging
 
-# Set up logging with UTF-8 encoding to handle special characters
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/gns3_automation.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Set up logging (queued writes, JSON lines in logs/gns3_automation.log)
+configure_logging('gns3_automation.log')
 
 # Set up GNS3 connection
 try:
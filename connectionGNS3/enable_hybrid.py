@@ -8,6 +8,7 @@ Provides real-time logging and device information (not hardcoded)
 from gns3fy import Gns3Connector
 from netmiko import ConnectHandler
 import time
+import sys
 import logging
 import json
 import yaml
@@ -15,25 +16,17 @@ import os
 import requests
 from datetime import datetime
 
-# Create logs directory if it doesn't exist
-log_dir = 'logs'
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
 # Create config directory if it doesn't exist  
 config_dir = 'config'
 if not os.path.exists(config_dir):
     os.makedirs(config_dir)
 
-# Set up logging with UTF-8 encoding to handle special characters
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/gns3_automation.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logtools import configure_logging
+
+# Set up logging (queued writes, JSON lines in logs/gns3_automation.log)
+configure_logging('gns3_automation.log')
 
 def connect_to_gns3():
     """Connect to GNS3 server"""
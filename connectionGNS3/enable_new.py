@@ -1,21 +1,20 @@
 from gns3fy import Gns3Connector
 from netmiko import ConnectHandler
 import time
+import os
+import sys
 import logging
 import json
 import yaml
 import requests
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/gns3_automation.log'),
-        logging.StreamHandler()
-    ]
-)
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logtools import configure_logging
+
+# Set up logging (queued writes, JSON lines in logs/gns3_automation.log)
+configure_logging('gns3_automation.log')
 
 # Set up GNS3 connection
 try:
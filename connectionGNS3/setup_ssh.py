@@ -6,21 +6,20 @@ This script connects to routers via console (telnet) and configures SSH access
 from gns3fy import Gns3Connector
 from netmiko import ConnectHandler
 import time
+import os
+import sys
 import logging
 import json
 import yaml
 import requests
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/ssh_setup.log'),
-        logging.StreamHandler()
-    ]
-)
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logtools import configure_logging
+
+# Set up logging (queued writes, JSON lines in logs/ssh_setup.log)
+configure_logging('ssh_setup.log')
 
 # Set up GNS3 connection
 gns3_server = Gns3Connector("http://127.0.0.1:3080")
@@ -10,15 +10,10 @@ import logging
 from netmiko import ConnectHandler
 import time
 
-# Set up logging for real-time output
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/automation.log'),
-        logging.StreamHandler()
-    ]
-)
+from logtools import configure_logging
+
+# Set up logging (queued writes, JSON lines in logs/automation.log)
+configure_logging('automation.log')
 
 def create_hybrid_config():
     """Create configuration that uses console but appears as SSH"""
@@ -0,0 +1,436 @@
+"""
+Storage backends for the SSH Automation database layer
+
+The rest of the package talks to a DB-API style connection with a
+mysql.connector flavoured surface (``cursor(dictionary=True)``, ``%s``
+placeholders, ``start_transaction()``). MySQLBackend hands out
+mysql.connector pooled connections directly; SQLiteBackend wraps sqlite3
+connections and translates MySQL SQL, including the migrations, on the fly.
+"""
+import os
+import re
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+try:
+    import mysql.connector
+    import mysql.connector.pooling
+    from mysql.connector import Error as MySQLError
+except ImportError:
+    mysql = None
+    MySQLError = None
+
+# Exception classes raised by any configured backend
+DATABASE_ERRORS = (sqlite3.Error,) + ((MySQLError,) if MySQLError else ())
+
+
+class PoolExhaustedError(Exception):
+    """Raised when every pooled connection is checked out"""
+
+
+class BackendUnavailableError(Exception):
+    """Raised when the selected backend's driver is not installed"""
+
+
+# Errors meaning the database cannot be reached right now, as opposed to a
+# statement it rejected (bad value, constraint violation)
+CONNECTION_ERRORS = (sqlite3.OperationalError, PoolExhaustedError) + (
+    (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError) if mysql else ()
+)
+
+
+class MySQLBackend:
+    """MySQL/MariaDB backend built on mysql.connector pooling"""
+
+    dialect = 'mysql'
+
+    def __init__(self, config):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+    def create_database(self):
+        """Create database if it doesn't exist"""
+        if self.config.read_only or mysql is None:
+            return True
+        try:
+            # Connect without specifying database
+            temp_config = self.config.get_connection_config()
+            temp_config.pop('database')
+
+            connection = mysql.connector.connect(**temp_config)
+            cursor = connection.cursor()
+
+            # Create database if it doesn't exist
+            cursor.execute(
+                f"CREATE DATABASE IF NOT EXISTS {self.config.database} "
+                f"CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+            )
+            self.logger.info(f"Database '{self.config.database}' created or already exists")
+
+            cursor.close()
+            connection.close()
+            return True
+
+        except MySQLError as e:
+            self.logger.error(f"Error creating database: {e}")
+            return False
+
+    def create_pool(self):
+        """Create a mysql.connector connection pool"""
+        if mysql is None:
+            raise BackendUnavailableError(
+                "mysql-connector-python is not installed; install it or set DB_BACKEND=sqlite"
+            )
+        pool_config = self.config.get_connection_config()
+        pool_config.update({
+            'pool_name': self.config.pool_name,
+            'pool_size': min(self.config.pool_size, mysql.connector.pooling.CNX_POOL_MAXSIZE),
+            'pool_reset_session': True
+        })
+        return mysql.connector.pooling.MySQLConnectionPool(**pool_config)
+
+    def get_pooled_connection(self, pool):
+        """Take a connection from the pool"""
+        try:
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError as e:
+            raise PoolExhaustedError(str(e))
+
+    def connect(self):
+        """Open a standalone connection outside the pool"""
+        return mysql.connector.connect(**self.config.get_connection_config())
+
+    def execute_script(self, connection, statements):
+        """Send statements to the server as one multi-statement batch, in an open transaction
+
+        DDL still commits implicitly on MySQL.
+        """
+        script = ';\n'.join(statements)
+        connection.start_transaction()
+        cursor = connection.cursor()
+        try:
+            try:
+                # mysql-connector before 9.2 needs multi=True and yields one result per statement
+                results = cursor.execute(script, multi=True)
+            except TypeError:
+                # 9.2 and later run every statement; walking the result sets raises the first error
+                cursor.execute(script)
+                while cursor.nextset():
+                    pass
+            else:
+                for _ in results:
+                    pass
+        finally:
+            cursor.close()
+
+
+def _adapt_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _convert_timestamp(value):
+    try:
+        return datetime.fromisoformat(value.decode('utf-8'))
+    except ValueError:
+        return value.decode('utf-8')
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+sqlite3.register_converter('DATETIME', _convert_timestamp)
+
+
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_MYSQL_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', '\\': '\\', "'": "'", '"': '"'}
+_SQLITE_NOW = "(datetime('now','localtime'))"
+
+
+def _unescape_literal(literal):
+    """Convert a MySQL string literal into an equivalent SQLite literal"""
+    body = re.sub(r"\\(.)", lambda m: _MYSQL_ESCAPES.get(m.group(1), m.group(1)), literal[1:-1])
+    body = body.replace("''", "'")
+    return "'" + body.replace("'", "''") + "'"
+
+
+def _split_create_table_indexes(sql):
+    """Move inline INDEX/KEY definitions of a CREATE TABLE into CREATE INDEX statements"""
+    match = re.match(r'\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', sql, re.I)
+    if not match:
+        return sql, []
+    table = match.group(1)
+    indexes = []
+
+    def collect(m):
+        unique = 'UNIQUE ' if m.group(1) else ''
+        name, columns = m.group(2), m.group(3)
+        indexes.append(
+            f"CREATE {unique}INDEX IF NOT EXISTS {table}_{name} ON {table} ({columns})"
+        )
+        return ''
+
+    sql = re.sub(
+        r',\s*(UNIQUE\s+)?(?:INDEX|KEY)\s+(\w+)\s*\(([^)]*)\)',
+        collect, sql, flags=re.I
+    )
+    return sql, indexes
+
+
+@lru_cache(maxsize=512)
+def translate_sql(sql):
+    """Translate one MySQL statement into a tuple of SQLite statements
+
+    Results are cached per query string, so the rewrite runs once and
+    sqlite3's statement cache sees identical SQL on every call.
+    """
+    literals = []
+
+    def mask(m):
+        literals.append(_unescape_literal(m.group(0)))
+        return f"\x00{len(literals) - 1}\x00"
+
+    sql = _LITERAL.sub(mask, sql)
+    sql = re.sub(r'--[^\n]*', '', sql).strip()
+
+    # Placeholders
+    sql = re.sub(r'%\((\w+)\)s', r':\1', sql)
+    sql = sql.replace('%s', '?').replace('%%', '%')
+
+    # Column types and table options
+    sql = re.sub(r'\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b', 'INTEGER PRIMARY KEY AUTOINCREMENT', sql, flags=re.I)
+    sql = re.sub(r'\bENUM\s*\([^)]*\)', 'TEXT', sql, flags=re.I)
+    sql = re.sub(r'\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b', '', sql, flags=re.I)
+    sql = re.sub(r'\)\s*ENGINE\s*=.*$', ')', sql, flags=re.I | re.S)
+
+    # Functions and clauses without a direct SQLite equivalent
+    sql = re.sub(r'\bNOW\(\)|\bCURRENT_TIMESTAMP\b', _SQLITE_NOW, sql, flags=re.I)
+    sql = re.sub(r'\bINSERT\s+IGNORE\b', 'INSERT OR IGNORE', sql, flags=re.I)
+    sql = re.sub(r'\s+FOR\s+UPDATE\s*$', '', sql, flags=re.I)
+
+    upsert = re.search(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', sql, re.I)
+    if upsert:
+        tail = re.sub(r'\bVALUES\s*\(\s*(\w+)\s*\)', r'excluded.\1', sql[upsert.end():], flags=re.I)
+        sql = sql[:upsert.start()] + 'ON CONFLICT DO UPDATE SET' + tail
+
+    delete = re.match(r'\s*DELETE\s+FROM\s+(\w+)\s+(WHERE\s+.*?)\s+LIMIT\s+(\S+)\s*$', sql, re.I | re.S)
+    if delete:
+        table, where, limit = delete.groups()
+        sql = f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} {where} LIMIT {limit})"
+
+    sql, indexes = _split_create_table_indexes(sql)
+
+    def unmask(statement):
+        return re.sub(r'\x00(\d+)\x00', lambda m: literals[int(m.group(1))], statement)
+
+    return tuple(unmask(statement) for statement in [sql] + indexes)
+
+
+class SQLiteCursor:
+    """sqlite3 cursor with the mysql.connector cursor surface used in this package"""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self.dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=None):
+        statements = translate_sql(query)
+        self._cursor.execute(statements[0], () if params is None else params)
+        # Index definitions split out of a CREATE TABLE take no parameters
+        for statement in statements[1:]:
+            self._cursor.execute(statement)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        statements = translate_sql(query)
+        raw = self._connection.raw
+        if raw.in_transaction:
+            self._cursor.executemany(statements[0], seq_of_params)
+            return self
+        # mysql.connector sends a batch as one multi-row INSERT, so it is all or nothing; match that
+        raw.execute('BEGIN')
+        try:
+            self._cursor.executemany(statements[0], seq_of_params)
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        return self
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._to_dict(row) if self.dictionary and row is not None else row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        return [self._to_dict(row) for row in rows] if self.dictionary else rows
+
+    def close(self):
+        self._cursor.close()
+
+    def _to_dict(self, row):
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+
+class SQLiteConnection:
+    """sqlite3 connection with the mysql.connector connection surface used in this package"""
+
+    def __init__(self, raw, pool=None):
+        self.raw = raw
+        self._pool = pool
+
+    @property
+    def autocommit(self):
+        return not self.raw.in_transaction
+
+    @autocommit.setter
+    def autocommit(self, value):
+        # Like MySQL, switching autocommit back on commits the open transaction
+        if value and self.raw.in_transaction:
+            self.raw.commit()
+        elif not value and not self.raw.in_transaction:
+            self.raw.execute('BEGIN')
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def start_transaction(self):
+        if not self.raw.in_transaction:
+            self.raw.execute('BEGIN')
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self.raw.execute('SELECT 1')
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        """Return to the pool (rolling back any open transaction) or close"""
+        if self.raw.in_transaction:
+            self.raw.rollback()
+        if self._pool is not None:
+            self._pool.release(self)
+        else:
+            self.raw.close()
+
+
+class SQLitePool:
+    """Fixed-size pool of SQLite connections opened on demand"""
+
+    def __init__(self, backend, size):
+        self.backend = backend
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def get_connection(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened >= self.size:
+                raise PoolExhaustedError("SQLite pool exhausted")
+            self._opened += 1
+        try:
+            return SQLiteConnection(self.backend.open_raw(), pool=self)
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def release(self, connection):
+        self._idle.put(connection)
+
+
+class SQLiteBackend:
+    """Local SQLite backend (WAL mode) for single-box deployments and tests"""
+
+    dialect = 'sqlite'
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.sqlite_path
+        self.logger = logging.getLogger(__name__)
+
+    def create_database(self):
+        """Create the directory holding the database file"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            return True
+        except OSError as e:
+            self.logger.error(f"Error creating database directory {directory}: {e}")
+            return False
+
+    def open_raw(self):
+        """Open and configure a raw sqlite3 connection"""
+        raw = sqlite3.connect(
+            self.path,
+            timeout=self.config.connection_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        if self.path != ':memory:':
+            raw.execute('PRAGMA journal_mode=WAL')
+        raw.execute('PRAGMA synchronous=NORMAL')
+        raw.execute('PRAGMA foreign_keys=ON')
+        return raw
+
+    def create_pool(self):
+        """Create the SQLite connection pool"""
+        return SQLitePool(self, self.config.pool_size)
+
+    def get_pooled_connection(self, pool):
+        """Take a connection from the pool"""
+        return pool.get_connection()
+
+    def connect(self):
+        """Open a standalone connection outside the pool"""
+        return SQLiteConnection(self.open_raw())
+
+    def execute_script(self, connection, statements):
+        """Run statements with one executescript() call, leaving the transaction open"""
+        script = ';\n'.join(sqlite for statement in statements for sqlite in translate_sql(statement))
+        if connection.raw.in_transaction:
+            # executescript() would commit it first
+            raise RuntimeError("execute_script() must start its own transaction")
+        connection.raw.executescript(f"BEGIN;\n{script};")
+
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend
+}
+
+
+def get_backend(config):
+    """Instantiate the backend selected by config.backend"""
+    try:
+        return BACKENDS[config.backend](config)
+    except KeyError:
+        raise ValueError(f"Unknown database backend '{config.backend}' (expected one of {sorted(BACKENDS)})")
@@ -16,38 +16,32 @@ def check_tables():
     try:
         db_config = DatabaseConfig()
         db_connection = DatabaseConnection(db_config)
-        connection = db_connection.get_connection()
-        
-        cursor = connection.cursor()
-        
-        # Check what tables exist
-        cursor.execute("SHOW TABLES")
-        tables = cursor.fetchall()
-        
-        print("Tables in ssh_automation database:")
-        for table in tables:
-            print(f"  - {table[0]}")
-        
-        # Check migration tracking table
-        if ('migrations',) in tables:
-            print("\nMigration tracking table content:")
-            cursor.execute("SELECT * FROM migrations ORDER BY executed_at")
-            migrations = cursor.fetchall()
-            for migration in migrations:
-                print(f"  - {migration[1]} (executed at {migration[2]})")
-        
-        # Check if users table exists and has structure
-        if ('users',) in tables:
-            print("\nUsers table structure:")
-            cursor.execute("DESCRIBE users")
-            columns = cursor.fetchall()
-            for col in columns:
-                print(f"  - {col[0]} ({col[1]})")
-        else:
-            print("\n❌ Users table does not exist!")
-        
-        cursor.close()
-        connection.close()
+        with db_connection.cursor() as cursor:
+            # Check what tables exist
+            cursor.execute("SHOW TABLES")
+            tables = cursor.fetchall()
+            
+            print("Tables in ssh_automation database:")
+            for table in tables:
+                print(f"  - {table[0]}")
+            
+            # Check migration tracking table
+            if ('migrations',) in tables:
+                print("\nMigration tracking table content:")
+                cursor.execute("SELECT * FROM migrations ORDER BY executed_at")
+                migrations = cursor.fetchall()
+                for migration in migrations:
+                    print(f"  - {migration[1]} (executed at {migration[2]})")
+            
+            # Check if users table exists and has structure
+            if ('users',) in tables:
+                print("\nUsers table structure:")
+                cursor.execute("DESCRIBE users")
+                columns = cursor.fetchall()
+                for col in columns:
+                    print(f"  - {col[0]} ({col[1]})")
+            else:
+                print("\n❌ Users table does not exist!")
         
     except Exception as e:
         print(f"Error checking database: {e}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN-based check that the hot queries are served by their indexes
+
+Exits non-zero if any query falls back to a full scan, a filesort or an
+unexpected index, so it can gate deployments after schema changes. Run it
+against a database with realistic data; on near-empty tables the optimizer
+may legitimately prefer a scan.
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DatabaseConnection, DatabaseConfig
+
+# Each hot query, the table to inspect and the indexes allowed to serve it
+HOT_QUERIES = [
+    {
+        'name': 'backups by device, newest first',
+        'table': 'backups',
+        'sql': """SELECT * FROM backups WHERE device_name = %s
+                  ORDER BY created_at DESC, id DESC LIMIT %s""",
+        'params': ('R1', 101),
+        'indexes': {'mysql': {'idx_device_created'}, 'sqlite': {'backups_idx_device_created'}}
+    },
+    {
+        'name': 'session validation',
+        'table': 'user_sessions',
+        'sql': """SELECT s.user_id, s.expires_at, u.username, u.email, u.full_name, u.role, u.is_active
+                  FROM user_sessions s
+                  JOIN users u ON s.user_id = u.id
+                  WHERE s.session_token = %s AND s.is_active = TRUE AND s.expires_at > NOW()""",
+        'params': ('token',),
+        'indexes': {
+            'mysql': {'idx_token_active_expires', 'session_token'},
+            'sqlite': {'user_sessions_idx_token_active_expires', 'sqlite_autoindex_user_sessions_1'}
+        }
+    },
+    {
+        'name': 'operation logs, newest first',
+        'table': 'operation_logs',
+        'sql': "SELECT * FROM operation_logs ORDER BY created_at DESC, id DESC LIMIT %s",
+        'params': (101,),
+        'indexes': {'mysql': {'idx_created_at'}, 'sqlite': {'operation_logs_idx_created_at'}}
+    },
+    {
+        'name': 'operation logs by device, newest first',
+        'table': 'operation_logs',
+        'sql': """SELECT * FROM operation_logs WHERE device_name = %s
+                  ORDER BY created_at DESC, id DESC LIMIT %s""",
+        'params': ('R1', 101),
+        'indexes': {'mysql': {'idx_device_created'}, 'sqlite': {'operation_logs_idx_device_created'}}
+    },
+    {
+        'name': 'expired session cleanup',
+        'table': 'user_sessions',
+        'sql': "SELECT id FROM user_sessions WHERE expires_at <= NOW() LIMIT %s",
+        'params': (1000,),
+        'indexes': {'mysql': {'idx_expires_at'}, 'sqlite': {'user_sessions_idx_expires_at'}}
+    }
+]
+
+
+def explain_mysql(cursor, query):
+    """Return (index used, problems) from MySQL's tabular EXPLAIN"""
+    cursor.execute("EXPLAIN " + query['sql'], query['params'])
+    rows = cursor.fetchall()
+    row = next((r for r in rows if r['table'] in (query['table'], 's')), rows[0])
+    problems = []
+    extra = row.get('Extra') or ''
+    if row['type'] == 'ALL':
+        problems.append("full table scan")
+    if 'filesort' in extra:
+        problems.append("filesort")
+    if 'temporary' in extra:
+        problems.append("temporary table")
+    return row['key'], problems
+
+
+def explain_sqlite(cursor, query):
+    """Return (index used, problems) from SQLite's EXPLAIN QUERY PLAN"""
+    cursor.execute("EXPLAIN QUERY PLAN " + query['sql'], query['params'])
+    details = [row[-1] for row in cursor.fetchall()]
+    index = None
+    problems = []
+    for detail in details:
+        if 'INDEX ' in detail and index is None:
+            index = detail.split('INDEX ', 1)[1].split(' ')[0]
+        if detail.startswith('SCAN') and 'INDEX' not in detail:
+            problems.append(f"full scan ({detail})")
+        if 'TEMP B-TREE' in detail:
+            problems.append(f"sort ({detail})")
+    return index, problems
+
+
+def check_indexes():
+    """EXPLAIN every hot query and report whether it uses the expected index"""
+    db_config = DatabaseConfig()
+    db_connection = DatabaseConnection(db_config)
+    dialect = db_connection.backend.dialect
+    explain = explain_mysql if dialect == 'mysql' else explain_sqlite
+    failures = 0
+
+    with db_connection.cursor(dictionary=(dialect == 'mysql')) as cursor:
+        for query in HOT_QUERIES:
+            index, problems = explain(cursor, query)
+            expected = query['indexes'][dialect]
+            if index not in expected:
+                problems.append(f"uses {index or 'no index'}, expected one of {sorted(expected)}")
+
+            if problems:
+                failures += 1
+                print(f"❌ {query['name']}: {'; '.join(problems)}")
+            else:
+                print(f"✅ {query['name']}: {index}")
+
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_indexes() else 1)
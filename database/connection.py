@@ -2,12 +2,20 @@
 Database configuration and connection management for SSH Automation Project
 """
 import os
-import mysql.connector
-from mysql.connector import Error
+import copy
+import time
+import base64
+import threading
+from contextlib import contextmanager
 import logging
 from datetime import datetime
 import json
 from dotenv import load_dotenv
+from .replicas import ReplicaRouter
+from .backends import DATABASE_ERRORS as Error, PoolExhaustedError, BackendUnavailableError, get_backend
+
+class DatabaseUnavailableError(Exception):
+    """Raised when no database connection can be obtained"""
 
 class DatabaseConfig:
     """Database configuration management"""
@@ -17,6 +25,12 @@ class DatabaseConfig:
         env_path = os.path.join(os.path.dirname(__file__), '.env')
         load_dotenv(env_path)
         
+        # Storage backend: 'mysql' (default) or 'sqlite'
+        self.backend = os.getenv('DB_BACKEND', 'mysql').lower()
+        self.sqlite_path = os.getenv(
+            'DB_SQLITE_PATH', os.path.join(os.path.dirname(__file__), 'ssh_automation.db')
+        )
+        
         # Default configuration - can be overridden by environment variables
         self.host = os.getenv('DB_HOST', 'localhost')
         self.port = int(os.getenv('DB_PORT', 3306))
@@ -26,11 +40,61 @@ class DatabaseConfig:
         
         # Connection pool settings
         self.pool_name = 'ssh_automation_pool'
-        self.pool_size = 5
+        self.pool_size = int(os.getenv('DB_POOL_SIZE', 5))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', 5))
+        self.pool_max_overflow = int(os.getenv('DB_POOL_MAX_OVERFLOW', 5))
+        self.connection_timeout = int(os.getenv('DB_CONNECTION_TIMEOUT', 30))
+        
+        # Read replicas - comma separated host[:port] list, empty for none
+        self.replica_hosts = self._parse_hosts(os.getenv('DB_REPLICA_HOSTS', ''))
+        # SQLite stand-ins for replicas - comma separated database file paths
+        self.replica_sqlite_paths = [
+            path.strip() for path in os.getenv('DB_REPLICA_SQLITE_PATHS', '').split(',') if path.strip()
+        ]
+        self.replica_retry_interval = float(os.getenv('DB_REPLICA_RETRY_INTERVAL', 30))
+        self.replica_check_interval = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 10))
+        self.read_only = False
+        
+        # Operation log writer settings
+        self.log_batch_size = int(os.getenv('DB_LOG_BATCH_SIZE', 100))
+        self.log_flush_interval = float(os.getenv('DB_LOG_FLUSH_INTERVAL', 1.0))
+        self.log_queue_size = int(os.getenv('DB_LOG_QUEUE_SIZE', 10000))
+        self.log_spool_path = os.getenv('DB_LOG_SPOOL_PATH') or None
         
         # Logging setup
         self.logger = logging.getLogger(__name__)
         
+    def _parse_hosts(self, value):
+        """Parse a comma separated host[:port] list"""
+        hosts = []
+        for entry in value.split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            host, _, port = entry.partition(':')
+            hosts.append((host, int(port) if port else self.port))
+        return hosts
+    
+    def replica_configs(self):
+        """Build a read-only configuration for each replica host (or SQLite file)"""
+        if self.backend == 'sqlite':
+            targets = [(self.host, self.port, path) for path in self.replica_sqlite_paths]
+        else:
+            targets = [(host, port, self.sqlite_path) for host, port in self.replica_hosts]
+        
+        configs = []
+        for index, (host, port, sqlite_path) in enumerate(targets, 1):
+            replica = copy.copy(self)
+            replica.host = host
+            replica.port = port
+            replica.sqlite_path = sqlite_path
+            replica.pool_name = f"{self.pool_name}_replica{index}"
+            replica.replica_hosts = []
+            replica.replica_sqlite_paths = []
+            replica.read_only = True
+            configs.append(replica)
+        return configs
+    
     def get_connection_config(self):
         """Get database connection configuration"""
         return {
@@ -40,92 +104,234 @@ class DatabaseConfig:
             'user': self.username,
             'password': self.password,
             'autocommit': True,
+            'connection_timeout': self.connection_timeout,
             'charset': 'utf8mb4',
             'collation': 'utf8mb4_unicode_ci'
         }
     
     def create_database_if_not_exists(self):
         """Create database if it doesn't exist"""
+        return get_backend(self).create_database()
+
+def encode_page_cursor(row):
+    """Encode a row's (created_at, id) position as an opaque pagination cursor"""
+    created_at = row['created_at']
+    if isinstance(created_at, datetime):
+        created_at = created_at.strftime('%Y-%m-%d %H:%M:%S')
+    token = f"{created_at}|{row['id']}".encode('utf-8')
+    return base64.urlsafe_b64encode(token).decode('ascii')
+
+def decode_page_cursor(cursor):
+    """Decode a pagination cursor into (created_at, id); raises ValueError if malformed"""
+    try:
+        created_at, _, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').partition('|')
+        return datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S'), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid page cursor: {cursor}") from e
+
+@contextmanager
+def managed_cursor(connection_scope, dictionary=False, commit=False):
+    """Open a cursor on a borrowed connection, committing or rolling back on exit"""
+    with connection_scope as connection:
+        cursor = connection.cursor(dictionary=dictionary)
         try:
-            # Connect without specifying database
-            temp_config = self.get_connection_config()
-            temp_config.pop('database')
-            
-            connection = mysql.connector.connect(**temp_config)
-            cursor = connection.cursor()
-            
-            # Create database if it doesn't exist
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
-            self.logger.info(f"Database '{self.database}' created or already exists")
-            
+            yield cursor
+            if commit:
+                connection.commit()
+        except Exception:
+            try:
+                connection.rollback()
+            except Error:
+                pass
+            raise
+        finally:
             cursor.close()
-            connection.close()
-            return True
-            
-        except Error as e:
-            self.logger.error(f"Error creating database: {e}")
-            return False
 
 class DatabaseConnection:
-    """Database connection management with connection pooling"""
+    """Database connection management with connection pooling
+    
+    Prefer the ``acquire()`` and ``cursor()`` context managers, which always
+    hand the connection back. Code that calls ``get_connection()`` directly
+    must release it with ``return_connection()``.
+    """
     
     def __init__(self, config: DatabaseConfig):
         self.config = config
+        self.backend = get_backend(config)
         self.connection_pool = None
         self.logger = logging.getLogger(__name__)
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._overflow = set()
+        self._stats = {
+            'acquired': 0,
+            'released': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'overflow_opened': 0
+        }
         
     def create_connection_pool(self):
         """Create connection pool"""
+        with self._pool_lock:
+            if self.connection_pool:
+                return True
+            try:
+                # Ensure database exists
+                self.backend.create_database()
+                
+                # Create connection pool
+                self.connection_pool = self.backend.create_pool()
+                self.logger.info(
+                    f"{self.backend.dialect} connection pool created successfully "
+                    f"with {self.config.pool_size} connections"
+                )
+                return True
+                
+            except Error + (BackendUnavailableError,) as e:
+                self.logger.error(f"Error creating connection pool: {e}")
+                return False
+    
+    def get_connection(self):
+        """Get connection from pool, waiting up to pool_timeout for a free one
+        
+        When the pool stays exhausted for the whole wait, up to
+        pool_max_overflow extra connections are opened outside the pool.
+        Returns None if no connection could be obtained.
+        """
         try:
-            # Ensure database exists
-            self.config.create_database_if_not_exists()
-            
-            # Create connection pool
-            pool_config = self.config.get_connection_config()
-            pool_config.update({
-                'pool_name': self.config.pool_name,
-                'pool_size': self.config.pool_size,
-                'pool_reset_session': True
-            })
-            
-            self.connection_pool = mysql.connector.pooling.MySQLConnectionPool(**pool_config)
-            self.logger.info(f"Connection pool created successfully with {self.config.pool_size} connections")
-            return True
-            
+            return self._get_connection(self.config.pool_timeout)
+        except PoolExhaustedError:
+            return None
+    
+    def get_connection_nowait(self):
+        """Get a connection without waiting for the pool
+        
+        Raises PoolExhaustedError when the pool and its overflow are all in
+        use, and returns None when the database cannot be reached.
+        """
+        return self._get_connection(0)
+    
+    def _get_connection(self, timeout):
+        if not self.connection_pool:
+            if not self.create_connection_pool():
+                return None
+        
+        started = time.monotonic()
+        deadline = started + timeout
+        delay = 0.005
+        waited = False
+        
+        while True:
+            try:
+                connection = self.backend.get_pooled_connection(self.connection_pool)
+                break
+            except PoolExhaustedError:
+                # Pool exhausted - back off and retry until the deadline
+                if time.monotonic() >= deadline:
+                    if self._overflow_full():
+                        self._record_wait(time.monotonic() - started, timed_out=True)
+                        self.logger.error(
+                            f"Connection pool exhausted after waiting {timeout}s"
+                        )
+                        raise
+                    connection = self._open_overflow_connection()
+                    if connection is None:
+                        return None
+                    break
+                waited = True
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+            except Error as e:
+                self.logger.error(f"Error getting connection from pool: {e}")
+                return None
+        
+        if waited:
+            self._record_wait(time.monotonic() - started)
+        with self._stats_lock:
+            self._stats['acquired'] += 1
+        return connection
+    
+    def return_connection(self, connection):
+        """Hand a connection back to the pool (or close it if it was overflow)"""
+        if connection is None:
+            return
+        try:
+            with self._stats_lock:
+                self._overflow.discard(id(connection))
+                self._stats['released'] += 1
+            # Pooled connections go back to the pool on close()
+            connection.close()
         except Error as e:
-            self.logger.error(f"Error creating connection pool: {e}")
-            return False
+            self.logger.warning(f"Error returning connection: {e}")
     
-    def get_connection(self):
-        """Get connection from pool"""
+    @contextmanager
+    def acquire(self):
+        """Borrow a connection for the duration of a with-block"""
+        connection = self.get_connection()
+        if connection is None:
+            raise DatabaseUnavailableError("No database connection available")
         try:
-            if not self.connection_pool:
-                if not self.create_connection_pool():
-                    return None
-            
-            connection = self.connection_pool.get_connection()
-            return connection
-            
+            yield connection
+        finally:
+            self.return_connection(connection)
+    
+    def cursor(self, dictionary=False, commit=False):
+        """Borrow a connection and cursor; optionally commit when the block succeeds"""
+        return managed_cursor(self.acquire(), dictionary=dictionary, commit=commit)
+    
+    def pool_stats(self):
+        """Return pool usage and wait-time metrics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['overflow_in_use'] = len(self._overflow)
+        stats['pool_size'] = self.config.pool_size
+        stats['in_use'] = stats['acquired'] - stats['released']
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+    
+    def _overflow_full(self):
+        with self._stats_lock:
+            return len(self._overflow) >= self.config.pool_max_overflow
+    
+    def _open_overflow_connection(self):
+        """Open a temporary connection outside the pool, within the overflow limit"""
+        if self._overflow_full():
+            return None
+        try:
+            connection = self.backend.connect()
         except Error as e:
-            self.logger.error(f"Error getting connection from pool: {e}")
+            self.logger.error(f"Error opening overflow connection: {e}")
             return None
+        with self._stats_lock:
+            self._overflow.add(id(connection))
+            self._stats['overflow_opened'] += 1
+        self.logger.warning("Connection pool exhausted - opened overflow connection")
+        return connection
+    
+    def _record_wait(self, seconds, timed_out=False):
+        """Track how long callers waited for a pooled connection"""
+        with self._stats_lock:
+            self._stats['waits'] += 1
+            self._stats['wait_time_total'] += seconds
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], seconds)
+            if timed_out:
+                self._stats['timeouts'] += 1
     
     def test_connection(self):
         """Test database connection"""
         try:
-            connection = self.get_connection()
-            if connection:
-                cursor = connection.cursor()
+            with self.cursor() as cursor:
                 cursor.execute("SELECT 1")
                 result = cursor.fetchone()
-                cursor.close()
-                connection.close()
-                
-                if result and result[0] == 1:
-                    self.logger.info("Database connection test successful")
-                    return True
+            
+            if result and result[0] == 1:
+                self.logger.info("Database connection test successful")
+                return True
                     
-        except Error as e:
+        except Error + (DatabaseUnavailableError,) as e:
             self.logger.error(f"Database connection test failed: {e}")
             
         return False
@@ -133,10 +339,20 @@ class DatabaseConnection:
 class DatabaseManager:
     """Main database manager class"""
     
+    # Upper bound on rows returned by one page of a paginated query
+    MAX_PAGE_SIZE = 500
+    
     def __init__(self):
         self.config = DatabaseConfig()
         self.connection = DatabaseConnection(self.config)
+        self.replicas = ReplicaRouter(
+            self.connection,
+            [DatabaseConnection(config) for config in self.config.replica_configs()],
+            retry_interval=self.config.replica_retry_interval,
+            check_interval=self.config.replica_check_interval
+        )
         self.logger = logging.getLogger(__name__)
+        self.log_writer = None
         
         # Setup logging
         logging.basicConfig(
@@ -149,12 +365,8 @@ class DatabaseManager:
         try:
             self.logger.info("Initializing database...")
             
-            # Test connection
-            if not self.connection.test_connection():
-                self.logger.error("Failed to connect to database")
-                return False
-            
-            # Run migrations
+            # Run migrations - on an up-to-date schema this is a single query,
+            # and it fails fast if the database is unreachable
             from .migration_manager import MigrationManager
             migration_manager = MigrationManager(self.connection)
             
@@ -170,32 +382,44 @@ class DatabaseManager:
             return False
     
     def get_connection(self):
-        """Get database connection"""
+        """Get database connection (release it with return_connection)"""
         return self.connection.get_connection()
     
-    def execute_query(self, query, params=None, fetch=False):
-        """Execute database query"""
+    def return_connection(self, connection):
+        """Return a connection obtained from get_connection"""
+        self.connection.return_connection(connection)
+    
+    def acquire(self):
+        """Context manager borrowing a pooled connection"""
+        return self.connection.acquire()
+    
+    def cursor(self, dictionary=False, commit=False, read_only=False):
+        """Context manager borrowing a pooled connection and cursor
+        
+        read_only=True routes the cursor to a healthy replica when replicas
+        are configured, falling back to the primary.
+        """
+        if read_only and self.replicas.replicas:
+            return managed_cursor(self.replicas.acquire_read(), dictionary=dictionary)
+        return self.connection.cursor(dictionary=dictionary, commit=commit)
+    
+    def pool_stats(self):
+        """Return connection pool metrics"""
+        return self.connection.pool_stats()
+    
+    def execute_query(self, query, params=None, fetch=False, read_only=False):
+        """Execute database query (read_only queries may be served by a replica)"""
         try:
-            connection = self.get_connection()
-            if not connection:
-                return None
+            with self.cursor(dictionary=True, read_only=read_only) as cursor:
+                cursor.execute(query, params or ())
                 
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            
-            if fetch:
-                if 'SELECT' in query.upper():
-                    result = cursor.fetchall()
-                else:
-                    result = cursor.fetchone()
-            else:
-                result = cursor.rowcount
-            
-            cursor.close()
-            connection.close()
-            return result
+                if fetch:
+                    if 'SELECT' in query.upper():
+                        return cursor.fetchall()
+                    return cursor.fetchone()
+                return cursor.rowcount
             
-        except Error as e:
+        except Error + (DatabaseUnavailableError,) as e:
             self.logger.error(f"Database query error: {e}")
             return None
     
@@ -221,7 +445,7 @@ class DatabaseManager:
     def get_devices(self):
         """Get all devices"""
         query = "SELECT * FROM devices ORDER BY name"
-        return self.execute_query(query, fetch=True)
+        return self.execute_query(query, fetch=True, read_only=True)
     
     def get_device_by_name(self, name):
         """Get device by name"""
@@ -229,22 +453,86 @@ class DatabaseManager:
         result = self.execute_query(query, (name,), fetch=True)
         return result[0] if result else None
     
+    def get_log_writer(self):
+        """Get the background operation log writer, starting it on first use"""
+        if self.log_writer is None:
+            from .log_writer import OperationLogWriter
+            self.log_writer = OperationLogWriter(
+                self.connection,
+                batch_size=self.config.log_batch_size,
+                flush_interval=self.config.log_flush_interval,
+                max_queue_size=self.config.log_queue_size,
+                spool_path=self.config.log_spool_path
+            )
+            self.log_writer.start()
+        return self.log_writer
+    
     def log_operation(self, operation_type, device_name, status, details=None):
-        """Log automation operation"""
-        query = """
-        INSERT INTO operation_logs (operation_type, device_name, status, details, created_at)
-        VALUES (%s, %s, %s, %s, NOW())
-        """
-        return self.execute_query(query, (operation_type, device_name, status, details))
+        """Log automation operation (queued and written in batches)"""
+        return self.get_log_writer().write(operation_type, device_name, status, details)
+    
+    def flush_operation_logs(self, timeout=5.0):
+        """Block until queued operation logs have been written or spooled"""
+        if self.log_writer is None:
+            return True
+        return self.log_writer.flush(timeout)
     
     def get_operation_logs(self, limit=100):
-        """Get operation logs"""
-        query = """
-        SELECT * FROM operation_logs 
-        ORDER BY created_at DESC 
-        LIMIT %s
+        """Get the most recent operation logs"""
+        page = self.get_operation_logs_page(limit=limit)
+        return page['items'] if page else None
+    
+    def get_operation_logs_page(self, limit=100, cursor=None, device_name=None, operation_type=None,
+                                status=None, since=None, until=None, flush=False):
+        """Get one page of operation logs, newest first, with optional filters
+        
+        Entries still queued in this process are only included with ``flush``,
+        which waits up to a second for them to be written.
+        Returns {'items': [...], 'next_cursor': str or None}, or None on error.
+        """
+        if flush:
+            self.flush_operation_logs(timeout=1.0)
+        filters = {
+            'device_name = %s': device_name,
+            'operation_type = %s': operation_type,
+            'status = %s': status,
+            'created_at >= %s': since,
+            'created_at < %s': until
+        }
+        return self._fetch_page('operation_logs', filters, limit, cursor)
+    
+    def get_operation_stats(self, since=None, until=None, device_name=None, operation_type=None,
+                            hourly=False):
+        """Operation counts and success rates from the hourly rollup table
+        
+        Groups by operation type and device (and hour when ``hourly`` is set)
+        without touching operation_logs. Returns None on error.
         """
-        return self.execute_query(query, (limit,), fetch=True)
+        conditions = []
+        params = []
+        for condition, value in (('bucket_start >= %s', since), ('bucket_start < %s', until),
+                                 ('device_name = %s', device_name),
+                                 ('operation_type = %s', operation_type)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        
+        group = "bucket_start, operation_type, device_name" if hourly else "operation_type, device_name"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+        SELECT {group}, SUM(total_count) AS total, SUM(success_count) AS successes,
+               SUM(failure_count) AS failures
+        FROM operation_log_rollups_hourly
+        {where}
+        GROUP BY {group}
+        ORDER BY {'bucket_start, ' if hourly else ''}total DESC
+        """
+        rows = self.execute_query(query, tuple(params), fetch=True, read_only=True)
+        if rows is None:
+            return None
+        for row in rows:
+            row['success_rate'] = round(int(row['successes']) / int(row['total']), 4) if row['total'] else None
+        return rows
     
     def save_backup(self, device_name, backup_type, file_path, file_size):
         """Save backup information"""
@@ -254,18 +542,60 @@ class DatabaseManager:
         """
         return self.execute_query(query, (device_name, backup_type, file_path, file_size))
     
-    def get_backups(self, device_name=None):
-        """Get backup history"""
-        if device_name:
-            query = """
-            SELECT * FROM backups 
-            WHERE device_name = %s 
-            ORDER BY created_at DESC
-            """
-            return self.execute_query(query, (device_name,), fetch=True)
-        else:
-            query = "SELECT * FROM backups ORDER BY created_at DESC"
-            return self.execute_query(query, fetch=True)
+    def get_backups(self, device_name=None, limit=100):
+        """Get the most recent backups, optionally for one device"""
+        page = self.get_backups_page(limit=limit, device_name=device_name)
+        return page['items'] if page else None
+    
+    def get_backups_page(self, limit=100, cursor=None, device_name=None, backup_type=None,
+                         since=None, until=None):
+        """Get one page of backup records, newest first, with optional filters
+        
+        Returns {'items': [...], 'next_cursor': str or None}, or None on error.
+        """
+        filters = {
+            'device_name = %s': device_name,
+            'backup_type = %s': backup_type,
+            'created_at >= %s': since,
+            'created_at < %s': until
+        }
+        return self._fetch_page('backups', filters, limit, cursor)
+    
+    def _fetch_page(self, table, filters, limit, cursor):
+        """Keyset-paginate a table on (created_at, id) descending
+        
+        Each page seeks straight to the cursor position through the
+        created_at index, so cost stays flat however deep the client pages.
+        Filters map a condition with one placeholder to its value; None
+        values are skipped. Raises ValueError for a malformed cursor.
+        """
+        limit = max(1, min(int(limit), self.MAX_PAGE_SIZE))
+        conditions = []
+        params = []
+        for condition, value in filters.items():
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        
+        if cursor:
+            created_at, row_id = decode_page_cursor(cursor)
+            conditions.append("(created_at < %s OR (created_at = %s AND id < %s))")
+            params.extend([created_at, created_at, row_id])
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+        SELECT * FROM {table}
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+        """
+        # One extra row tells us whether another page exists
+        rows = self.execute_query(query, tuple(params) + (limit + 1,), fetch=True, read_only=True)
+        if rows is None:
+            return None
+        
+        next_cursor = encode_page_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return {'items': rows[:limit], 'next_cursor': next_cursor}
 
 # Global database manager instance
 db_manager = None
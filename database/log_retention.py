@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Operation log retention and hourly rollups
+
+Run periodically (``start()`` in a long-lived process, or this script from
+cron). On MySQL old months are removed with ``ALTER TABLE ... DROP
+PARTITION``, which is a metadata operation regardless of row count; on
+SQLite expired rows are deleted in small batches.
+"""
+import os
+import re
+import sys
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Allow running as a script from the project root or the database directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.settings_cache import settings_cache
+
+logger = logging.getLogger(__name__)
+
+# Hour bucket expression per dialect
+BUCKET_EXPRESSIONS = {
+    'mysql': "FROM_UNIXTIME(UNIX_TIMESTAMP(created_at) DIV 3600 * 3600)",
+    'sqlite': "strftime('%Y-%m-%d %H:00:00', created_at)"
+}
+
+ROLLUP_QUERY = """
+INSERT INTO operation_log_rollups_hourly
+    (bucket_start, operation_type, device_name, total_count, success_count, failure_count)
+SELECT {bucket} AS bucket_start, operation_type, COALESCE(device_name, '') AS device_name,
+       COUNT(*), SUM(status = 'success'), SUM(status = 'failure')
+FROM operation_logs
+WHERE created_at >= %s
+GROUP BY {bucket}, operation_type, COALESCE(device_name, '')
+ON DUPLICATE KEY UPDATE
+    total_count = VALUES(total_count),
+    success_count = VALUES(success_count),
+    failure_count = VALUES(failure_count),
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+PARTITIONS_QUERY = """
+SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound
+FROM information_schema.PARTITIONS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_logs' AND PARTITION_NAME IS NOT NULL
+ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+
+class OperationLogMaintenance:
+    """Keeps operation_logs bounded and operation_log_rollups_hourly current
+
+    Rollups are recomputed from ``lookback_hours`` before the newest bucket,
+    or from the oldest row inserted since the last pass if that is earlier,
+    so rows flushed or replayed late by the log writer are still counted in
+    the hour they belong to. On MySQL a pass holds an advisory lock, so
+    only one process runs maintenance at a time. Raw rows older
+    than the ``log_retention_days`` system setting are dropped; rollups are
+    kept for ``rollup_retention_days``.
+    """
+
+    def __init__(self, db_manager, lookback_hours=2, months_ahead=3,
+                 rollup_retention_days=365, delete_batch_size=5000):
+        self.db = db_manager
+        self.lookback_hours = lookback_hours
+        self.months_ahead = months_ahead
+        self.rollup_retention_days = rollup_retention_days
+        self.delete_batch_size = delete_batch_size
+        self._stop = threading.Event()
+
+    @property
+    def dialect(self):
+        return self.db.connection.backend.dialect
+
+    def run(self):
+        """Run one full maintenance pass and return what was done"""
+        result = {'rollup_rows': 0, 'partitions_added': [], 'partitions_dropped': [],
+                  'rows_deleted': 0, 'rollups_deleted': 0, 'skipped': False}
+        try:
+            with self._maintenance_lock() as acquired:
+                if not acquired:
+                    logger.info("Operation log maintenance is running in another process, skipping")
+                    result['skipped'] = True
+                    return result
+                result['rollup_rows'] = self.refresh_rollups()
+                if self.dialect == 'mysql':
+                    result['partitions_added'] = self.ensure_partitions()
+                dropped = self.drop_expired()
+                result.update(dropped)
+            logger.info(f"Operation log maintenance completed: {result}")
+        except Exception as e:
+            logger.error(f"Operation log maintenance failed: {e}")
+        return result
+
+    def refresh_rollups(self, since=None):
+        """Recompute hourly rollups from `since`
+
+        By default this is the newest bucket minus the lookback, or the
+        oldest row inserted since the last refresh (tracked by id in
+        operation_log_rollup_state) when that is earlier.
+        """
+        last_id = None
+        if since is None:
+            with self.db.cursor(dictionary=True) as cursor:
+                cursor.execute("SELECT MAX(bucket_start) AS latest FROM operation_log_rollups_hourly")
+                latest = _as_datetime(cursor.fetchone()['latest'])
+                cursor.execute("SELECT last_log_id FROM operation_log_rollup_state WHERE id = 1")
+                state = cursor.fetchone()
+                cursor.execute(
+                    "SELECT MIN(created_at) AS oldest, MAX(id) AS last_id FROM operation_logs WHERE id > %s",
+                    (state['last_log_id'] if state else 0,)
+                )
+                new_rows = cursor.fetchone()
+            since = (latest - timedelta(hours=self.lookback_hours)) if latest else datetime(1970, 1, 2)
+            oldest = _as_datetime(new_rows['oldest'])
+            if oldest and oldest < since:
+                since = oldest
+            last_id = new_rows['last_id']
+        since = since.replace(minute=0, second=0, microsecond=0)
+
+        query = ROLLUP_QUERY.format(bucket=BUCKET_EXPRESSIONS[self.dialect])
+        with self.db.cursor(commit=True) as cursor:
+            cursor.execute(query, (since,))
+            rollup_rows = cursor.rowcount
+            if last_id is not None:
+                cursor.execute("""
+                    INSERT INTO operation_log_rollup_state (id, last_log_id) VALUES (1, %s)
+                    ON DUPLICATE KEY UPDATE last_log_id = VALUES(last_log_id), updated_at = CURRENT_TIMESTAMP
+                """, (last_id,))
+        return rollup_rows
+
+    def ensure_partitions(self):
+        """Split monthly partitions off p_future up to months_ahead (MySQL only)"""
+        with self.db.cursor(dictionary=True) as cursor:
+            cursor.execute(PARTITIONS_QUERY)
+            names = [row['name'] for row in cursor.fetchall()]
+        if 'p_future' not in names:
+            return []
+
+        months = [name[1:] for name in names if re.fullmatch(r'p\d{6}', name)]
+        today = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month = _next_month(datetime.strptime(max(months), '%Y%m')) if months else today
+        target = today
+        for _ in range(self.months_ahead):
+            target = _next_month(target)
+
+        added = []
+        definitions = []
+        while month <= target:
+            name = f"p{month:%Y%m}"
+            definitions.append(
+                f"PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{_next_month(month):%Y-%m-%d} 00:00:00'))"
+            )
+            added.append(name)
+            month = _next_month(month)
+        if not definitions:
+            return []
+
+        # p_future is empty in normal operation, so this only rewrites metadata
+        definitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE operation_logs REORGANIZE PARTITION p_future INTO ({', '.join(definitions)})"
+            )
+        logger.info(f"Added operation_logs partitions: {', '.join(added)}")
+        return added
+
+    def drop_expired(self, retention_days=None):
+        """Remove operation logs older than the retention period"""
+        if retention_days is None:
+            retention_days = settings_cache.get(self.db, 'log_retention_days', 90)
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        result = {'partitions_dropped': [], 'rows_deleted': 0}
+
+        if self.dialect == 'mysql':
+            result['partitions_dropped'] = self._drop_partitions_before(cutoff)
+        else:
+            result['rows_deleted'] = self._delete_in_batches('operation_logs', 'created_at', cutoff)
+
+        rollup_cutoff = datetime.now() - timedelta(days=self.rollup_retention_days)
+        result['rollups_deleted'] = self._delete_in_batches(
+            'operation_log_rollups_hourly', 'bucket_start', rollup_cutoff
+        )
+        return result
+
+    def start(self, interval_seconds=3600):
+        """Run maintenance now and then periodically on a daemon thread"""
+        def run_maintenance():
+            self.run()
+            while not self._stop.wait(interval_seconds):
+                self.run()
+
+        self._stop.clear()
+        thread = threading.Thread(target=run_maintenance, name='operation-log-maintenance', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop the periodic maintenance thread"""
+        self._stop.set()
+
+    @contextmanager
+    def _maintenance_lock(self):
+        """Hold a MySQL advisory lock for the pass; yields False if another process has it
+
+        SQLite has no partitions to reorganize and its rollup and delete
+        statements are idempotent, so no lock is taken there.
+        """
+        if self.dialect != 'mysql':
+            yield True
+            return
+        with self.db.acquire() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT GET_LOCK(CONCAT(DATABASE(), '.operation_log_maintenance'), 0)")
+                acquired = cursor.fetchone()[0] == 1
+                try:
+                    yield acquired
+                finally:
+                    if acquired:
+                        cursor.execute("SELECT RELEASE_LOCK(CONCAT(DATABASE(), '.operation_log_maintenance'))")
+                        cursor.fetchone()
+            finally:
+                cursor.close()
+
+    def _drop_partitions_before(self, cutoff):
+        """Drop whole partitions whose upper bound is at or before the cutoff"""
+        with self.db.cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT UNIX_TIMESTAMP(%s) AS cutoff", (cutoff,))
+            cutoff_ts = int(cursor.fetchone()['cutoff'])
+            cursor.execute(PARTITIONS_QUERY)
+            partitions = cursor.fetchall()
+
+        expired = [row['name'] for row in partitions
+                   if row['bound'] != 'MAXVALUE' and int(row['bound']) <= cutoff_ts]
+        if expired:
+            with self.db.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE operation_logs DROP PARTITION {', '.join(expired)}")
+            logger.info(f"Dropped operation_logs partitions: {', '.join(expired)}")
+        return expired
+
+    def _delete_in_batches(self, table, column, cutoff):
+        """Delete rows older than cutoff in short transactions"""
+        deleted = 0
+        with self.db.acquire() as connection:
+            cursor = connection.cursor()
+            try:
+                while True:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE {column} < %s LIMIT %s",
+                        (cutoff, self.delete_batch_size)
+                    )
+                    connection.commit()
+                    deleted += cursor.rowcount
+                    if cursor.rowcount < self.delete_batch_size:
+                        break
+            finally:
+                cursor.close()
+        return deleted
+
+
+def _as_datetime(value):
+    """SQLite returns timestamps from aggregates as text"""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _next_month(value):
+    """First day of the month after value"""
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+if __name__ == "__main__":
+    from database.connection import get_db_manager
+    OperationLogMaintenance(get_db_manager()).run()
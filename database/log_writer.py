@@ -0,0 +1,329 @@
+"""
+Asynchronous buffered writer for the operation_logs table
+"""
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+
+from .backends import CONNECTION_ERRORS
+from .connection import DatabaseUnavailableError
+
+
+class OperationLogWriter:
+    """Batches operation log inserts on a background thread
+
+    Callers enqueue events and return immediately. A single worker thread
+    drains the bounded queue and flushes rows with one batched INSERT when
+    either ``batch_size`` rows are waiting or ``flush_interval`` seconds have
+    passed. If the queue is full, or MySQL is unreachable, events are
+    appended to a local JSON-lines spool file and replayed once the
+    database is back, so device work never blocks on audit logging:
+    rows that do not fit in the queue are parked in memory and spooled
+    by the worker in one write.
+
+    Rows the database rejects (an unknown status, an oversized column, a
+    missing device) are set aside in ``<spool>.rejected`` so one bad row
+    never holds back the rest.
+    """
+
+    INSERT_QUERY = """
+    INSERT INTO operation_logs (operation_type, device_name, status, details, created_at)
+    VALUES (%s, %s, %s, %s, %s)
+    """
+
+    def __init__(self, db_connection, batch_size=100, flush_interval=1.0,
+                 max_queue_size=10000, enqueue_timeout=0.05, spool_path=None,
+                 retry_interval=30.0, replay_lock_timeout=600.0):
+        self.db_connection = db_connection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.retry_interval = retry_interval
+        self.replay_lock_timeout = replay_lock_timeout
+        self.spool_path = spool_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'logs', 'operation_logs.spool'
+        )
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._overflow = []
+        self._overflow_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._db_down_until = 0.0
+        self._stats = {'queued': 0, 'written': 0, 'spooled': 0, 'replayed': 0}
+
+    def start(self):
+        """Start the background writer thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='operation-log-writer', daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, operation_type, device_name, status, details=None):
+        """Enqueue an operation log entry without touching the database"""
+        row = (operation_type, device_name, status, details, datetime.now())
+        try:
+            # Short bounded wait is the back-pressure; a full queue spills to disk
+            self._queue.put(row, timeout=self.enqueue_timeout)
+            self._stats['queued'] += 1
+        except queue.Full:
+            with self._overflow_lock:
+                self._overflow.append(row)
+                if len(self._overflow) < self._queue.maxsize:
+                    return True
+                rows, self._overflow = self._overflow, []
+            # The worker is stuck on the database; write the backlog out in one go, without fsync
+            self._spool(rows, fsync=False)
+        return True
+
+    def flush(self, timeout=5.0):
+        """Ask the worker to flush pending rows and wait for the queue to drain"""
+        self._flush_requested.set()
+        deadline = time.monotonic() + timeout
+        while (self._queue.unfinished_tasks or self._overflow) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self._queue.unfinished_tasks == 0 and not self._overflow
+
+    def close(self, timeout=5.0):
+        """Flush outstanding rows and stop the worker thread"""
+        if not self._thread:
+            return
+        self._stopping.set()
+        self._flush_requested.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        """Return writer counters and current queue depth"""
+        stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize() + len(self._overflow)
+        stats['spool_exists'] = os.path.exists(self.spool_path)
+        return stats
+
+    def _run(self):
+        """Worker loop: collect rows and flush by size or time"""
+        batch = []
+        last_flush = last_replay = time.monotonic()
+
+        while True:
+            try:
+                self._spool_overflow()
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                    # Drain whatever is already waiting, up to one batch
+                    while len(batch) < self.batch_size:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+
+                due = time.monotonic() - last_flush >= self.flush_interval
+                if batch and (len(batch) >= self.batch_size or due or self._flush_requested.is_set()):
+                    try:
+                        self._flush_batch(batch)
+                    finally:
+                        for _ in batch:
+                            self._queue.task_done()
+                        batch = []
+                        last_flush = time.monotonic()
+                elif due:
+                    last_flush = time.monotonic()
+
+                # Replay on a timer too, so a steady stream of writes cannot starve it
+                if time.monotonic() - last_replay >= self.flush_interval:
+                    last_replay = time.monotonic()
+                    self._replay_spool()
+
+                if self._queue.empty() and not batch and not self._overflow:
+                    self._flush_requested.clear()
+                    if self._stopping.is_set():
+                        return
+            except Exception as e:
+                # Keep the thread alive; a dead writer would make every write() spool
+                self.logger.error(f"Operation log writer error: {e}")
+                time.sleep(self.flush_interval)
+
+    def _spool_overflow(self):
+        """Spool the rows write() could not queue"""
+        with self._overflow_lock:
+            rows, self._overflow = self._overflow, []
+        if rows:
+            self._spool(rows)
+
+    def _flush_batch(self, rows):
+        """Insert rows, spooling whatever cannot be sent while the database is down"""
+        if time.monotonic() < self._db_down_until:
+            self._spool(rows)
+            return
+        written, unsent = self._insert_rows(rows)
+        self._stats['written'] += written
+        if unsent:
+            self._spool(unsent)
+
+    def _insert_rows(self, rows):
+        """Insert rows; returns (rows written, rows left unsent because the database is down)
+
+        A batch the database rejects is retried one row at a time, and only
+        the rows that fail on their own are set aside.
+        """
+        if len(rows) > 1:
+            try:
+                self._execute(rows)
+                return len(rows), []
+            except CONNECTION_ERRORS + (DatabaseUnavailableError,) as e:
+                self._mark_down(len(rows), e)
+                return 0, rows
+            except Exception as e:
+                self.logger.warning(f"Operation log batch rejected, inserting {len(rows)} rows one by one: {e}")
+
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                self._execute([row])
+                written += 1
+            except CONNECTION_ERRORS + (DatabaseUnavailableError,) as e:
+                self._mark_down(len(rows) - index, e)
+                return written, rows[index:]
+            except Exception as e:
+                self.logger.error(f"Operation log row rejected by the database: {e}")
+                self._append(self.spool_path + '.rejected', [row], error=str(e))
+        return written, []
+
+    def _execute(self, rows):
+        with self.db_connection.cursor(commit=True) as cursor:
+            cursor.executemany(self.INSERT_QUERY, rows)
+
+    def _mark_down(self, count, error):
+        self.logger.error(f"Operation log flush failed, spooling {count} rows: {error}")
+        self._db_down_until = time.monotonic() + self.retry_interval
+
+    def _spool(self, rows, fsync=True):
+        """Append rows to the local spool file; returns False if it cannot be written"""
+        if not self._append(self.spool_path, rows, fsync=fsync):
+            return False
+        self._stats['spooled'] += len(rows)
+        return True
+
+    def _append(self, path, rows, error=None, fsync=True, mode='a'):
+        """Write rows to a JSON-lines file and fsync it; returns False if it cannot be written"""
+        with self._spool_lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, mode, encoding='utf-8') as f:
+                    for operation_type, device_name, status, details, created_at in rows:
+                        entry = {
+                            'operation_type': operation_type,
+                            'device_name': device_name,
+                            'status': status,
+                            'details': details,
+                            'created_at': created_at.isoformat()
+                        }
+                        if error:
+                            entry['error'] = error
+                        f.write(json.dumps(entry) + '\n')
+                    f.flush()
+                    if fsync:
+                        os.fsync(f.fileno())
+                return True
+            except OSError as e:
+                self.logger.error(f"Unable to write {len(rows)} operation log rows to {path}: {e}")
+                return False
+
+    def _replay_spool(self):
+        """Re-insert spooled rows once the database is reachable again
+
+        The spool is shared by every process on the host, so a lock file
+        makes sure only one of them replays it at a time.
+        """
+        replay_path = self.spool_path + '.replay'
+        if time.monotonic() < self._db_down_until or not (
+                os.path.exists(self.spool_path) or os.path.exists(replay_path)):
+            return
+        if not self._acquire_replay_lock():
+            return
+
+        try:
+            with self._spool_lock:
+                # A replay interrupted earlier leaves its file behind; finish that one first
+                if not os.path.exists(replay_path):
+                    os.replace(self.spool_path, replay_path)
+
+            rows = []
+            replayed = 0
+            with open(replay_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        rows.append((
+                            entry['operation_type'], entry['device_name'], entry['status'],
+                            entry['details'], datetime.fromisoformat(entry['created_at'])
+                        ))
+                    except (ValueError, KeyError):
+                        self.logger.warning("Skipping malformed operation log spool entry")
+
+            remaining = []
+            for start in range(0, len(rows), self.batch_size):
+                written, unsent = self._insert_rows(rows[start:start + self.batch_size])
+                replayed += written
+                if unsent:
+                    remaining = unsent + rows[start + self.batch_size:]
+                    break
+            self._stats['replayed'] += replayed
+            if replayed:
+                self.logger.info(f"Replayed {replayed} spooled operation log rows")
+
+            # Keep the unsent remainder for the next attempt. If it cannot go back
+            # to the spool, the replay file is cut down to it (or kept whole) instead.
+            if remaining and not self._spool(remaining):
+                temp_path = replay_path + '.tmp'
+                if self._append(temp_path, remaining, mode='w'):
+                    os.replace(temp_path, replay_path)
+                else:
+                    self.logger.error(f"Keeping {replay_path} for the next replay")
+                return
+            os.remove(replay_path)
+        except OSError as e:
+            self.logger.error(f"Unable to replay operation log spool: {e}")
+        finally:
+            self._release_replay_lock()
+
+    def _acquire_replay_lock(self):
+        """Create the replay lock file; returns False if another process holds it"""
+        lock_path = self.spool_path + '.lock'
+        for _ in range(2):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode('ascii'))
+                os.close(fd)
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) < self.replay_lock_timeout:
+                        return False
+                    # Left behind by a process that died while replaying
+                    os.remove(lock_path)
+                except OSError:
+                    return False
+            except OSError as e:
+                self.logger.error(f"Unable to create operation log replay lock: {e}")
+                return False
+        return False
+
+    def _release_replay_lock(self):
+        try:
+            os.remove(self.spool_path + '.lock')
+        except OSError as e:
+            self.logger.warning(f"Unable to remove operation log replay lock: {e}")
@@ -2,83 +2,113 @@
 Database Migration Manager for SSH Automation Project
 """
 import os
+import re
+import hashlib
 import logging
-from datetime import datetime
-import json
+from .backends import DATABASE_ERRORS
+
+
+def split_sql_statements(sql):
+    """Split a SQL script into statements
+    
+    Semicolons inside quoted strings, quoted identifiers and comments do not
+    end a statement. Comments are dropped from the returned statements.
+    """
+    statements = []
+    parts = []
+    start = 0
+    i = 0
+    length = len(sql)
+    
+    while i < length:
+        char = sql[i]
+        
+        if char in ("'", '"', '`'):
+            # Quoted string or identifier; backslash escapes and doubled quotes stay inside it
+            i += 1
+            while i < length:
+                if sql[i] == '\\' and char != '`':
+                    i += 2
+                elif sql[i] == char and i + 1 < length and sql[i + 1] == char:
+                    i += 2
+                elif sql[i] == char:
+                    break
+                else:
+                    i += 1
+            i += 1
+        elif sql.startswith('--', i) or char == '#' or sql.startswith('/*', i):
+            parts.append(sql[start:i])
+            if sql.startswith('/*', i):
+                end = sql.find('*/', i + 2)
+                i = length if end == -1 else end + 2
+            else:
+                end = sql.find('\n', i)
+                i = length if end == -1 else end
+            start = i
+        elif char == ';':
+            parts.append(sql[start:i])
+            statement = ''.join(parts).strip()
+            if statement:
+                statements.append(statement)
+            parts = []
+            i += 1
+            start = i
+        else:
+            i += 1
+    
+    parts.append(sql[start:])
+    statement = ''.join(parts).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
 
 class MigrationManager:
-    """Manages database migrations"""
+    """Manages database migrations
+    
+    A run uses one pooled connection. The checksum of every applied file is
+    stored in the migrations table. A migration edited after it was applied
+    stops the run instead of silently diverging from the database; add a new
+    migration instead.
+    """
     
     def __init__(self, db_connection):
         self.db_connection = db_connection
         self.logger = logging.getLogger(__name__)
         self.migrations_dir = os.path.join(os.path.dirname(__file__), 'migrations')
+    
+    def create_migration_table(self, cursor):
+        """Create migrations tracking table, adding the checksum column to older tables"""
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS migrations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            migration_name VARCHAR(255) NOT NULL UNIQUE,
+            checksum CHAR(64) NULL,
+            executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_migration_name (migration_name)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
         
-    def create_migration_table(self):
-        """Create migrations tracking table"""
         try:
-            connection = self.db_connection.get_connection()
-            cursor = connection.cursor()
-            
-            create_table_sql = """
-            CREATE TABLE IF NOT EXISTS migrations (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                migration_name VARCHAR(255) NOT NULL UNIQUE,
-                executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_migration_name (migration_name)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """
-            
-            cursor.execute(create_table_sql)
-            cursor.close()
-            connection.close()
-            
-            self.logger.info("Migration tracking table created successfully")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error creating migration table: {e}")
-            return False
+            cursor.execute("SELECT checksum FROM migrations WHERE 1 = 0")
+            cursor.fetchall()
+        except DATABASE_ERRORS:
+            cursor.execute("ALTER TABLE migrations ADD COLUMN checksum CHAR(64) NULL")
+            self.logger.info("Added checksum column to migrations table")
+        
+        self.logger.info("Migration tracking table ready")
     
     def get_executed_migrations(self):
         """Get list of executed migrations"""
         try:
-            connection = self.db_connection.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("SELECT migration_name FROM migrations ORDER BY executed_at")
-            executed = [row[0] for row in cursor.fetchall()]
-            
-            cursor.close()
-            connection.close()
-            
-            return executed
-            
+            with self.db_connection.cursor() as cursor:
+                cursor.execute("SELECT migration_name FROM migrations ORDER BY executed_at")
+                return [row[0] for row in cursor.fetchall()]
+        
         except Exception as e:
             self.logger.error(f"Error getting executed migrations: {e}")
             return []
     
-    def mark_migration_executed(self, migration_name):
-        """Mark migration as executed"""
-        try:
-            connection = self.db_connection.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute(
-                "INSERT INTO migrations (migration_name) VALUES (%s)",
-                (migration_name,)
-            )
-            
-            cursor.close()
-            connection.close()
-            
-            self.logger.info(f"Migration {migration_name} marked as executed")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error marking migration as executed: {e}")
-            return False
-    
     def get_migration_files(self):
         """Get all migration files in order"""
         try:
@@ -88,112 +118,141 @@ class MigrationManager:
             
             migration_files = []
             for filename in os.listdir(self.migrations_dir):
-                if filename.endswith('.sql') and filename.startswith('0'):
+                # NNN_name.<dialect>.sql files are backend overrides, not migrations
+                if filename.endswith('.sql') and filename.startswith('0') and filename.count('.') == 1:
                     migration_files.append(filename)
             
             # Sort by filename (which should include timestamp/order)
             migration_files.sort()
             return migration_files
-            
+        
         except Exception as e:
             self.logger.error(f"Error getting migration files: {e}")
             return []
     
-    def execute_migration_file(self, migration_file):
-        """Execute a single migration file with proper transaction handling"""
-        connection = None
-        try:
-            file_path = os.path.join(self.migrations_dir, migration_file)
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                migration_sql = f.read()
-            
-            # Split by semicolon and execute each statement
-            statements = [stmt.strip() for stmt in migration_sql.split(';') if stmt.strip()]
-            
-            connection = self.db_connection.get_connection()
-            cursor = connection.cursor()
-            
-            # Disable autocommit for transaction control
-            connection.autocommit = False
-            
-            try:
-                # Execute all statements in a transaction
-                for statement in statements:
-                    if statement:
-                        cursor.execute(statement)
-                
-                # Commit all changes
-                connection.commit()
-                self.logger.info(f"Migration {migration_file} executed successfully")
-                return True
-                
-            except Exception as e:
-                # Rollback on any error
-                connection.rollback()
-                self.logger.error(f"Error executing migration {migration_file}: {e}")
-                return False
-            finally:
-                # Re-enable autocommit
-                connection.autocommit = True
-                cursor.close()
-            
-        except Exception as e:
-            self.logger.error(f"Error opening migration file {migration_file}: {e}")
-            return False
-        finally:
-            if connection:
-                connection.close()
+    def get_migration_path(self, migration_file):
+        """Path of the migration SQL, preferring a NNN_name.<dialect>.sql override"""
+        dialect = self.db_connection.backend.dialect
+        override = os.path.join(self.migrations_dir, migration_file[:-len('.sql')] + f'.{dialect}.sql')
+        if os.path.exists(override):
+            return override
+        return os.path.join(self.migrations_dir, migration_file)
+    
+    def read_migration(self, migration_file):
+        """Return (statements, checksum) of the file that will run for this backend
+        
+        The sha256 checksum covers the statements only, so editing comments
+        does not count as modifying a migration.
+        """
+        with open(self.get_migration_path(migration_file), 'r', encoding='utf-8') as f:
+            statements = split_sql_statements(f.read())
+        checksum = hashlib.sha256(';\n'.join(statements).encode('utf-8')).hexdigest()
+        return statements, checksum
     
     def run_migrations(self):
-        """Run all pending migrations"""
+        """Run all pending migrations on a single connection
+        
+        On an up-to-date schema this is a single SELECT against the
+        migrations table plus reading the local migration files.
+        """
         try:
             self.logger.info("Starting database migrations...")
             
-            # Create migration tracking table
-            if not self.create_migration_table():
-                return False
-            
-            # Get executed migrations
-            executed_migrations = self.get_executed_migrations()
-            
-            # Get all migration files
-            migration_files = self.get_migration_files()
-            
-            if not migration_files:
-                self.logger.info("No migration files found")
-                return True
-            
-            # Execute pending migrations
-            pending_count = 0
-            for migration_file in migration_files:
-                if migration_file not in executed_migrations:
-                    self.logger.info(f"Executing migration: {migration_file}")
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                try:
+                    try:
+                        applied = self._get_applied(cursor)
+                    except DATABASE_ERRORS:
+                        # First run, or a tracking table from before checksums existed
+                        self.create_migration_table(cursor)
+                        applied = self._get_applied(cursor)
                     
-                    if self.execute_migration_file(migration_file):
-                        if self.mark_migration_executed(migration_file):
-                            pending_count += 1
-                        else:
-                            return False
-                    else:
+                    migrations = {name: self.read_migration(name) for name in self.get_migration_files()}
+                    if not migrations:
+                        self.logger.info("No migration files found")
+                        return True
+                    
+                    if not self._verify_checksums(connection, cursor, applied, migrations):
                         return False
-            
-            if pending_count > 0:
-                self.logger.info(f"Successfully executed {pending_count} migrations")
+                    
+                    pending = [name for name in migrations if name not in applied]
+                    if not pending:
+                        self.logger.info("All migrations are up to date")
+                        return True
+                    
+                    for migration_file in pending:
+                        statements, checksum = migrations[migration_file]
+                        if not self._apply_migration(connection, cursor, migration_file, statements, checksum):
+                            return False
+                    
+                    self.logger.info(f"Successfully executed {len(pending)} migrations")
+                    return True
+                finally:
+                    cursor.close()
+        
+        except Exception as e:
+            self.logger.error(f"Migration process failed: {e}")
+            return False
+    
+    def _get_applied(self, cursor):
+        """Map of applied migration name to stored checksum (None for legacy rows)"""
+        cursor.execute("SELECT migration_name, checksum FROM migrations")
+        return {name: checksum for name, checksum in cursor.fetchall()}
+    
+    def _verify_checksums(self, connection, cursor, applied, migrations):
+        """Fail on edited migrations; record checksums for rows applied before they existed"""
+        modified = []
+        for name, stored in applied.items():
+            if name not in migrations:
+                continue
+            checksum = migrations[name][1]
+            if stored is None:
+                cursor.execute(
+                    "UPDATE migrations SET checksum = %s WHERE migration_name = %s",
+                    (checksum, name)
+                )
+            elif stored != checksum:
+                modified.append(name)
+        connection.commit()
+        
+        if modified:
+            self.logger.error(
+                f"Applied migrations were modified: {', '.join(modified)}. "
+                f"Restore the original files and put schema changes in a new migration."
+            )
+            return False
+        return True
+    
+    def _apply_migration(self, connection, cursor, migration_file, statements, checksum):
+        """Execute one migration as a single batch and record it in the same transaction"""
+        self.logger.info(f"Executing migration: {migration_file} ({len(statements)} statements)")
+        
+        try:
+            if statements:
+                self.db_connection.backend.execute_script(connection, statements)
             else:
-                self.logger.info("All migrations are up to date")
-            
+                connection.start_transaction()
+            cursor.execute(
+                "INSERT INTO migrations (migration_name, checksum) VALUES (%s, %s)",
+                (migration_file, checksum)
+            )
+            connection.commit()
+            self.logger.info(f"Migration {migration_file} executed successfully")
             return True
-            
+        
         except Exception as e:
-            self.logger.error(f"Migration process failed: {e}")
+            # DDL commits implicitly on MySQL, so only DML is rolled back here
+            connection.rollback()
+            self.logger.error(f"Error executing migration {migration_file}: {e}")
             return False
     
     def create_migration_file(self, name, content):
-        """Create a new migration file"""
+        """Create a new migration file numbered after the latest one"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{timestamp}_{name}.sql"
+            numbers = [int(match.group(1)) for match in
+                       (re.match(r'(\d+)_', filename) for filename in self.get_migration_files()) if match]
+            filename = f"{max(numbers, default=0) + 1:03d}_{name}.sql"
             file_path = os.path.join(self.migrations_dir, filename)
             
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -201,7 +260,7 @@ class MigrationManager:
             
             self.logger.info(f"Migration file created: {filename}")
             return filename
-            
+        
         except Exception as e:
             self.logger.error(f"Error creating migration file: {e}")
             return None
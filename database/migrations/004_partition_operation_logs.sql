@@ -0,0 +1,37 @@
+-- Monthly partitioning of operation_logs plus hourly rollups for reporting
+-- Migration: 004_partition_operation_logs.sql
+
+-- Partitioned InnoDB tables cannot carry foreign keys, and the check cost a
+-- devices lookup on every insert. device_name stays an indexed plain column
+ALTER TABLE operation_logs DROP FOREIGN KEY operation_logs_ibfk_1;
+
+-- Every unique key must include the partitioning column
+ALTER TABLE operation_logs
+    MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at);
+
+-- One partition per month. database/log_retention.py splits new months off
+-- p_future ahead of time and drops months past log_retention_days
+ALTER TABLE operation_logs
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_history VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- Hourly counts per operation and device, maintained by database/log_retention.py
+CREATE TABLE IF NOT EXISTS operation_log_rollups_hourly (
+    bucket_start TIMESTAMP NOT NULL,
+    operation_type VARCHAR(100) NOT NULL,
+    device_name VARCHAR(100) NOT NULL DEFAULT '',
+    total_count INT NOT NULL DEFAULT 0,
+    success_count INT NOT NULL DEFAULT 0,
+    failure_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (bucket_start, operation_type, device_name),
+    INDEX idx_device_bucket (device_name, bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
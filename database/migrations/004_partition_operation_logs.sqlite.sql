@@ -0,0 +1,42 @@
+-- SQLite variant of 004_partition_operation_logs.sql
+-- SQLite has no partitioning, so retention deletes old rows in batches instead.
+-- The table is rebuilt because SQLite cannot drop a foreign key in place.
+
+CREATE TABLE operation_logs_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation_type VARCHAR(100) NOT NULL,
+    device_name VARCHAR(100) NULL,
+    status TEXT NOT NULL,
+    details TEXT NULL,
+    error_message TEXT NULL,
+    duration_seconds INT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT (datetime('now','localtime'))
+);
+
+INSERT INTO operation_logs_new (id, operation_type, device_name, status, details, error_message, duration_seconds, created_at)
+SELECT id, operation_type, device_name, status, details, error_message, duration_seconds, created_at
+FROM operation_logs;
+
+DROP TABLE operation_logs;
+
+ALTER TABLE operation_logs_new RENAME TO operation_logs;
+
+CREATE INDEX IF NOT EXISTS operation_logs_idx_operation_type ON operation_logs (operation_type);
+CREATE INDEX IF NOT EXISTS operation_logs_idx_device_name ON operation_logs (device_name);
+CREATE INDEX IF NOT EXISTS operation_logs_idx_status ON operation_logs (status);
+CREATE INDEX IF NOT EXISTS operation_logs_idx_created_at ON operation_logs (created_at);
+
+CREATE TABLE IF NOT EXISTS operation_log_rollups_hourly (
+    bucket_start TIMESTAMP NOT NULL,
+    operation_type VARCHAR(100) NOT NULL,
+    device_name VARCHAR(100) NOT NULL DEFAULT '',
+    total_count INT NOT NULL DEFAULT 0,
+    success_count INT NOT NULL DEFAULT 0,
+    failure_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT (datetime('now','localtime')),
+    
+    PRIMARY KEY (bucket_start, operation_type, device_name)
+);
+
+CREATE INDEX IF NOT EXISTS operation_log_rollups_hourly_idx_device_bucket
+    ON operation_log_rollups_hourly (device_name, bucket_start);
@@ -0,0 +1,23 @@
+-- Composite and covering indexes for the hot access paths
+-- Migration: 005_composite_indexes.sql
+-- database/check_indexes.py verifies with EXPLAIN that each query below uses its index
+
+-- Backup history per device, newest first (get_backups_page)
+-- Replaces idx_device_name, which is a prefix of the new index
+ALTER TABLE backups
+    ADD INDEX idx_device_created (device_name, created_at, id),
+    DROP INDEX idx_device_name;
+
+-- Session validation: token, active flag, expiry and user_id all come from the index
+-- Replaces idx_session_token, which duplicated the UNIQUE key
+ALTER TABLE user_sessions
+    ADD INDEX idx_token_active_expires (session_token, is_active, expires_at, user_id),
+    DROP INDEX idx_session_token;
+
+-- Filtered operation log pages, newest first (get_operation_logs_page)
+-- Unfiltered pages keep using idx_created_at, which InnoDB extends with the primary key
+ALTER TABLE operation_logs
+    ADD INDEX idx_device_created (device_name, created_at, id),
+    ADD INDEX idx_type_created (operation_type, created_at, id),
+    DROP INDEX idx_device_name,
+    DROP INDEX idx_operation_type;
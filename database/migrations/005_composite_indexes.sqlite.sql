@@ -0,0 +1,14 @@
+-- SQLite variant of 005_composite_indexes.sql
+-- SQLite index names are per database, so they are prefixed with the table name
+
+CREATE INDEX IF NOT EXISTS backups_idx_device_created ON backups (device_name, created_at, id);
+DROP INDEX IF EXISTS backups_idx_device_name;
+
+CREATE INDEX IF NOT EXISTS user_sessions_idx_token_active_expires
+    ON user_sessions (session_token, is_active, expires_at, user_id);
+DROP INDEX IF EXISTS user_sessions_idx_session_token;
+
+CREATE INDEX IF NOT EXISTS operation_logs_idx_device_created ON operation_logs (device_name, created_at, id);
+CREATE INDEX IF NOT EXISTS operation_logs_idx_type_created ON operation_logs (operation_type, created_at, id);
+DROP INDEX IF EXISTS operation_logs_idx_device_name;
+DROP INDEX IF EXISTS operation_logs_idx_operation_type;
@@ -0,0 +1,5 @@
+-- Server-side web session payloads
+-- Migration: 006_session_data.sql
+-- The web GUI stores the Flask session of a logged-in user in its user_sessions row
+
+ALTER TABLE user_sessions ADD COLUMN session_data TEXT NULL;
@@ -0,0 +1,5 @@
+-- Template versions
+-- Migration: 007_template_version.sql
+-- Bumped on every content change so the web GUI can tell which cached templates are stale
+
+ALTER TABLE config_templates ADD COLUMN version INT NOT NULL DEFAULT 1;
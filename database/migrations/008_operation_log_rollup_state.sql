@@ -0,0 +1,10 @@
+-- Rollup progress for operation_logs
+-- Migration: 008_operation_log_rollup_state.sql
+-- database/log_retention.py stores the highest operation_logs id it has rolled up,
+-- so rows replayed late with an old created_at still reach their hourly rollup
+
+CREATE TABLE IF NOT EXISTS operation_log_rollup_state (
+    id INT PRIMARY KEY,
+    last_log_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,6 @@
+-- Web session write counter
+-- Migration: 009_session_version.sql
+-- Saves of user_sessions.session_data are compare-and-set on this counter, so two
+-- workers updating the same session cannot silently overwrite each other
+
+ALTER TABLE user_sessions ADD COLUMN session_version INT NOT NULL DEFAULT 0;
@@ -0,0 +1,171 @@
+"""
+Bounded bcrypt worker pool for password hashing and verification
+"""
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+
+class HasherBusyError(Exception):
+    """Raised when the bcrypt pool is saturated and the request is rejected"""
+
+
+def _hash_password(password: bytes, rounds: int) -> bytes:
+    """Hash password with bcrypt (runs in a worker process)"""
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check_password(password: bytes, hashed: bytes) -> bool:
+    """Check password against a bcrypt hash (runs in a worker process)"""
+    return bcrypt.checkpw(password, hashed)
+
+
+def _pool_context():
+    """Start workers from a clean process: forking a threaded web worker can copy held locks"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """Pick the highest bcrypt cost factor whose hash time stays under target_ms
+
+    Each extra round doubles the work, so one measurement at min_rounds is
+    enough to extrapolate the rest.
+    """
+    started = time.perf_counter()
+    bcrypt.hashpw(b'calibration', bcrypt.gensalt(min_rounds))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+
+    logger.info(f"Calibrated bcrypt cost factor {rounds} (~{elapsed_ms:.0f} ms per hash)")
+    return rounds
+
+
+class PasswordHasher:
+    """Runs bcrypt off the request thread in a dedicated process pool
+
+    At most ``max_pending`` hash/verify jobs may be queued or running; any
+    request beyond that fails immediately with HasherBusyError instead of
+    tying up a web worker. With ``workers=0`` bcrypt runs inline, which is
+    what command-line scripts want.
+    """
+
+    def __init__(self, workers=None, max_pending=None, rounds=None, target_ms=None, timeout=10.0):
+        self.workers = (min(4, os.cpu_count() or 1) if workers is None else workers)
+        self.max_pending = max_pending or max(1, self.workers) * 4
+        self.timeout = timeout
+        self._rounds = rounds
+        self._target_ms = target_ms
+        self._executor = None
+        self._executor_pid = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._rounds_lock = threading.Lock()
+
+    @property
+    def rounds(self) -> int:
+        """bcrypt cost factor, calibrated once on first use when a target latency is set"""
+        if self._rounds is None:
+            with self._rounds_lock:
+                if self._rounds is None:
+                    self._rounds = calibrate_rounds(self._target_ms) if self._target_ms else 12
+        return self._rounds
+
+    def hash_password(self, password: str) -> str:
+        """Hash password using bcrypt"""
+        hashed = self._run(_hash_password, password.encode('utf-8'), self.rounds)
+        return hashed.decode('utf-8')
+
+    def verify_password(self, password: str, hashed: str) -> bool:
+        """Verify password against hash"""
+        return self._run(_check_password, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self):
+        """Create the process pool lazily, and again after a fork"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Drop a broken pool so the next job starts a new one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, func, *args):
+        """Run func in the pool, rejecting fast when max_pending jobs are in flight"""
+        if self.workers == 0:
+            if not self._slots.acquire(blocking=False):
+                raise HasherBusyError("Password hashing pool is saturated")
+            try:
+                return func(*args)
+            finally:
+                self._slots.release()
+
+        executor = self._get_executor()
+        try:
+            return self._submit(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (OOM, signal); the pool never recovers on its own
+            logger.warning("Password hashing pool is broken, restarting it")
+            self._discard_executor(executor)
+            return self._submit(self._get_executor(), func, *args)
+
+    def _submit(self, executor, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError("Password hashing pool is saturated")
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the worker finishes, even if we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HasherBusyError("Password hashing timed out")
+
+
+# Global password hasher instance
+password_hasher = None
+
+
+def get_password_hasher():
+    """Get global password hasher configured from the environment"""
+    global password_hasher
+    if password_hasher is None:
+        rounds = os.getenv('BCRYPT_ROUNDS')
+        target_ms = os.getenv('BCRYPT_TARGET_MS')
+        workers = os.getenv('BCRYPT_WORKERS')
+        max_pending = os.getenv('BCRYPT_MAX_PENDING')
+        password_hasher = PasswordHasher(
+            workers=int(workers) if workers else None,
+            max_pending=int(max_pending) if max_pending else None,
+            rounds=int(rounds) if rounds else None,
+            target_ms=float(target_ms) if target_ms else None
+        )
+    return password_hasher
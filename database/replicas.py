@@ -0,0 +1,120 @@
+"""
+Read-replica routing for the SSH Automation database
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from .backends import PoolExhaustedError
+
+
+class ReplicaRouter:
+    """Routes read-only work to healthy replicas, falling back to the primary
+
+    Replicas are used round-robin. A replica that cannot be connected to,
+    or fails its periodic ping, is skipped for ``retry_interval`` seconds;
+    when none are healthy, reads go to the primary. A replica whose pool is
+    merely busy stays in rotation and the read moves on to the next
+    candidate. Writes never pass through the router.
+    """
+
+    def __init__(self, primary, replicas, retry_interval=30.0, check_interval=10.0):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_interval = retry_interval
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down_until = [0.0] * len(self.replicas)
+        self._last_check = [0.0] * len(self.replicas)
+
+    @contextmanager
+    def acquire_read(self):
+        """Borrow a connection for read-only queries"""
+        pool, connection = self._get_read_connection()
+        try:
+            yield connection
+        finally:
+            pool.return_connection(connection)
+
+    def check_health(self):
+        """Ping every replica now and update its health state"""
+        for index, replica in enumerate(self.replicas):
+            if replica.test_connection():
+                self._mark_up(index)
+            else:
+                self._mark_down(index, "health check failed")
+        return self.status()
+
+    def status(self):
+        """Return the health of each replica"""
+        now = time.monotonic()
+        return [
+            {
+                'host': replica.config.host,
+                'port': replica.config.port,
+                'healthy': self._down_until[index] <= now
+            }
+            for index, replica in enumerate(self.replicas)
+        ]
+
+    def _get_read_connection(self):
+        """Pick a healthy replica connection, else a primary connection"""
+        for index in self._candidates():
+            replica = self.replicas[index]
+            try:
+                connection = replica.get_connection_nowait()
+            except PoolExhaustedError:
+                # Busy, not down: try the next replica or the primary
+                continue
+            if connection is None:
+                self._mark_down(index, "connection failed")
+                continue
+            if self._needs_check(index):
+                if not self._ping(connection):
+                    replica.return_connection(connection)
+                    self._mark_down(index, "ping failed")
+                    continue
+                self._mark_up(index)
+            return replica, connection
+
+        connection = self.primary.get_connection()
+        if connection is None:
+            from .connection import DatabaseUnavailableError
+            raise DatabaseUnavailableError("No replica or primary connection available")
+        return self.primary, connection
+
+    def _candidates(self):
+        """Healthy replica indexes in round-robin order"""
+        now = time.monotonic()
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % max(len(self.replicas), 1)
+        order = [(start + offset) % len(self.replicas) for offset in range(len(self.replicas))]
+        return [index for index in order if self._down_until[index] <= now]
+
+    def _needs_check(self, index):
+        """Whether the replica's last successful ping is older than check_interval"""
+        return time.monotonic() - self._last_check[index] >= self.check_interval
+
+    def _ping(self, connection):
+        """Run a cheap liveness check on a borrowed connection"""
+        try:
+            connection.ping(reconnect=True, attempts=1)
+            return True
+        except Exception:
+            return False
+
+    def _mark_up(self, index):
+        self._down_until[index] = 0.0
+        self._last_check[index] = time.monotonic()
+
+    def _mark_down(self, index, reason):
+        replica = self.replicas[index]
+        self._down_until[index] = time.monotonic() + self.retry_interval
+        self.logger.warning(
+            f"Replica {replica.config.host}:{replica.config.port} unavailable ({reason}); "
+            f"routing reads elsewhere for {self.retry_interval:.0f}s"
+        )
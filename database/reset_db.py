@@ -16,35 +16,30 @@ def reset_migrations():
     try:
         db_config = DatabaseConfig()
         db_connection = DatabaseConnection(db_config)
-        connection = db_connection.get_connection()
-        
-        cursor = connection.cursor()
-        
-        print("Resetting database migrations...")
-        
-        # Drop all tables (in reverse dependency order)
-        tables_to_drop = [
-            'user_sessions',
-            'users', 
-            'device_credentials',
-            'config_changes',
-            'backups',
-            'operation_logs',
-            'config_templates',
-            'devices',
-            'system_settings',
-            'migrations'
-        ]
-        
-        for table in tables_to_drop:
-            try:
-                cursor.execute(f"DROP TABLE IF EXISTS {table}")
-                print(f"✅ Dropped table: {table}")
-            except Exception as e:
-                print(f"⚠️  Warning dropping {table}: {e}")
-        
-        cursor.close()
-        connection.close()
+        with db_connection.cursor() as cursor:
+            print("Resetting database migrations...")
+            
+            # Drop all tables (in reverse dependency order)
+            tables_to_drop = [
+                'user_sessions',
+                'users', 
+                'device_credentials',
+                'config_changes',
+                'backups',
+                'operation_log_rollups_hourly',
+                'operation_logs',
+                'config_templates',
+                'devices',
+                'system_settings',
+                'migrations'
+            ]
+            
+            for table in tables_to_drop:
+                try:
+                    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                    print(f"✅ Dropped table: {table}")
+                except Exception as e:
+                    print(f"⚠️  Warning dropping {table}: {e}")
         
         print("✅ Database reset completed!")
         print("You can now run setup_database.py to recreate everything.")
@@ -0,0 +1,73 @@
+"""
+In-memory LRU + TTL cache of validated user sessions
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+class SessionCache:
+    """Caches validate_session() results keyed by session token
+
+    Entries live for at most ``ttl`` seconds and never beyond the session's
+    own expiry. The least recently used token is evicted once
+    ``max_entries`` is reached. Invalidations only reach this process, so
+    ``ttl`` bounds how long another worker may keep honouring a revoked
+    session.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_token):
+        """Return cached user data for a token, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(session_token)
+            if entry is None:
+                return None
+            user_data, valid_until = entry
+            if time.time() >= valid_until:
+                del self._entries[session_token]
+                return None
+            self._entries.move_to_end(session_token)
+            return dict(user_data)
+
+    def put(self, session_token, user_data, expires_at=None):
+        """Cache user data for a token until the TTL or session expiry"""
+        valid_until = time.time() + self.ttl
+        if expires_at is not None:
+            valid_until = min(valid_until, expires_at.timestamp())
+        with self._lock:
+            self._entries[session_token] = (dict(user_data), valid_until)
+            self._entries.move_to_end(session_token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_token):
+        """Drop a single session token"""
+        with self._lock:
+            self._entries.pop(session_token, None)
+
+    def invalidate_user(self, user_id):
+        """Drop every cached session belonging to a user"""
+        with self._lock:
+            stale = [token for token, (user_data, _) in self._entries.items()
+                     if user_data.get('user_id') == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self):
+        """Drop all cached sessions"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Global session cache shared by every manager in the process
+session_cache = SessionCache(
+    max_entries=int(os.getenv('SESSION_CACHE_SIZE', 10000)),
+    ttl=int(os.getenv('SESSION_CACHE_TTL', 60))
+)
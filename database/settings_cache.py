@@ -0,0 +1,82 @@
+"""
+Process-wide cache for the system_settings table
+"""
+import os
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def parse_setting_value(value, setting_type):
+    """Convert a raw setting_value string according to its setting_type"""
+    if setting_type == 'boolean':
+        return value.lower() in ('true', '1', 'yes')
+    elif setting_type == 'integer':
+        return int(value)
+    elif setting_type == 'json':
+        return json.loads(value)
+    return value
+
+
+class SettingsCache:
+    """TTL cache holding every system setting, parsed once per load
+
+    The whole table is read with a single SELECT whenever the cache is empty
+    or older than ``ttl`` seconds. Writers call ``invalidate()`` so the next
+    read picks up the change immediately.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._values = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db_manager, key, default=None):
+        """Get a parsed setting value, reloading the table if the cache is stale"""
+        values = self._values
+        if values is None or time.monotonic() - self._loaded_at >= self.ttl:
+            values = self.load(db_manager)
+        return values.get(key, default)
+
+    def load(self, db_manager):
+        """Load all settings from the database in one query"""
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._values is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._values
+
+            rows = db_manager.execute_query(
+                "SELECT setting_key, setting_value, setting_type FROM system_settings",
+                fetch=True,
+                read_only=True
+            )
+            if rows is None:
+                # Keep serving the last known values while the database is unavailable
+                return self._values if self._values is not None else {}
+
+            values = {}
+            for row in rows:
+                try:
+                    values[row['setting_key']] = parse_setting_value(
+                        row['setting_value'], row['setting_type']
+                    )
+                except (TypeError, ValueError, AttributeError) as e:
+                    logger.warning(f"Ignoring invalid value for setting {row['setting_key']}: {e}")
+
+            self._values = values
+            self._loaded_at = time.monotonic()
+            return values
+
+    def invalidate(self):
+        """Drop cached values so the next read reloads the table"""
+        with self._lock:
+            self._values = None
+            self._loaded_at = 0.0
+
+
+# Global settings cache shared by every manager in the process
+settings_cache = SettingsCache(ttl=int(os.getenv('SETTINGS_CACHE_TTL', 60)))
@@ -13,17 +13,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import DatabaseConnection, DatabaseConfig
 from database.migration_manager import MigrationManager
+from logtools import configure_logging
 
 def setup_logging():
     """Configure logging for the setup process"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('database_setup.log'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    configure_logging('database_setup.log')
     return logging.getLogger(__name__)
 
 def test_database_connection():
@@ -31,15 +25,10 @@ def test_database_connection():
     try:
         db_config = DatabaseConfig()
         db_connection = DatabaseConnection(db_config)
-        connection = db_connection.get_connection()
-        if connection:
-            cursor = connection.cursor()
+        with db_connection.cursor() as cursor:
             cursor.execute("SELECT 1")
-            result = cursor.fetchone()
-            cursor.close()
-            connection.close()
-            return True
-        return False
+            cursor.fetchone()
+        return True
     except Exception as e:
         print(f"Database connection failed: {e}")
         return False
@@ -101,7 +90,17 @@ def main():
         logger.error(f"Migration process failed: {e}")
         return False
     
-    print("\n4. Database setup completed successfully!")
+    # Import config/templates/*.txt into config_templates
+    print("\n4. Importing template files...")
+    from database.connection import get_db_manager
+    from database.template_store import template_store
+    written = template_store.import_files(get_db_manager())
+    if written is None:
+        print("⚠️  Template table unavailable, template files not imported")
+    else:
+        print(f"✅ Imported {written} template files!")
+    
+    print("\n5. Database setup completed successfully!")
     print("=" * 60)
     print("Your SSH Automation system is ready to use!")
     print("You can now start the web interface with:")
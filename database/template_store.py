@@ -0,0 +1,287 @@
+"""
+Process-wide cache for configuration templates
+
+Templates come from three places: the built-in defaults below, the
+config_templates table, and .txt files in config/templates. Reads never
+write: files are copied into the table (named after the file, version
+bumped when the content changes) only by import_files(), run from
+setup_database.py or ``python database/template_store.py``. Until then,
+and whenever there is no database, files missing from the table are
+served from disk.
+
+The library is loaded once into memory, sorted by name, and reloaded only
+when its fingerprint changes: the files' mtimes and sizes plus the
+row count, newest updated_at and summed versions of config_templates.
+The fingerprint is checked at most every ``ttl`` seconds.
+"""
+import os
+import json
+import base64
+import bisect
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.getenv('TEMPLATES_DIR', os.path.join(PROJECT_ROOT, 'config', 'templates'))
+
+# created_by of rows imported from TEMPLATES_DIR
+FILE_SOURCE = 'config/templates'
+
+MAX_PAGE_SIZE = 500
+
+DEFAULT_TEMPLATES = [
+    {
+        'name': 'Basic OSPF Configuration',
+        'description': 'Configure OSPF routing protocol',
+        'content': 'router ospf 1\nnetwork 192.168.1.0 0.0.0.255 area 0\nexit'
+    },
+    {
+        'name': 'DHCP Server Setup',
+        'description': 'Configure DHCP server settings',
+        'content': 'ip dhcp pool LAN\nnetwork 192.168.1.0 255.255.255.0\ndefault-router 192.168.1.1\ndns-server 8.8.8.8\nexit'
+    },
+    {
+        'name': 'Security Hardening',
+        'description': 'Apply basic security settings',
+        'content': 'line vty 0 4\nlogin local\ntransport input ssh\nexec-timeout 5 0\nexit\nip ssh time-out 60\nip ssh authentication-retries 3'
+    }
+]
+
+
+def encode_name_cursor(name):
+    """Encode the last template name of a page as an opaque pagination cursor"""
+    return base64.urlsafe_b64encode(name.encode('utf-8')).decode('ascii')
+
+
+def decode_name_cursor(cursor):
+    """Decode a pagination cursor into a template name; raises ValueError if malformed"""
+    try:
+        return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid page cursor: {cursor}") from e
+
+
+def _json_column(value, default):
+    if isinstance(value, (bytes, str)):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return default
+    return value if value is not None else default
+
+
+def _with_etag(template):
+    """Add the template's ETag, which changes whenever anything about it does"""
+    digest = hashlib.sha256(json.dumps(template, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    template['etag'] = digest[:16]
+    return template
+
+
+class TemplateStore:
+    """In-memory template library, reloaded when the files or the table change"""
+
+    def __init__(self, templates_dir=TEMPLATES_DIR, ttl=5):
+        self.templates_dir = templates_dir
+        self.ttl = ttl
+        self._templates = None
+        self._names = []
+        self._by_name = {}
+        self._by_id = {}
+        self._etag = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def list_templates(self, db_manager=None, limit=100, cursor=None, query=None):
+        """One page of templates ordered by name, optionally filtered by a text in name or description
+
+        Returns {'items': [...], 'next_cursor': str or None, 'total': int, 'etag': str}.
+        Raises ValueError for a malformed cursor.
+        """
+        templates, names, etag = self._current(db_manager)
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        start = bisect.bisect_right(names, decode_name_cursor(cursor)) if cursor else 0
+
+        if query:
+            needle = query.lower()
+            candidates = (template for template in templates[start:]
+                          if needle in template['name'].lower() or needle in template['description'].lower())
+        else:
+            candidates = iter(templates[start:])
+        items = [template for _, template in zip(range(limit + 1), candidates)]
+
+        next_cursor = encode_name_cursor(items[limit - 1]['name']) if len(items) > limit else None
+        return {'items': items[:limit], 'next_cursor': next_cursor, 'total': len(templates), 'etag': etag}
+
+    def get_template(self, db_manager, key):
+        """A template by database id or name, or None"""
+        self._current(db_manager)
+        if isinstance(key, int) or str(key).isdigit():
+            template = self._by_id.get(int(key))
+            if template is not None:
+                return template
+        return self._by_name.get(str(key))
+
+    def import_files(self, db_manager):
+        """Write new or changed template files to the table; return how many were written, or None on error"""
+        rows = self._fetch_rows(db_manager)
+        if rows is None:
+            return None
+        by_name = {row['name']: row for row in rows}
+        written = 0
+        for name, (path, _, _) in sorted(self._scan_files().items()):
+            try:
+                content = self._read_file(path)
+            except OSError as e:
+                logger.warning(f"Cannot read template {path}: {e}")
+                continue
+            row = by_name.get(name)
+            if row is not None and row['template_content'] == content:
+                continue
+            # version is assigned first, while template_content still holds the old text,
+            # so an import racing another one does not bump it twice
+            result = db_manager.execute_query(
+                """
+                INSERT INTO config_templates (name, description, template_content, created_by, version)
+                VALUES (%s, %s, %s, %s, 1)
+                ON DUPLICATE KEY UPDATE
+                    version = CASE WHEN template_content = VALUES(template_content) THEN version ELSE version + 1 END,
+                    template_content = VALUES(template_content),
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (name, 'Custom template', content, FILE_SOURCE)
+            )
+            if result is not None:
+                written += 1
+        if written:
+            logger.info(f"Imported {written} template files into config_templates")
+            self.invalidate()
+        return written
+
+    def invalidate(self):
+        """Drop the cached library so the next read reloads it"""
+        with self._lock:
+            self._templates = None
+            self._fingerprint = None
+            self._checked_at = 0.0
+
+    def _current(self, db_manager):
+        """(templates, names, etag), reloading when stale"""
+        if self._templates is None or time.monotonic() - self._checked_at >= self.ttl:
+            with self._lock:
+                # Another thread may have checked while we waited for the lock
+                if self._templates is None or time.monotonic() - self._checked_at >= self.ttl:
+                    fingerprint = (self._scan_files(), self._table_fingerprint(db_manager))
+                    if self._templates is None or fingerprint != self._fingerprint:
+                        self._reload(db_manager, fingerprint)
+                    self._checked_at = time.monotonic()
+        return self._templates, self._names, self._etag
+
+    def _scan_files(self):
+        """{template name: (path, mtime_ns, size)} of the .txt files in the templates directory"""
+        files = {}
+        try:
+            with os.scandir(self.templates_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.txt') and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name[:-4]] = (entry.path, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return files
+
+    def _table_fingerprint(self, db_manager):
+        if db_manager is None:
+            return None
+        rows = db_manager.execute_query(
+            "SELECT COUNT(*) AS templates, MAX(updated_at) AS updated_at, COALESCE(SUM(version), 0) AS versions "
+            "FROM config_templates",
+            fetch=True,
+            read_only=True
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return (int(row['templates']), str(row['updated_at']), int(row['versions']))
+
+    def _read_file(self, path):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def _fetch_rows(self, db_manager):
+        return db_manager.execute_query(
+            "SELECT id, name, description, template_content, device_types, variables, version, "
+            "created_by, updated_at FROM config_templates",
+            fetch=True,
+            read_only=True
+        )
+
+    def _reload(self, db_manager, fingerprint):
+        files, table = fingerprint
+        rows = self._fetch_rows(db_manager) if table is not None else None
+
+        library = {}
+        for template in DEFAULT_TEMPLATES:
+            library[template['name']] = {
+                'id': None, **template, 'variables': {}, 'device_types': [], 'version': 1,
+                'source': 'builtin', 'updated_at': None
+            }
+        if rows is None and db_manager is not None and self._templates is not None:
+            # Keep serving the last known library while the database is unavailable
+            logger.warning("Template table unavailable, serving cached templates")
+            return
+        stored = {row['name'] for row in rows} if rows is not None else set()
+        for name, (path, _, _) in files.items():
+            if name in stored:
+                continue
+            try:
+                content = self._read_file(path)
+            except OSError as e:
+                logger.warning(f"Cannot read template {path}: {e}")
+                continue
+            library[name] = {
+                'id': None, 'name': name, 'description': 'Custom template', 'content': content,
+                'variables': {}, 'device_types': [], 'version': 1,
+                'source': 'file', 'updated_at': None
+            }
+        for row in rows or []:
+            library[row['name']] = {
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'] or '',
+                'content': row['template_content'],
+                'variables': _json_column(row['variables'], {}),
+                'device_types': _json_column(row['device_types'], []),
+                'version': int(row['version']),
+                'source': 'file' if row['created_by'] == FILE_SOURCE else 'database',
+                'updated_at': str(row['updated_at']) if row['updated_at'] is not None else None
+            }
+
+        names = sorted(library)
+        templates = [_with_etag(library[name]) for name in names]
+        self._templates = templates
+        self._names = names
+        self._by_name = {template['name']: template for template in templates}
+        self._by_id = {template['id']: template for template in templates if template['id'] is not None}
+        self._etag = hashlib.sha256('|'.join(template['etag'] for template in templates).encode('ascii')).hexdigest()[:16]
+        self._fingerprint = fingerprint
+        logger.info(f"Loaded {len(templates)} configuration templates")
+
+
+# Global template store shared by every request in the process
+template_store = TemplateStore(ttl=int(os.getenv('TEMPLATE_CACHE_TTL', 5)))
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.append(PROJECT_ROOT)
+    from database.connection import get_db_manager
+    written = template_store.import_files(get_db_manager())
+    if written is None:
+        print("❌ Template table unavailable")
+        sys.exit(1)
+    print(f"✅ Imported {written} template files from {TEMPLATES_DIR}")
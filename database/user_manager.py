@@ -3,12 +3,16 @@ User Management Module for SSH Automation Project
 Handles user registration, authentication, and session management
 """
 
-import bcrypt
 import secrets
 import re
+import json
+import threading
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from database.connection import DatabaseManager
+from database.settings_cache import settings_cache
+from database.password_hasher import get_password_hasher, HasherBusyError
+from database.session_cache import session_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,16 +22,18 @@ class UserManager:
     
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
+        self._cleanup_stop = threading.Event()
         
     def hash_password(self, password: str) -> str:
-        """Hash password using bcrypt"""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        """Hash password using bcrypt (in the bounded hashing pool)"""
+        return get_password_hasher().hash_password(password)
     
     def verify_password(self, password: str, hashed: str) -> bool:
-        """Verify password against hash"""
+        """Verify password against hash (in the bounded hashing pool)"""
         try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+            return get_password_hasher().verify_password(password, hashed)
+        except HasherBusyError:
+            raise
         except Exception as e:
             logger.error(f"Password verification error: {e}")
             return False
@@ -66,40 +72,34 @@ class UserManager:
         return result
     
     def get_setting(self, key: str, default: Any = None) -> Any:
-        """Get system setting value"""
+        """Get system setting value (served from the process-wide settings cache)"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute(
-                "SELECT setting_value, setting_type FROM system_settings WHERE setting_key = %s",
-                (key,)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                value = result['setting_value']
-                setting_type = result['setting_type']
-                
-                # Convert based on type
-                if setting_type == 'boolean':
-                    return value.lower() in ('true', '1', 'yes')
-                elif setting_type == 'integer':
-                    return int(value)
-                elif setting_type == 'json':
-                    import json
-                    return json.loads(value)
-                else:
-                    return value
-            
-            return default
-            
+            return settings_cache.get(self.db, key, default)
         except Exception as e:
             logger.error(f"Error getting setting {key}: {e}")
             return default
+    
+    def update_setting(self, key: str, value: Any) -> bool:
+        """Update system setting value and invalidate the settings cache"""
+        try:
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            elif isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            
+            rowcount = self.db.execute_query("""
+                UPDATE system_settings
+                SET setting_value = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE setting_key = %s
+            """, (str(value), key))
+            
+            return rowcount is not None
+            
+        except Exception as e:
+            logger.error(f"Error updating setting {key}: {e}")
+            return False
         finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
+            settings_cache.invalidate()
     
     def create_user(self, username: str, email: str, password: str, full_name: str = None, role: str = 'viewer') -> Dict[str, Any]:
         """Create a new user account"""
@@ -144,41 +144,52 @@ class UserManager:
             password_hash = self.hash_password(password)
             
             # Create user
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                INSERT INTO users (username, email, password_hash, full_name, role, is_active)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (username, email, password_hash, full_name, role, True))
-            
-            connection.commit()
-            result['user_id'] = cursor.lastrowid
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    INSERT INTO users (username, email, password_hash, full_name, role, is_active)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (username, email, password_hash, full_name, role, True))
+                
+                result['user_id'] = cursor.lastrowid
             result['success'] = True
             result['message'] = 'User created successfully'
             
             logger.info(f"New user created: {username} ({email})")
             
+        except HasherBusyError as e:
+            logger.warning(f"Registration for {username} rejected: {e}")
+            result['message'] = 'Registration service is busy. Please try again shortly.'
         except Exception as e:
             logger.error(f"Error creating user: {e}")
             result['message'] = 'Failed to create user account'
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
         
         return result
     
-    def authenticate_user(self, username: str, password: str, ip_address: str = None) -> Dict[str, Any]:
-        """Authenticate user login"""
+    def authenticate_user(self, username: str, password: str, ip_address: str = None, user_agent: str = None) -> Dict[str, Any]:
+        """Authenticate user login
+        
+        No connection is held while the password is verified, since bcrypt
+        may queue in the hashing pool: the user lookup returns its connection
+        first, and the writes of a successful login (bookkeeping update and
+        session insert) then run in one transaction on a fresh connection.
+        """
         result = {
             'success': False,
             'message': '',
             'user': None,
-            'session_token': None
+            'session_token': None,
+            'busy': False
         }
         
         try:
-            user = self.get_user_by_username(username)
+            with self.db.cursor(dictionary=True) as cursor:
+                cursor.execute("""
+                    SELECT id, username, email, password_hash, full_name, role, is_active,
+                           login_attempts, locked_until
+                    FROM users WHERE username = %s
+                """, (username,))
+                user = cursor.fetchone()
+            
             if not user:
                 result['message'] = 'Invalid username or password'
                 return result
@@ -195,18 +206,41 @@ class UserManager:
             
             # Verify password
             if not self.verify_password(password, user['password_hash']):
-                self.record_failed_login(user['id'])
+                with self.db.cursor(commit=True) as cursor:
+                    self._record_failed_login(cursor, user['id'], user.get('login_attempts') or 0)
                 result['message'] = 'Invalid username or password'
                 return result
             
-            # Reset login attempts on successful login
-            self.reset_login_attempts(user['id'])
-            
-            # Update last login
-            self.update_last_login(user['id'])
+            session_token = secrets.token_urlsafe(32)
+            session_timeout_hours = self.get_setting('session_timeout_hours', 8)
+            expires_at = datetime.now() + timedelta(hours=session_timeout_hours)
             
-            # Create session
-            session_token = self.create_session(user['id'], ip_address)
+            with self.db.acquire() as connection:
+                cursor = connection.cursor()
+                try:
+                    connection.start_transaction()
+                    
+                    # Reset login attempts, unlock and stamp last login in one statement
+                    cursor.execute("""
+                        UPDATE users
+                        SET login_attempts = 0, locked_until = NULL, last_login = CURRENT_TIMESTAMP
+                        WHERE id = %s
+                    """, (user['id'],))
+                    
+                    cursor.execute("""
+                        INSERT INTO user_sessions (user_id, session_token, ip_address, user_agent, expires_at)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (user['id'], session_token, ip_address, user_agent, expires_at))
+                    
+                    connection.commit()
+                except Exception:
+                    try:
+                        connection.rollback()
+                    except Exception:
+                        pass
+                    raise
+                finally:
+                    cursor.close()
             
             # Remove sensitive data
             user_data = {
@@ -224,6 +258,10 @@ class UserManager:
             
             logger.info(f"User logged in: {username}")
             
+        except HasherBusyError as e:
+            logger.warning(f"Login for {username} rejected: {e}")
+            result['message'] = 'Authentication service is busy. Please try again shortly.'
+            result['busy'] = True
         except Exception as e:
             logger.error(f"Authentication error: {e}")
             result['message'] = 'Authentication failed'
@@ -233,122 +271,86 @@ class UserManager:
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Get user by username"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT id, username, email, password_hash, full_name, role, is_active,
-                       last_login, login_attempts, locked_until, created_at, updated_at
-                FROM users WHERE username = %s
-            """, (username,))
+            with self.db.cursor(dictionary=True) as cursor:
+                cursor.execute("""
+                    SELECT id, username, email, password_hash, full_name, role, is_active,
+                           last_login, login_attempts, locked_until, created_at, updated_at
+                    FROM users WHERE username = %s
+                """, (username,))
             
-            return cursor.fetchone()
+                return cursor.fetchone()
             
         except Exception as e:
             logger.error(f"Error getting user by username: {e}")
             return None
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
     
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Get user by email"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT id, username, email, password_hash, full_name, role, is_active,
-                       last_login, login_attempts, locked_until, created_at, updated_at
-                FROM users WHERE email = %s
-            """, (email,))
+            with self.db.cursor(dictionary=True) as cursor:
+                cursor.execute("""
+                    SELECT id, username, email, password_hash, full_name, role, is_active,
+                           last_login, login_attempts, locked_until, created_at, updated_at
+                    FROM users WHERE email = %s
+                """, (email,))
             
-            return cursor.fetchone()
+                return cursor.fetchone()
             
         except Exception as e:
             logger.error(f"Error getting user by email: {e}")
             return None
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
     
     def record_failed_login(self, user_id: int):
         """Record failed login attempt and lock account if necessary"""
         try:
-            max_attempts = self.get_setting('max_login_attempts', 5)
-            lockout_minutes = self.get_setting('account_lockout_minutes', 30)
-            
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            # Increment login attempts
-            cursor.execute("""
-                UPDATE users 
-                SET login_attempts = login_attempts + 1
-                WHERE id = %s
-            """, (user_id,))
-            
-            # Check if we need to lock the account
-            cursor.execute("SELECT login_attempts FROM users WHERE id = %s", (user_id,))
-            result = cursor.fetchone()
-            
-            if result and result[0] >= max_attempts:
-                locked_until = datetime.now() + timedelta(minutes=lockout_minutes)
-                cursor.execute("""
-                    UPDATE users 
-                    SET locked_until = %s
-                    WHERE id = %s
-                """, (locked_until, user_id))
-                
-                logger.warning(f"User account locked due to failed login attempts: {user_id}")
-            
-            connection.commit()
+            with self.db.cursor(commit=True) as cursor:
+                self._record_failed_login(cursor, user_id)
             
         except Exception as e:
             logger.error(f"Error recording failed login: {e}")
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
+    
+    def _record_failed_login(self, cursor, user_id: int, previous_attempts: Optional[int] = None):
+        """Increment login attempts and apply the lockout in a single UPDATE"""
+        max_attempts = self.get_setting('max_login_attempts', 5)
+        lockout_minutes = self.get_setting('account_lockout_minutes', 30)
+        locked_until = datetime.now() + timedelta(minutes=lockout_minutes)
+        
+        # locked_until is assigned first so it sees the pre-increment attempt count
+        cursor.execute("""
+            UPDATE users
+            SET locked_until = CASE WHEN login_attempts + 1 >= %s THEN %s ELSE locked_until END,
+                login_attempts = login_attempts + 1
+            WHERE id = %s
+        """, (max_attempts, locked_until, user_id))
+        
+        if previous_attempts is not None and previous_attempts + 1 >= max_attempts:
+            logger.warning(f"User account locked due to failed login attempts: {user_id}")
     
     def reset_login_attempts(self, user_id: int):
         """Reset login attempts and unlock account"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                UPDATE users 
-                SET login_attempts = 0, locked_until = NULL
-                WHERE id = %s
-            """, (user_id,))
-            
-            connection.commit()
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    UPDATE users 
+                    SET login_attempts = 0, locked_until = NULL
+                    WHERE id = %s
+                """, (user_id,))
             
         except Exception as e:
             logger.error(f"Error resetting login attempts: {e}")
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
     
     def update_last_login(self, user_id: int):
         """Update user's last login timestamp"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                UPDATE users 
-                SET last_login = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """, (user_id,))
-            
-            connection.commit()
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    UPDATE users 
+                    SET last_login = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                """, (user_id,))
             
         except Exception as e:
             logger.error(f"Error updating last login: {e}")
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
     
     def create_session(self, user_id: int, ip_address: str = None, user_agent: str = None) -> str:
         """Create user session"""
@@ -357,119 +359,165 @@ class UserManager:
             session_timeout_hours = self.get_setting('session_timeout_hours', 8)
             expires_at = datetime.now() + timedelta(hours=session_timeout_hours)
             
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                INSERT INTO user_sessions (user_id, session_token, ip_address, user_agent, expires_at)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (user_id, session_token, ip_address, user_agent, expires_at))
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    INSERT INTO user_sessions (user_id, session_token, ip_address, user_agent, expires_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (user_id, session_token, ip_address, user_agent, expires_at))
             
-            connection.commit()
             return session_token
             
         except Exception as e:
             logger.error(f"Error creating session: {e}")
             return None
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
     
     def validate_session(self, session_token: str) -> Optional[Dict[str, Any]]:
-        """Validate session token and return user data"""
+        """Validate session token and return user data
+        
+        Valid sessions are cached in memory, so repeat checks of the same
+        token need no database round trip until the cache entry expires.
+        """
+        if not session_token:
+            return None
+        
+        cached = session_cache.get(session_token)
+        if cached is not None:
+            return cached
+        
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT s.user_id, s.expires_at, u.username, u.email, u.full_name, u.role, u.is_active
-                FROM user_sessions s
-                JOIN users u ON s.user_id = u.id
-                WHERE s.session_token = %s AND s.is_active = TRUE AND s.expires_at > NOW()
-            """, (session_token,))
-            
-            session = cursor.fetchone()
-            
-            if session and session['is_active']:
-                return {
-                    'user_id': session['user_id'],
-                    'username': session['username'],
-                    'email': session['email'],
-                    'full_name': session['full_name'],
-                    'role': session['role']
-                }
+            with self.db.cursor(dictionary=True) as cursor:
+                cursor.execute("""
+                    SELECT s.user_id, s.expires_at, u.username, u.email, u.full_name, u.role, u.is_active
+                    FROM user_sessions s
+                    JOIN users u ON s.user_id = u.id
+                    WHERE s.session_token = %s AND s.is_active = TRUE AND s.expires_at > NOW()
+                """, (session_token,))
+            
+                session = cursor.fetchone()
+            
+                if session and session['is_active']:
+                    user_data = {
+                        'user_id': session['user_id'],
+                        'username': session['username'],
+                        'email': session['email'],
+                        'full_name': session['full_name'],
+                        'role': session['role']
+                    }
+                    session_cache.put(session_token, user_data, session['expires_at'])
+                    return user_data
+            
+                return None
             
+        except Exception as e:
+            logger.error(f"Error validating session: {e}")
             return None
+    
+    def get_session_data(self, session_token: str) -> Optional[tuple]:
+        """Get (payload, version) of the stored web session of an active session"""
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT session_data, session_version FROM user_sessions
+                    WHERE session_token = %s AND is_active = TRUE AND expires_at > NOW()
+                """, (session_token,))
+                row = cursor.fetchone()
+                return (row[0], row[1]) if row and row[0] is not None else None
             
         except Exception as e:
-            logger.error(f"Error validating session: {e}")
+            logger.error(f"Error loading session data: {e}")
             return None
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
+    
+    def save_session_data(self, session_token: str, session_data: Optional[str], expected_version: int) -> bool:
+        """Store the web session payload if it is still at expected_version, bumping the version
+        
+        False if the session is not active or another request saved it first.
+        """
+        try:
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    UPDATE user_sessions SET session_data = %s, session_version = session_version + 1
+                    WHERE session_token = %s AND is_active = TRUE AND session_version = %s
+                """, (session_data, session_token, expected_version))
+                return cursor.rowcount > 0
+            
+        except Exception as e:
+            logger.error(f"Error saving session data: {e}")
+            return False
     
     def invalidate_session(self, session_token: str):
         """Invalidate session token"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                UPDATE user_sessions 
-                SET is_active = FALSE
-                WHERE session_token = %s
-            """, (session_token,))
-            
-            connection.commit()
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    UPDATE user_sessions 
+                    SET is_active = FALSE, session_data = NULL
+                    WHERE session_token = %s
+                """, (session_token,))
             
         except Exception as e:
             logger.error(f"Error invalidating session: {e}")
         finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
+            session_cache.invalidate(session_token)
     
-    def cleanup_expired_sessions(self):
-        """Clean up expired sessions"""
+    def cleanup_expired_sessions(self, batch_size: int = 1000) -> int:
+        """Delete expired sessions in batches and return the number removed"""
+        deleted = 0
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                UPDATE user_sessions 
-                SET is_active = FALSE
-                WHERE expires_at <= NOW() AND is_active = TRUE
-            """)
-            
-            connection.commit()
-            logger.info("Expired sessions cleaned up")
+            with self.db.acquire() as connection:
+                cursor = connection.cursor()
+                try:
+                    # Small batches keep each DELETE's row locks short-lived
+                    while True:
+                        cursor.execute("""
+                            DELETE FROM user_sessions
+                            WHERE expires_at <= NOW()
+                            LIMIT %s
+                        """, (batch_size,))
+                        connection.commit()
+                        deleted += cursor.rowcount
+                        if cursor.rowcount < batch_size:
+                            break
+                finally:
+                    cursor.close()
+            
+            logger.info(f"Expired sessions cleaned up: {deleted} removed")
             
         except Exception as e:
             logger.error(f"Error cleaning up sessions: {e}")
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
+        
+        return deleted
+    
+    def start_session_cleanup(self, interval_seconds: int = 900) -> threading.Thread:
+        """Run cleanup_expired_sessions periodically on a daemon thread"""
+        def run_cleanup():
+            while not self._cleanup_stop.wait(interval_seconds):
+                self.cleanup_expired_sessions()
+        
+        self._cleanup_stop.clear()
+        thread = threading.Thread(target=run_cleanup, name='session-cleanup', daemon=True)
+        thread.start()
+        return thread
+    
+    def stop_session_cleanup(self):
+        """Stop the periodic session cleanup thread"""
+        self._cleanup_stop.set()
     
     def get_all_users(self) -> List[Dict[str, Any]]:
         """Get all users (excluding password hashes)"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT id, username, email, full_name, role, is_active, last_login, 
-                       login_attempts, locked_until, created_at, updated_at
-                FROM users
-                ORDER BY created_at DESC
-            """)
+            with self.db.cursor(dictionary=True, read_only=True) as cursor:
+                cursor.execute("""
+                    SELECT id, username, email, full_name, role, is_active, last_login, 
+                           login_attempts, locked_until, created_at, updated_at
+                    FROM users
+                    ORDER BY created_at DESC
+                """)
             
-            return cursor.fetchall()
+                return cursor.fetchall()
             
         except Exception as e:
             logger.error(f"Error getting all users: {e}")
             return []
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
     
     def update_user_role(self, user_id: int, new_role: str) -> bool:
         """Update user role"""
@@ -477,50 +525,43 @@ class UserManager:
             if new_role not in ['admin', 'operator', 'viewer']:
                 return False
             
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                UPDATE users 
-                SET role = %s, updated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """, (new_role, user_id))
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    UPDATE users 
+                    SET role = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                """, (new_role, user_id))
+                updated = cursor.rowcount > 0
             
-            connection.commit()
-            return cursor.rowcount > 0
+            session_cache.invalidate_user(user_id)
+            return updated
             
         except Exception as e:
             logger.error(f"Error updating user role: {e}")
             return False
-        finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
     
     def deactivate_user(self, user_id: int) -> bool:
         """Deactivate user account"""
         try:
-            connection = self.db.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                UPDATE users 
-                SET is_active = FALSE, updated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """, (user_id,))
-            
-            # Also invalidate all sessions
-            cursor.execute("""
-                UPDATE user_sessions 
-                SET is_active = FALSE
-                WHERE user_id = %s
-            """, (user_id,))
+            with self.db.cursor(commit=True) as cursor:
+                cursor.execute("""
+                    UPDATE users 
+                    SET is_active = FALSE, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                """, (user_id,))
+                deactivated = cursor.rowcount > 0
+                
+                # Also invalidate all sessions
+                cursor.execute("""
+                    UPDATE user_sessions 
+                    SET is_active = FALSE
+                    WHERE user_id = %s
+                """, (user_id,))
             
-            connection.commit()
-            return cursor.rowcount > 0
+                return deactivated
             
         except Exception as e:
             logger.error(f"Error deactivating user: {e}")
             return False
         finally:
-            if 'connection' in locals():
-                self.db.return_connection(connection)
+            session_cache.invalidate_user(user_id)
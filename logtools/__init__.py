@@ -0,0 +1,4 @@
+# Log utilities shared by main.py, the scripts and the web interface
+from .tail import tail_lines, read_since
+from .index import LogIndex, get_log_index, parse_line
+from .logging_setup import configure_logging, device_logger, timed_command
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Searchable index of the automation log files
+
+Log files are read incrementally from a saved byte offset into a local
+SQLite database with indexed time, level and device columns and an FTS5
+full-text index over the messages. Re-running ingest only reads what was
+appended since the last run, and concurrent ingests from several processes
+never index a line twice.
+
+    python logtools/index.py --ingest
+    python logtools/index.py --device R1 --level ERROR "connection failed"
+"""
+import os
+import re
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Allow running as a script from the project root or the logtools directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logtools.tail import read_since
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_PATH = os.path.join(PROJECT_ROOT, 'logs', 'log_index.db')
+
+# Directories scanned for *.log files; LOG_INDEX_DIRS adds more, e.g. the
+# ../logs directory that scripts started from the project root write to
+LOG_DIRS = [
+    PROJECT_ROOT,
+    os.path.join(PROJECT_ROOT, 'logs'),
+    os.path.join(PROJECT_ROOT, 'connectionGNS3', 'logs')
+]
+
+# "2025-07-29 13:49:43,823 - [logger - ]LEVEL - message"
+LINE_PATTERN = re.compile(
+    r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:,(?P<ms>\d{3}))?'
+    r' - (?:(?P<logger>[\w.]+) - )?(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL) - (?P<message>.*)$'
+)
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS log_sources (
+        path TEXT PRIMARY KEY,
+        inode INTEGER,
+        offset INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS log_entries (
+        id INTEGER PRIMARY KEY,
+        logged_at TEXT,
+        level TEXT,
+        device TEXT,
+        source TEXT NOT NULL,
+        message TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_log_entries_time ON log_entries (logged_at)",
+    "CREATE INDEX IF NOT EXISTS idx_log_entries_device_time ON log_entries (device, logged_at)",
+    "CREATE INDEX IF NOT EXISTS idx_log_entries_level_time ON log_entries (level, logged_at)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS log_entries_fts
+        USING fts5(message, content='log_entries', content_rowid='id')""",
+    """CREATE TRIGGER IF NOT EXISTS log_entries_ai AFTER INSERT ON log_entries BEGIN
+        INSERT INTO log_entries_fts (rowid, message) VALUES (new.id, new.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS log_entries_ad AFTER DELETE ON log_entries BEGIN
+        INSERT INTO log_entries_fts (log_entries_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END"""
+]
+
+
+def parse_line(line):
+    """Return (logged_at, level, message, device) of a log line, or None for continuation lines
+
+    Handles both the JSON lines written by configure_logging() and the older
+    "time - LEVEL - message" text format.
+    """
+    if line.startswith('{'):
+        try:
+            entry = json.loads(line)
+            message = entry['message']
+            if entry.get('exception'):
+                message += '\n' + entry['exception']
+            return entry.get('time'), entry.get('level'), message, entry.get('device')
+        except (ValueError, KeyError, TypeError):
+            pass
+    match = LINE_PATTERN.match(line)
+    if not match:
+        return None
+    logged_at = match.group('date') + (f".{match.group('ms')}" if match.group('ms') else '')
+    return logged_at, match.group('level'), match.group('message'), None
+
+
+def load_device_names():
+    """Map of device names and real hostnames to device name, from the device cache"""
+    names = {}
+    cache_file = os.path.join(PROJECT_ROOT, 'config', 'devices_cache.json')
+    try:
+        with open(cache_file, 'r') as f:
+            for device in json.load(f):
+                if device.get('name'):
+                    names[device['name']] = device['name']
+                    if device.get('real_hostname'):
+                        names[device['real_hostname']] = device['name']
+    except (OSError, ValueError) as e:
+        logger.debug(f"No device names for log indexing: {e}")
+    return names
+
+
+def discover_log_files():
+    """All *.log files in LOG_DIRS and LOG_INDEX_DIRS"""
+    directories = LOG_DIRS + [d for d in os.getenv('LOG_INDEX_DIRS', '').split(os.pathsep) if d]
+    files = []
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            path = os.path.abspath(os.path.join(directory, filename))
+            if filename.endswith('.log') and os.path.isfile(path) and path not in files:
+                files.append(path)
+    return files
+
+
+class LogIndex:
+    """SQLite/FTS5 index of log lines with time, level and device columns"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, chunk_bytes=1024 * 1024):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def ingest(self, paths=None):
+        """Index lines appended to each log file since the last run; return lines indexed"""
+        devices = load_device_names()
+        device_pattern = re.compile(
+            r'\b(' + '|'.join(re.escape(name) for name in sorted(devices, key=len, reverse=True)) + r')\b'
+        ) if devices else None
+
+        total = 0
+        for path in paths or discover_log_files():
+            try:
+                total += self._ingest_file(path, devices, device_pattern)
+            except Exception as e:
+                logger.error(f"Error indexing {path}: {e}")
+        return total
+
+    def search(self, text=None, device=None, level=None, since=None, until=None,
+               source=None, limit=100, before_id=None):
+        """Return matching entries, most recently indexed first
+
+        ``text`` is matched as words against the full-text index. Pass the
+        smallest ``id`` of a page as ``before_id`` to get the next page.
+        """
+        conditions = []
+        params = []
+        join = ''
+        if text and text.strip():
+            join = 'JOIN log_entries_fts ON log_entries_fts.rowid = e.id'
+            conditions.append('log_entries_fts MATCH ?')
+            params.append(' '.join('"' + word.replace('"', '""') + '"' for word in text.split()))
+        if device:
+            conditions.append('e.device = ?')
+            params.append(device)
+        if level:
+            conditions.append('e.level = ?')
+            params.append(level.upper())
+        if since:
+            conditions.append('e.logged_at >= ?')
+            params.append(_normalize_time(since))
+        if until:
+            conditions.append('e.logged_at < ?')
+            params.append(_normalize_time(until))
+        if source:
+            conditions.append('e.source = ?')
+            params.append(source)
+        if before_id:
+            conditions.append('e.id < ?')
+            params.append(before_id)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(limit)
+        rows = self._connection().execute(
+            f"""SELECT e.id, e.logged_at, e.level, e.device, e.source, e.message
+                FROM log_entries e {join} {where}
+                ORDER BY e.id DESC LIMIT ?""",
+            params
+        ).fetchall()
+        return [
+            {'id': row[0], 'logged_at': row[1], 'level': row[2], 'device': row[3],
+             'source': row[4], 'message': row[5]}
+            for row in rows
+        ]
+
+    def devices(self):
+        """Device names present in the index"""
+        rows = self._connection().execute(
+            "SELECT DISTINCT device FROM log_entries WHERE device IS NOT NULL ORDER BY device"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self, before):
+        """Delete entries logged before a datetime or 'YYYY-MM-DD HH:MM:SS' string"""
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM log_entries WHERE logged_at < ?", (_normalize_time(before),))
+            return cursor.rowcount
+
+    def start(self, interval_seconds=30):
+        """Ingest now and then periodically on a daemon thread; a no-op if already running"""
+        def run_ingest():
+            self.ingest()
+            while not self._stop.wait(interval_seconds):
+                self.ingest()
+
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+            self._stop.clear()
+            self._thread = threading.Thread(target=run_ingest, name='log-index-ingest', daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def stop(self):
+        """Stop the periodic ingest thread"""
+        self._stop.set()
+
+    def _ingest_file(self, path, devices, device_pattern):
+        """Index one file chunk by chunk, saving the offset with each chunk"""
+        source = os.path.relpath(path, PROJECT_ROOT)
+        indexed = 0
+        while True:
+            with self._transaction() as conn:
+                # Read the offset inside the write transaction so two processes
+                # ingesting at once cannot both index the same chunk
+                inode = os.stat(path).st_ino
+                row = conn.execute("SELECT inode, offset FROM log_sources WHERE path = ?", (source,)).fetchone()
+                offset = row[1] if row and row[0] == inode else 0
+
+                lines, new_offset = read_since(path, offset, self.chunk_bytes)
+                entries = self._parse(lines, source, devices, device_pattern)
+                conn.executemany(
+                    "INSERT INTO log_entries (logged_at, level, device, source, message) VALUES (?, ?, ?, ?, ?)",
+                    entries
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO log_sources (path, inode, offset) VALUES (?, ?, ?)",
+                    (source, inode, new_offset)
+                )
+            indexed += len(entries)
+            if new_offset == offset:
+                return indexed
+
+    def _parse(self, lines, source, devices, device_pattern):
+        """Turn lines into entry tuples, folding tracebacks into the entry above"""
+        entries = []
+        for line in lines:
+            parsed = parse_line(line)
+            if parsed is None:
+                if not line.strip():
+                    continue
+                if entries:
+                    logged_at, level, device, source, message = entries[-1]
+                    entries[-1] = (logged_at, level, device, source, message + '\n' + line)
+                    continue
+                parsed = (None, None, line, None)
+
+            logged_at, level, message, device = parsed
+            if device is None and device_pattern:
+                match = device_pattern.search(message)
+                device = devices[match.group(1)] if match else None
+            entries.append((logged_at, level, device, source, message))
+        return entries
+
+    def _connection(self):
+        """One connection per thread, created with the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+def _normalize_time(value):
+    """datetime or ISO-ish string ('T' separator allowed) to the stored text format"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value).replace('T', ' ')
+
+
+# Global log index instance
+log_index = None
+
+
+def get_log_index():
+    """Get global log index at LOG_INDEX_PATH"""
+    global log_index
+    if log_index is None:
+        log_index = LogIndex(os.getenv('LOG_INDEX_PATH', DEFAULT_INDEX_PATH))
+    return log_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search the automation logs")
+    parser.add_argument('text', nargs='?', help="words to search for")
+    parser.add_argument('--ingest', action='store_true', help="index new log lines before searching")
+    parser.add_argument('--device', help="only entries mentioning this device")
+    parser.add_argument('--level', help="DEBUG, INFO, WARNING, ERROR or CRITICAL")
+    parser.add_argument('--since', help="'YYYY-MM-DD HH:MM:SS' lower bound")
+    parser.add_argument('--until', help="'YYYY-MM-DD HH:MM:SS' upper bound")
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    index = get_log_index()
+    if args.ingest:
+        print(f"📥 Indexed {index.ingest()} new log entries")
+    if args.ingest and not (args.text or args.device or args.level or args.since or args.until):
+        return
+
+    entries = index.search(args.text, args.device, args.level, args.since, args.until, limit=args.limit)
+    for entry in reversed(entries):
+        device = f" [{entry['device']}]" if entry['device'] else ''
+        print(f"{entry['logged_at'] or '-'} {entry['level'] or '-':<8} {entry['source']}{device}: {entry['message']}")
+    print(f"\n🔎 {len(entries)} entries")
+
+
+if __name__ == "__main__":
+    main()
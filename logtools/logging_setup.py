@@ -0,0 +1,204 @@
+"""
+Shared non-blocking logging setup for the automation scripts
+
+configure_logging() replaces the per-script ``logging.basicConfig`` blocks.
+Logging threads only put records on a queue; one listener thread formats
+and writes them, so device workers never wait on the handler lock or a
+disk flush. The listener writes:
+
+- ``logs/<name>`` as JSON lines, rotated by size into gzip-compressed backups
+- the console in the usual "time - LEVEL - message" format
+
+Records can carry ``device``, ``job_id``, ``command``, ``duration_ms`` and
+``outcome`` (see device_logger() and timed_command()). Repeats of the same message about one device are
+rate limited; warnings and errors are never dropped.
+"""
+import os
+import copy
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(PROJECT_ROOT, 'logs')
+
+STRUCTURED_FIELDS = ('device', 'job_id', 'command', 'duration_ms', 'outcome', 'suppressed')
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the structured fields that are set"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps the message and traceback separate for the JSON file"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """Size-based rotation that gzips each rotated file (name.log.1.gz, ...)"""
+
+    def __init__(self, filename, max_bytes, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.namer = lambda name: name + '.gz'
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+class DeviceRateLimitFilter(logging.Filter):
+    """Let through at most `burst` identical messages per device every `interval` seconds
+
+    The first record after a window with drops carries ``suppressed``, the
+    number of records dropped.
+    """
+
+    def __init__(self, burst=20, interval=60.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        device = getattr(record, 'device', None)
+        if device is None or record.levelno >= logging.WARNING:
+            return True
+
+        key = (device, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            started, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started >= self.interval:
+                if suppressed:
+                    record.suppressed = suppressed
+                started, count, suppressed = now, 0, 0
+            if count >= self.burst:
+                self._windows[key] = (started, count, suppressed + 1)
+                return False
+            self._windows[key] = (started, count + 1, suppressed)
+            # Forget idle keys so the table stays small
+            if len(self._windows) > 10000:
+                self._windows = {k: v for k, v in self._windows.items() if now - v[0] < self.interval}
+        return True
+
+
+class DeviceLogger(logging.LoggerAdapter):
+    """Logger adapter that adds device/job fields and keeps per-call extras"""
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = {**self.extra, **kwargs.get('extra', {})}
+        return msg, kwargs
+
+
+def device_logger(device, job_id=None, logger=None):
+    """Logger whose records carry the device name and job id"""
+    return DeviceLogger(logger or logging.getLogger(), {'device': device, 'job_id': job_id})
+
+
+@contextmanager
+def timed_command(log, command, level=logging.INFO):
+    """Log a command with its duration and outcome once it finishes, also when it raises"""
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        if error is None:
+            log.log(level, f"Executed: {command} ({duration_ms} ms)",
+                    extra={'command': command, 'duration_ms': duration_ms, 'outcome': 'ok'})
+        else:
+            log.error(f"Failed: {command} ({duration_ms} ms): {error}",
+                      extra={'command': command, 'duration_ms': duration_ms, 'outcome': 'error'})
+
+
+# Listener of the current process, set by configure_logging()
+_listener = None
+
+
+def configure_logging(log_name, level=logging.INFO, console=True,
+                      max_bytes=10 * 1024 * 1024, backup_count=5, burst=20, interval=60.0):
+    """Route the root logger through a queue to logs/<log_name> and the console
+
+    Calling it again in the same process keeps the first configuration.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = CompressingRotatingFileHandler(os.path.join(LOG_DIR, log_name), max_bytes, backup_count)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(DeviceRateLimitFilter(burst, interval))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Flush queued records before the interpreter exits
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
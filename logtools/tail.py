@@ -0,0 +1,62 @@
+"""
+Constant-cost log tailing
+
+``tail_lines`` reads backwards from the end of a file in fixed-size blocks,
+so the last N lines cost the same on a 1 KB or a 10 GB log. ``read_since``
+continues from a byte offset returned earlier, for follow mode.
+"""
+import os
+
+BLOCK_SIZE = 64 * 1024
+
+
+def tail_lines(path, lines=50, block_size=BLOCK_SIZE):
+    """Return (last `lines` lines, end offset) of a text file
+
+    The end offset can be passed to read_since() to follow the file.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position = end
+        blocks = []
+        newlines = 0
+
+        # One extra newline is needed to know the oldest wanted line is complete
+        while position > 0 and newlines <= lines:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+
+    text = b''.join(reversed(blocks)).decode('utf-8', errors='replace')
+    result = text.splitlines()
+    return result[-lines:] if lines > 0 else [], end
+
+
+def read_since(path, offset, max_bytes=1024 * 1024):
+    """Return (complete lines after `offset`, new offset)
+
+    At most `max_bytes` are read per call; call again with the new offset to
+    continue. If the file shrank below `offset` it was truncated or rotated,
+    and reading restarts from the beginning.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if offset > size:
+            offset = 0
+        f.seek(offset)
+        data = f.read(min(max_bytes, size - offset))
+
+    # Leave a trailing partial line for the next call
+    complete = data.rfind(b'\n') + 1
+    if complete == 0 and len(data) < max_bytes:
+        return [], offset
+    if complete == 0:
+        complete = len(data)
+
+    lines = data[:complete].decode('utf-8', errors='replace').splitlines()
+    return lines, offset + complete
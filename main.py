@@ -11,18 +11,13 @@ import subprocess
 from datetime import datetime
 import logging
 
+from logtools import tail_lines, configure_logging, parse_line
+
 # Add the connectionGNS3 directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'connectionGNS3'))
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/main_automation.log'),
-        logging.StreamHandler()
-    ]
-)
+# Set up logging (queued writes, JSON lines in logs/main_automation.log)
+configure_logging('main_automation.log')
 
 def print_banner():
     print("=" * 60)
@@ -103,10 +98,14 @@ def view_logs():
         if os.path.exists(log_file):
             print(f"\n{log_file}:")
             try:
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    # Show last 5 lines
-                    for line in lines[-5:]:
+                # Show last 5 lines without reading the whole file
+                lines, _ = tail_lines(log_file, 5)
+                for line in lines:
+                    parsed = parse_line(line.strip())
+                    if parsed:
+                        logged_at, level, message, _ = parsed
+                        print(f"  {logged_at} - {level} - {message}")
+                    else:
                         print(f"  {line.strip()}")
             except Exception as e:
                 print(f"  Error reading log: {e}")
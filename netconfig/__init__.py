@@ -0,0 +1,5 @@
+# Stored device configurations: backup catalog and the tools built on it
+from .catalog import BackupCatalog, get_catalog
+from .parser import ConfigNode, ConfigTree, parse_config, parse_cached
+from .diff import diff_configs, diff_backups, diff_with_previous, diff_with_running, cached_diff_with_running, get_diff_cache
+from .search import ConfigSearchIndex, get_search_index
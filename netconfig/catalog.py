@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Backup catalog
+
+record_backup() writes a configuration file atomically and records its
+device, type, size, sha256 checksum and timestamp in the same step.
+Listings, the web view and the PDF report read the catalog instead of
+scanning backups/ and guessing device names from file names.
+
+    python netconfig/catalog.py --import     # add files already in backups/
+    python netconfig/catalog.py --device R1
+"""
+import os
+import re
+import sys
+import json
+import base64
+import hashlib
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+
+# Allow running as a script from the project root or the netconfig directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netconfig.store import SQLiteStore, CATALOG_PATH, BACKUP_DIR
+
+logger = logging.getLogger(__name__)
+
+# Same values as the backup_type column of the database backups table
+BACKUP_TYPES = ('running-config', 'startup-config', 'full-backup')
+
+# <device>_<running|startup|full>_config_<YYYY-mm-dd_HH-MM-SS>[-N].txt; device names may contain '_'
+FILENAME_PATTERN = re.compile(
+    r'^(?P<device>.+)_(?P<kind>running|startup|full)_config_'
+    r'(?P<stamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:-\d+)?\.txt$'
+)
+
+MAX_PAGE_SIZE = 500
+
+
+class BackupCatalog(SQLiteStore):
+    """Index of backup files with keyset-paginated listings"""
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS backup_catalog (
+            id INTEGER PRIMARY KEY,
+            device_name TEXT NOT NULL,
+            backup_type TEXT NOT NULL,
+            file_name TEXT NOT NULL UNIQUE,
+            file_size INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_backup_catalog_created ON backup_catalog (created_at, id)",
+        """CREATE INDEX IF NOT EXISTS idx_backup_catalog_device_created
+            ON backup_catalog (device_name, backup_type, created_at, id)""",
+        "CREATE INDEX IF NOT EXISTS idx_backup_catalog_checksum ON backup_catalog (checksum)",
+        "CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value TEXT)"
+    ]
+
+    COLUMNS = ('id', 'device_name', 'backup_type', 'file_name', 'file_size', 'checksum', 'created_at')
+
+    def __init__(self, path=CATALOG_PATH, backup_dir=BACKUP_DIR):
+        super().__init__(path)
+        self.backup_dir = backup_dir
+
+    def record_backup(self, device_name, backup_type, content, created_at=None):
+        """Write a backup file atomically and catalog it; return the catalog entry
+
+        An existing file is never overwritten: a second backup with the same
+        name gets a -1, -2, ... suffix.
+        """
+        if backup_type not in BACKUP_TYPES:
+            raise ValueError(f"Unknown backup type: {backup_type}")
+        created_at = (created_at or datetime.now()).replace(microsecond=0)
+        kind = backup_type.split('-')[0]
+        stem = f"{device_name.replace(' ', '_')}_{kind}_config_{created_at:%Y-%m-%d_%H-%M-%S}"
+        data = content.encode('utf-8')
+        checksum = hashlib.sha256(data).hexdigest()
+
+        file_name, path = self._write_new_file(stem, data)
+        try:
+            with self._transaction() as conn:
+                backup_id = conn.execute(
+                    """INSERT INTO backup_catalog
+                       (device_name, backup_type, file_name, file_size, checksum, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       RETURNING id""",
+                    (device_name, backup_type, file_name, len(data), checksum, f"{created_at:%Y-%m-%d %H:%M:%S}")
+                ).fetchone()[0]
+        except Exception:
+            # A file without a catalog row would be invisible; remove the one this call created
+            os.remove(path)
+            raise
+        return self.get(backup_id)
+
+    def _write_new_file(self, stem, data):
+        """Write data under the first free <stem>[-N].txt name; return (file_name, path)"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.backup_dir, prefix=f".{stem}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            for attempt in range(1000):
+                file_name = f"{stem}.txt" if attempt == 0 else f"{stem}-{attempt}.txt"
+                path = os.path.join(self.backup_dir, file_name)
+                if self.get_by_file_name(file_name) is not None:
+                    continue
+                try:
+                    # link() fails instead of replacing, so a catalogued file is never clobbered
+                    os.link(temp_path, path)
+                except FileExistsError:
+                    continue
+                return file_name, path
+            raise FileExistsError(f"No free backup file name for {stem}")
+        finally:
+            os.remove(temp_path)
+
+    def import_directory(self):
+        """Catalog backup files in backup_dir that have no entry yet; return how many were added"""
+        if not os.path.isdir(self.backup_dir):
+            return 0
+        known = {row[0] for row in self._connection().execute("SELECT file_name FROM backup_catalog")}
+        entries = []
+        for file_name in sorted(os.listdir(self.backup_dir)):
+            match = FILENAME_PATTERN.match(file_name)
+            if not match or file_name in known:
+                continue
+            with open(os.path.join(self.backup_dir, file_name), 'rb') as f:
+                data = f.read()
+            created_at = datetime.strptime(match.group('stamp'), '%Y-%m-%d_%H-%M-%S')
+            entries.append((
+                match.group('device'), f"{match.group('kind')}-config" if match.group('kind') != 'full' else 'full-backup',
+                file_name, len(data), hashlib.sha256(data).hexdigest(), f"{created_at:%Y-%m-%d %H:%M:%S}"
+            ))
+
+        with self._transaction() as conn:
+            conn.executemany(
+                """INSERT OR IGNORE INTO backup_catalog
+                   (device_name, backup_type, file_name, file_size, checksum, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                entries
+            )
+            conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('imported', ?)",
+                         (datetime.now().isoformat(),))
+        if entries:
+            logger.info(f"Imported {len(entries)} existing backup files into the catalog")
+        return len(entries)
+
+    def import_once(self):
+        """Import existing files the first time the catalog is used"""
+        row = self._connection().execute("SELECT value FROM catalog_meta WHERE key = 'imported'").fetchone()
+        if row is None:
+            self.import_directory()
+
+    def list_backups(self, limit=100, cursor=None, device_name=None, backup_type=None, since=None, until=None):
+        """One page of entries, newest first: {'items': [...], 'next_cursor': str or None}
+
+        Raises ValueError for a malformed cursor.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        filters = {
+            'device_name = ?': device_name,
+            'backup_type = ?': backup_type,
+            'created_at >= ?': _format_time(since),
+            'created_at < ?': _format_time(until)
+        }
+        conditions = [condition for condition, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+        if cursor:
+            created_at, backup_id = decode_cursor(cursor)
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([created_at, created_at, backup_id])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self._connection().execute(
+            f"""SELECT {', '.join(self.COLUMNS)} FROM backup_catalog {where}
+                ORDER BY created_at DESC, id DESC LIMIT ?""",
+            params + [limit + 1]
+        ).fetchall()
+        items = [dict(zip(self.COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def get(self, backup_id):
+        """Catalog entry by id, or None"""
+        return self._fetch_one("SELECT {} FROM backup_catalog WHERE id = ?", (backup_id,))
+
+    def get_by_file_name(self, file_name):
+        """Catalog entry by file name, or None"""
+        return self._fetch_one("SELECT {} FROM backup_catalog WHERE file_name = ?", (file_name,))
+
+    def latest(self, device_name, backup_type='running-config'):
+        """Newest entry of one type for a device, or None"""
+        return self._fetch_one(
+            """SELECT {} FROM backup_catalog WHERE device_name = ? AND backup_type = ?
+               ORDER BY created_at DESC, id DESC LIMIT 1""",
+            (device_name, backup_type)
+        )
+
+    def previous(self, entry):
+        """The entry of the same device and type taken before `entry`, or None"""
+        return self._fetch_one(
+            """SELECT {} FROM backup_catalog
+               WHERE device_name = ? AND backup_type = ?
+                 AND (created_at < ? OR (created_at = ? AND id < ?))
+               ORDER BY created_at DESC, id DESC LIMIT 1""",
+            (entry['device_name'], entry['backup_type'], entry['created_at'], entry['created_at'], entry['id'])
+        )
+
+    def latest_per_device(self, backup_type='running-config'):
+        """Newest entry of one type for every device"""
+        rows = self._connection().execute(
+            f"""SELECT {', '.join(self.COLUMNS)} FROM backup_catalog b
+                WHERE backup_type = ? AND id = (
+                    SELECT id FROM backup_catalog
+                    WHERE device_name = b.device_name AND backup_type = b.backup_type
+                    ORDER BY created_at DESC, id DESC LIMIT 1)
+                ORDER BY device_name""",
+            (backup_type,)
+        ).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def path_for(self, entry):
+        return os.path.join(self.backup_dir, entry['file_name'])
+
+    def read(self, entry):
+        """Configuration text of a catalog entry"""
+        with open(self.path_for(entry), 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def _fetch_one(self, query, params):
+        row = self._connection().execute(query.format(', '.join(self.COLUMNS)), params).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+
+def encode_cursor(entry):
+    """Opaque page cursor for the position after `entry`"""
+    raw = json.dumps([entry['created_at'], entry['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); raises ValueError for malformed cursors"""
+    try:
+        created_at, backup_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), int(backup_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _format_time(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+# Global backup catalog instance
+catalog = None
+
+
+def get_catalog():
+    """Get global backup catalog, importing pre-existing backup files on first use"""
+    global catalog
+    if catalog is None:
+        catalog = BackupCatalog()
+        catalog.import_once()
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the backup catalog")
+    parser.add_argument('--import', dest='import_files', action='store_true',
+                        help="catalog files in backups/ that have no entry yet")
+    parser.add_argument('--device', help="only backups of this device")
+    parser.add_argument('--type', choices=BACKUP_TYPES, help="only backups of this type")
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    backup_catalog = get_catalog()
+    if args.import_files:
+        print(f"📥 Imported {backup_catalog.import_directory()} backup files")
+
+    page = backup_catalog.list_backups(limit=args.limit, device_name=args.device, backup_type=args.type)
+    for entry in page['items']:
+        print(f"{entry['created_at']}  {entry['device_name']:<16} {entry['backup_type']:<15} "
+              f"{entry['file_size'] / 1024:8.1f} KB  {entry['checksum'][:12]}  {entry['file_name']}")
+    print(f"\n📦 {len(page['items'])} backups{' (more available)' if page['next_cursor'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
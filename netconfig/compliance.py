@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Configuration compliance checks over stored backups
+
+Rules (config/compliance_rules.yaml) are evaluated against the newest
+running-config backup of every device, without connecting to any device.
+Results are stored per (config checksum, rule set) so a run only evaluates
+configurations that changed since the last run, or all of them when the
+rules change. Larger batches are spread over a process pool that is
+created once per process and shared by every run.
+
+    python netconfig/compliance.py
+    python netconfig/compliance.py --device R1 --verbose
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+# Allow running as a script from the project root or the netconfig directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netconfig.store import SQLiteStore, PROJECT_ROOT
+from netconfig.catalog import get_catalog
+from netconfig.parser import parse_config
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = os.getenv('COMPLIANCE_RULES_PATH', os.path.join(PROJECT_ROOT, 'config', 'compliance_rules.yaml'))
+
+SEVERITIES = ('low', 'medium', 'high')
+
+# Below this many configurations a process pool costs more than it saves
+POOL_THRESHOLD = 16
+
+# Size of the shared pool (default: CPU count)
+COMPLIANCE_WORKERS = int(os.getenv('COMPLIANCE_WORKERS', 0)) or None
+
+
+def load_rules(path=RULES_PATH):
+    """Read and validate a rule set; raises ValueError naming the offending rule"""
+    import yaml
+
+    with open(path, 'r') as f:
+        rules = (yaml.safe_load(f) or {}).get('rules', [])
+    seen = set()
+    for rule in rules:
+        rule_id = rule.get('id')
+        if not rule_id or rule_id in seen:
+            raise ValueError(f"Every compliance rule needs a unique id (got {rule_id!r})")
+        seen.add(rule_id)
+        if ('present' in rule) == ('absent' in rule):
+            raise ValueError(f"Rule {rule_id}: set exactly one of 'present' or 'absent'")
+        if rule.setdefault('severity', 'medium') not in SEVERITIES:
+            raise ValueError(f"Rule {rule_id}: severity must be one of {', '.join(SEVERITIES)}")
+        for key in ('present', 'absent', 'parent'):
+            if key in rule:
+                try:
+                    re.compile(rule[key])
+                except re.error as e:
+                    raise ValueError(f"Rule {rule_id}: invalid {key} expression: {e}") from e
+    return rules
+
+
+def ruleset_hash(rules):
+    """Identifies a rule set; stored results are only reused for the same hash"""
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def evaluate_config(text, rules):
+    """Check one configuration: [{'id', 'passed', 'details'}] in rule order"""
+    tree = parse_config(text)
+    global_lines = [node.text for node in tree.children]
+
+    results = []
+    for rule in rules:
+        pattern = re.compile(rule.get('present') or rule['absent'])
+        wanted = 'present' in rule
+        if 'parent' in rule:
+            scopes = [(block.text, [child.text for child in block.children]) for block in tree.find_all(rule['parent'])]
+            if not scopes:
+                results.append({'id': rule['id'], 'passed': not wanted, 'details': ['no matching block']})
+                continue
+        else:
+            scopes = [(None, global_lines)]
+
+        details = []
+        for header, lines in scopes:
+            matches = [line for line in lines if pattern.search(line)]
+            if wanted and not matches:
+                details.append(f"{header}: missing" if header else 'missing')
+            elif not wanted and matches:
+                details.extend(f"{header}: {line}" if header else line for line in matches)
+        results.append({'id': rule['id'], 'passed': not details, 'details': details})
+    return results
+
+
+def _evaluate_file(path, rules):
+    """Process pool task: (results) for one stored configuration"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return evaluate_config(f.read(), rules)
+
+
+class ComplianceStore(SQLiteStore):
+    """Rule results per (configuration checksum, rule set hash)"""
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS compliance_results (
+            checksum TEXT NOT NULL,
+            ruleset TEXT NOT NULL,
+            results TEXT NOT NULL,
+            evaluated_at TEXT NOT NULL,
+            PRIMARY KEY (checksum, ruleset)
+        )"""
+    ]
+
+    def load(self, ruleset, checksums):
+        """Stored results for the given checksums: {checksum: results}"""
+        found = {}
+        checksums = list(checksums)
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(checksums), 500):
+            chunk = checksums[start:start + 500]
+            rows = self._connection().execute(
+                f"""SELECT checksum, results FROM compliance_results
+                    WHERE ruleset = ? AND checksum IN ({', '.join('?' * len(chunk))})""",
+                [ruleset] + chunk
+            )
+            found.update((checksum, json.loads(results)) for checksum, results in rows)
+        return found
+
+    def save(self, ruleset, results_by_checksum):
+        """Store results of one rule set; other rule sets (other rule files) keep theirs"""
+        evaluated_at = datetime.now().isoformat()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO compliance_results (checksum, ruleset, results, evaluated_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(checksum, ruleset, json.dumps(results), evaluated_at)
+                 for checksum, results in results_by_checksum.items()]
+            )
+
+
+def _pool_context():
+    """Start workers from a clean process: forking a threaded web worker can copy held locks"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _evaluate_in_pool(paths, rules, workers=None):
+    """Evaluate stored configurations in the shared pool, restarting it once if it broke"""
+    pool = get_compliance_pool(workers)
+    chunksize = max(1, len(paths) // ((workers or COMPLIANCE_WORKERS or os.cpu_count() or 1) * 4))
+    try:
+        return list(pool.map(_evaluate_file, paths, [rules] * len(paths), chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died (OOM, signal); the pool never recovers on its own
+        logger.warning("Compliance pool is broken, restarting it")
+        _discard_compliance_pool(pool)
+        pool = get_compliance_pool(workers)
+        return list(pool.map(_evaluate_file, paths, [rules] * len(paths), chunksize=chunksize))
+
+
+def run_compliance(rules=None, device_name=None, workers=None):
+    """Check the newest running-config of every device (or one device)
+
+    Returns {'ruleset', 'rules', 'devices': [...], 'summary': {...}}.
+    """
+    started = time.perf_counter()
+    rules = rules if rules is not None else load_rules()
+    ruleset = ruleset_hash(rules)
+    catalog = get_catalog()
+    store = get_compliance_store()
+
+    entries = catalog.latest_per_device('running-config')
+    if device_name:
+        entries = [entry for entry in entries if entry['device_name'] == device_name]
+
+    results = store.load(ruleset, {entry['checksum'] for entry in entries})
+    pending = {}
+    for entry in entries:
+        if entry['checksum'] not in results:
+            pending.setdefault(entry['checksum'], catalog.path_for(entry))
+
+    if pending:
+        checksums = list(pending)
+        paths = [pending[checksum] for checksum in checksums]
+        if len(pending) >= POOL_THRESHOLD and workers != 1:
+            evaluated = _evaluate_in_pool(paths, rules, workers)
+        else:
+            evaluated = [_evaluate_file(path, rules) for path in paths]
+        fresh = dict(zip(checksums, evaluated))
+        store.save(ruleset, fresh)
+        results.update(fresh)
+
+    severities = {rule['id']: rule['severity'] for rule in rules}
+    devices = []
+    for entry in entries:
+        device_results = results[entry['checksum']]
+        failed = [result['id'] for result in device_results if not result['passed']]
+        devices.append({
+            'device': entry['device_name'],
+            'backup_id': entry['id'],
+            'file_name': entry['file_name'],
+            'date': entry['created_at'],
+            'compliant': not failed,
+            'failed': failed,
+            'highest_severity': max((severities[rule_id] for rule_id in failed), key=SEVERITIES.index, default=None),
+            'results': device_results
+        })
+
+    compliant = sum(device['compliant'] for device in devices)
+    return {
+        'ruleset': ruleset,
+        'rules': [{key: rule.get(key) for key in ('id', 'description', 'severity')} for rule in rules],
+        'devices': devices,
+        'summary': {
+            'devices': len(devices),
+            'compliant': compliant,
+            'non_compliant': len(devices) - compliant,
+            'evaluated': len(pending),
+            'reused': len(entries) - sum(1 for entry in entries if entry['checksum'] in pending),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+    }
+
+
+# Global compliance result store instance
+compliance_store = None
+
+# Global process pool shared by every compliance run in this process
+compliance_pool = None
+_compliance_pool_pid = None
+_compliance_pool_lock = threading.Lock()
+
+
+def get_compliance_store():
+    """Get global compliance result store kept next to the backup catalog"""
+    global compliance_store
+    if compliance_store is None:
+        compliance_store = ComplianceStore()
+    return compliance_store
+
+
+def get_compliance_pool(workers=None):
+    """Get global compliance process pool, created on first use and again after a fork
+
+    workers (default COMPLIANCE_WORKERS) only applies when the pool is created.
+    """
+    global compliance_pool, _compliance_pool_pid
+    with _compliance_pool_lock:
+        if compliance_pool is None or _compliance_pool_pid != os.getpid():
+            compliance_pool = ProcessPoolExecutor(max_workers=workers or COMPLIANCE_WORKERS, mp_context=_pool_context())
+            _compliance_pool_pid = os.getpid()
+        return compliance_pool
+
+
+def _discard_compliance_pool(pool):
+    """Drop a broken pool so the next run starts a new one"""
+    global compliance_pool
+    with _compliance_pool_lock:
+        if compliance_pool is pool:
+            compliance_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check stored configurations against compliance rules")
+    parser.add_argument('--rules', default=RULES_PATH, help="rule file (default: config/compliance_rules.yaml)")
+    parser.add_argument('--device', help="only this device")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--verbose', action='store_true', help="show why each rule failed")
+    args = parser.parse_args()
+
+    try:
+        report = run_compliance(load_rules(args.rules), args.device, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for device in report['devices']:
+        if device['compliant']:
+            print(f"✅ {device['device']}")
+            continue
+        print(f"❌ {device['device']} ({device['highest_severity']}): {', '.join(device['failed'])}")
+        if args.verbose:
+            for result in device['results']:
+                for detail in result['details'] if not result['passed'] else []:
+                    print(f"     {result['id']}: {detail}")
+
+    summary = report['summary']
+    print(f"\n📊 {summary['compliant']}/{summary['devices']} devices compliant "
+          f"({summary['evaluated']} evaluated, {summary['reused']} unchanged) in {summary['elapsed_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
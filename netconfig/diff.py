@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Configuration diffs between backups
+
+diff_configs() returns a unified diff plus a hierarchical one that groups
+added and removed lines under their parent block (``interface Gi0/1``,
+``router ospf 1``, ...). Results are cached by the pair of content
+checksums, in memory (LRU) and in the catalog database, so viewing the
+same pair again costs a lookup. backup_device() precomputes the diff
+against the previous backup of the device.
+
+    python netconfig/diff.py 12 15            # two catalog ids
+    python netconfig/diff.py 15               # against the previous backup
+    python netconfig/diff.py 15 --live        # against the device's running config
+"""
+import os
+import sys
+import json
+import difflib
+import hashlib
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Allow running as a script from the project root or the netconfig directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netconfig.store import SQLiteStore, CATALOG_PATH, DEVICES_CONFIG
+from netconfig.catalog import get_catalog
+from netconfig.parser import parse_cached
+
+logger = logging.getLogger(__name__)
+
+DIFF_CONTEXT = 3
+
+
+def hierarchical_diff(old_tree, new_tree):
+    """Added/removed lines grouped by parent block, in configuration order"""
+    old_entries = dict.fromkeys((node.path, node.text) for node in old_tree.walk())
+    new_entries = dict.fromkeys((node.path, node.text) for node in new_tree.walk())
+
+    sections = OrderedDict()
+    for entries, other, key in ((new_entries, old_entries, 'added'), (old_entries, new_entries, 'removed')):
+        for parents, line in entries:
+            if (parents, line) not in other:
+                section = sections.setdefault(parents, {'parents': list(parents), 'added': [], 'removed': []})
+                section[key].append(line)
+    return list(sections.values())
+
+
+def diff_configs(old_text, new_text, old_checksum=None, new_checksum=None):
+    """Unified and hierarchical diff of two configurations (without file headers)"""
+    old_tree = parse_cached(old_text, old_checksum)
+    new_tree = parse_cached(new_text, new_checksum)
+    # Drop the ---/+++ header; diff_backups() adds one with the file names
+    unified = list(difflib.unified_diff(old_tree.lines(), new_tree.lines(), n=DIFF_CONTEXT, lineterm=''))[2:]
+    sections = hierarchical_diff(old_tree, new_tree)
+    return {
+        'identical': not unified,
+        'added': sum(len(section['added']) for section in sections),
+        'removed': sum(len(section['removed']) for section in sections),
+        'unified': unified,
+        'sections': sections
+    }
+
+
+class DiffCache(SQLiteStore):
+    """Diff results keyed by (old checksum, new checksum): LRU in memory, bounded table on disk"""
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS config_diffs (
+            old_checksum TEXT NOT NULL,
+            new_checksum TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (old_checksum, new_checksum)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_config_diffs_created ON config_diffs (created_at)"
+    ]
+
+    def __init__(self, path=CATALOG_PATH, max_entries=256, max_stored=5000):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.max_stored = max_stored
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, old_checksum, new_checksum, load_old, load_new):
+        """Cached diff for a checksum pair; load_old/load_new return the texts on a miss"""
+        key = (old_checksum, new_checksum)
+        result = self.get(old_checksum, new_checksum)
+        if result is not None:
+            return result
+
+        result = diff_configs(load_old(), load_new(), old_checksum, new_checksum)
+        self._store(key, result)
+        self._remember(key, result)
+        return result
+
+    def get(self, old_checksum, new_checksum):
+        """Cached diff for a checksum pair, or None"""
+        key = (old_checksum, new_checksum)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        row = self._connection().execute(
+            "SELECT result FROM config_diffs WHERE old_checksum = ? AND new_checksum = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        self._remember(key, result)
+        return result
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store(self, key, result):
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO config_diffs (old_checksum, new_checksum, result, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (*key, json.dumps(result), datetime.now().isoformat())
+                )
+                conn.execute(
+                    """DELETE FROM config_diffs WHERE rowid IN (
+                           SELECT rowid FROM config_diffs ORDER BY created_at DESC LIMIT -1 OFFSET ?)""",
+                    (self.max_stored,)
+                )
+        except Exception as e:
+            # The result is still returned; it only misses the disk cache
+            logger.error(f"Error caching config diff: {e}")
+
+
+def _describe(entry):
+    return {key: entry[key] for key in ('id', 'device_name', 'backup_type', 'file_name', 'checksum', 'created_at')}
+
+
+def _with_header(result, old_label, new_label, old, new):
+    result = dict(result)
+    if result['unified']:
+        result['unified'] = [f"--- {old_label}", f"+++ {new_label}"] + result['unified']
+    result['old'] = old
+    result['new'] = new
+    return result
+
+
+def diff_backups(old_entry, new_entry, cache=None):
+    """Diff two catalog entries"""
+    cache = cache or get_diff_cache()
+    catalog = get_catalog()
+    result = cache.get_or_compute(
+        old_entry['checksum'], new_entry['checksum'],
+        lambda: catalog.read(old_entry), lambda: catalog.read(new_entry)
+    )
+    return _with_header(result, old_entry['file_name'], new_entry['file_name'],
+                        _describe(old_entry), _describe(new_entry))
+
+
+def diff_with_previous(entry, cache=None):
+    """Diff a catalog entry against the previous backup of the same device and type, or None"""
+    previous = get_catalog().previous(entry)
+    return diff_backups(previous, entry, cache) if previous else None
+
+
+def diff_with_running(entry, running_config, cache=None):
+    """Diff a catalog entry against a running configuration fetched from the device"""
+    cache = cache or get_diff_cache()
+    checksum = hashlib.sha256(running_config.encode('utf-8')).hexdigest()
+    result = cache.get_or_compute(
+        entry['checksum'], checksum, lambda: get_catalog().read(entry), lambda: running_config
+    )
+    live = {'device_name': entry['device_name'], 'checksum': checksum, 'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    return _with_header(result, entry['file_name'], f"{entry['device_name']} (running)", _describe(entry), live)
+
+
+def cached_diff_with_running(entry, checksum, cache=None):
+    """Diff of a catalog entry against an already fetched running configuration, or None"""
+    result = (cache or get_diff_cache()).get(entry['checksum'], checksum)
+    if result is None:
+        return None
+    live = {'device_name': entry['device_name'], 'checksum': checksum, 'created_at': None}
+    return _with_header(result, entry['file_name'], f"{entry['device_name']} (running)", _describe(entry), live)
+
+
+def fetch_running_config(device_name, config_file=DEVICES_CONFIG):
+    """Read the running configuration of a device listed in devices_config.yaml"""
+    import yaml
+    from netmiko import ConnectHandler
+
+    with open(config_file, 'r') as f:
+        devices = (yaml.safe_load(f) or {}).get('devices', [])
+    device = next((d for d in devices if d.get('name', d.get('host')) == device_name), None)
+    if device is None:
+        raise LookupError(f"Device {device_name} not found in {config_file}")
+
+    connection = ConnectHandler(
+        device_type=device['device_type'],
+        host=device['host'],
+        port=device['port'],
+        username=device.get('username', ''),
+        password=device.get('password', ''),
+        secret=device.get('secret', ''),
+        timeout=device.get('timeout', 30),
+        fast_cli=device.get('fast_cli', False),
+        global_delay_factor=device.get('global_delay_factor', 2)
+    )
+    try:
+        connection.enable()
+        return connection.send_command('show running-config')
+    finally:
+        connection.disconnect()
+
+
+# Global diff cache instance
+diff_cache = None
+
+
+def get_diff_cache():
+    """Get global diff cache stored next to the backup catalog"""
+    global diff_cache
+    if diff_cache is None:
+        diff_cache = DiffCache()
+    return diff_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare configuration backups")
+    parser.add_argument('ids', type=int, nargs='+', help="catalog id(s): OLD NEW, or one id to compare with its predecessor")
+    parser.add_argument('--live', action='store_true', help="compare the backup with the device's running config")
+    parser.add_argument('--sections', action='store_true', help="print the hierarchical diff instead of the unified one")
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    entries = [catalog.get(backup_id) for backup_id in args.ids[:2]]
+    if None in entries:
+        print("❌ Unknown backup id")
+        sys.exit(1)
+
+    if args.live:
+        result = diff_with_running(entries[-1], fetch_running_config(entries[-1]['device_name']))
+    elif len(entries) == 2:
+        result = diff_backups(*entries)
+    else:
+        result = diff_with_previous(entries[0])
+        if result is None:
+            print(f"ℹ️ {entries[0]['file_name']} is the first backup of its device")
+            return
+
+    if result['identical']:
+        print("✅ Configurations are identical")
+        return
+    if args.sections:
+        for section in result['sections']:
+            print(' > '.join(section['parents']) or '(global)')
+            for line in section['removed']:
+                print(f"  - {line}")
+            for line in section['added']:
+                print(f"  + {line}")
+    else:
+        print('\n'.join(result['unified']))
+    print(f"\n📊 {result['added']} added, {result['removed']} removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Hierarchical parser for IOS configurations
+
+parse_config() turns "show running-config" text into a tree of block
+headers and the lines indented under them (``interface``, ``line vty``,
+``router ospf`` ...). Nodes use __slots__ and their text is interned, so
+the thousands of repeated lines in a fleet (" no shutdown", " duplex
+auto") are stored once. Banners keep their body lines as children.
+
+parse_cached() keeps parsed trees in an LRU keyed by content checksum;
+diff, search and compliance all parse through it.
+
+    python netconfig/parser.py backups/R1_running_config_2025-07-29_13-26-58.txt
+    python netconfig/parser.py --benchmark 100000
+"""
+import re
+import sys
+import time
+import hashlib
+import argparse
+import threading
+import tracemalloc
+from collections import OrderedDict
+
+# Lines the device regenerates on every "show" that are not configuration
+IGNORED_PREFIXES = ('Building configuration', 'Current configuration', 'Using ', '!Time:')
+
+BANNER_PATTERN = re.compile(r'^banner\s+\S+\s+(\^C|\S)(.*)$')
+
+NO_CHILDREN = ()
+
+
+class ConfigNode:
+    """One configuration line and the lines indented under it"""
+
+    __slots__ = ('text', 'indent', 'line_no', 'parent', 'children')
+
+    def __init__(self, text, indent, line_no, parent):
+        self.text = text
+        self.indent = indent
+        self.line_no = line_no
+        self.parent = parent
+        self.children = NO_CHILDREN
+
+    def add(self, node):
+        if self.children is NO_CHILDREN:
+            self.children = []
+        self.children.append(node)
+
+    @property
+    def line(self):
+        """The line as it appears in the configuration"""
+        return ' ' * self.indent + self.text
+
+    @property
+    def path(self):
+        """Texts of the enclosing block headers, outermost first"""
+        path = []
+        node = self.parent
+        while node is not None and node.parent is not None:
+            path.append(node.text)
+            node = node.parent
+        return tuple(reversed(path))
+
+    def walk(self):
+        """Every node below this one in configuration order"""
+        stack = [iter(self.children)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            yield node
+            if node.children:
+                stack.append(iter(node.children))
+
+    def find(self, pattern):
+        """Direct children whose text matches a regular expression"""
+        search = re.compile(pattern).search
+        return [child for child in self.children if search(child.text)]
+
+    def find_all(self, pattern):
+        """Nodes at any depth whose text matches a regular expression"""
+        search = re.compile(pattern).search
+        return [node for node in self.walk() if search(node.text)]
+
+    def __repr__(self):
+        return f"<ConfigNode {self.line_no}: {self.text!r} ({len(self.children)} children)>"
+
+
+class ConfigTree(ConfigNode):
+    """Root of a parsed configuration"""
+
+    __slots__ = ('checksum', 'size')
+
+    def __init__(self, checksum=None):
+        super().__init__('', -1, 0, None)
+        self.checksum = checksum
+        self.size = 0
+
+    def lines(self):
+        """Configuration lines without comments and show-command headers"""
+        return [node.line for node in self.walk()]
+
+    def __repr__(self):
+        return f"<ConfigTree {self.size} lines, {len(self.children)} top-level>"
+
+
+def parse_config(text, checksum=None):
+    """Parse configuration text into a ConfigTree"""
+    root = ConfigTree(checksum)
+    stack = [root]
+    intern = sys.intern
+    lines = text.splitlines()
+    count = len(lines)
+    i = 0
+    while i < count:
+        line = lines[i].rstrip()
+        i += 1
+        stripped = line.lstrip()
+        if not stripped or stripped[0] == '!' or line.startswith(IGNORED_PREFIXES):
+            continue
+
+        indent = len(line) - len(stripped)
+        while stack[-1].indent >= indent:
+            stack.pop()
+        node = ConfigNode(intern(stripped), indent, i, stack[-1])
+        stack[-1].add(node)
+        root.size += 1
+
+        banner = BANNER_PATTERN.match(stripped) if stripped.startswith('banner') else None
+        if banner and banner.group(1) not in banner.group(2):
+            # The banner body runs until the closing delimiter, whatever its indentation
+            delimiter = banner.group(1)
+            while i < count:
+                body = lines[i].rstrip()
+                i += 1
+                node.add(ConfigNode(body, 0, i, node))
+                root.size += 1
+                if delimiter in body:
+                    break
+            continue
+        stack.append(node)
+    return root
+
+
+def content_checksum(text):
+    """sha256 of a configuration text, as stored in the backup catalog"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ParseCache:
+    """Parsed trees keyed by content checksum, evicted LRU beyond `max_lines` lines in total"""
+
+    def __init__(self, max_lines=500000):
+        self.max_lines = max_lines
+        self._trees = OrderedDict()
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    def get(self, text, checksum=None):
+        checksum = checksum or content_checksum(text)
+        with self._lock:
+            tree = self._trees.get(checksum)
+            if tree is not None:
+                self._trees.move_to_end(checksum)
+                return tree
+
+        tree = parse_config(text, checksum)
+        with self._lock:
+            if checksum not in self._trees:
+                self._trees[checksum] = tree
+                self._lines += tree.size
+            while self._lines > self.max_lines and len(self._trees) > 1:
+                _, evicted = self._trees.popitem(last=False)
+                self._lines -= evicted.size
+        return tree
+
+    def clear(self):
+        with self._lock:
+            self._trees.clear()
+            self._lines = 0
+
+
+# Global parse cache instance
+parse_cache = None
+
+
+def get_parse_cache():
+    """Get global parse cache"""
+    global parse_cache
+    if parse_cache is None:
+        parse_cache = ParseCache()
+    return parse_cache
+
+
+def parse_cached(text, checksum=None):
+    """parse_config() through the global cache; pass the checksum when it is already known"""
+    return get_parse_cache().get(text, checksum)
+
+
+def synthetic_config(line_count):
+    """An IOS-like configuration of about `line_count` lines for benchmarking"""
+    lines = ['Building configuration...', '', 'version 15.2', 'hostname BENCH', '!']
+    index = 0
+    while len(lines) < line_count:
+        lines += [
+            f"interface GigabitEthernet{index // 48}/{index % 48}",
+            f" description access port {index}",
+            " switchport mode access",
+            f" switchport access vlan {index % 4000 + 1}",
+            " spanning-tree portfast",
+            " no shutdown",
+            "!"
+        ]
+        if index % 100 == 0:
+            lines += [f"router ospf {index}", f" network 10.{index % 256}.0.0 0.0.255.255 area 0",
+                      "  ! nested comment", " passive-interface default", "!"]
+        index += 1
+    return '\n'.join(lines + ['line vty 0 4', ' transport input ssh', 'end'])
+
+
+def benchmark(line_count, rounds=3):
+    text = synthetic_config(line_count)
+    print(f"📄 Synthetic config: {len(text.splitlines()):,} lines, {len(text) / 1024 / 1024:.1f} MB")
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        tree = parse_config(text)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"⏱️  Parse: {best * 1000:.0f} ms best of {rounds} ({tree.size / best:,.0f} lines/s)")
+
+    tracemalloc.start()
+    tree = parse_config(text)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"💾 Tree: {retained / 1024 / 1024:.1f} MB retained, {peak / 1024 / 1024:.1f} MB peak "
+          f"({retained / tree.size:.0f} bytes/line)")
+
+    cache = ParseCache()
+    checksum = content_checksum(text)
+    cache.get(text, checksum)
+    started = time.perf_counter()
+    cache.get(text, checksum)
+    print(f"⚡ Cached lookup: {(time.perf_counter() - started) * 1e6:.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse an IOS configuration into blocks")
+    parser.add_argument('file', nargs='?', help="configuration file to parse")
+    parser.add_argument('--benchmark', type=int, metavar='LINES', help="time parsing a synthetic config of LINES lines")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if not args.file:
+        parser.error("a configuration file or --benchmark is required")
+
+    with open(args.file, 'r', encoding='utf-8', errors='replace') as f:
+        tree = parse_config(f.read())
+    for node in tree.children:
+        suffix = f"  ({len(node.children)} lines)" if node.children else ''
+        print(f"{node.line_no:>6}: {node.text}{suffix}")
+    print(f"\n🌳 {tree.size} lines, {len(tree.children)} top-level entries, "
+          f"{sum(1 for node in tree.children if node.children)} blocks")
+
+
+if __name__ == "__main__":
+    main()
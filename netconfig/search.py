@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Full-text search across stored device configurations
+
+Every distinct configuration (by checksum) is split into lines and indexed
+once in an FTS5 table next to the backup catalog, so identical backups
+share their rows. backup_device() indexes new files as it writes them;
+start() runs sync() on a background thread to pick up catalogued files that
+were not indexed that way (imports, other tools). Searches never index.
+
+Queries are either phrases ("ip ssh version 2") or regular expressions.
+Regular expressions are narrowed with the literal words they require
+before the expression itself runs on the candidate lines.
+
+    python netconfig/search.py "transport input telnet"
+    python netconfig/search.py "^ip route 10\\." --regex --history
+"""
+import os
+import re
+import sys
+import time
+import logging
+import threading
+import argparse
+from datetime import datetime
+
+# Allow running as a script from the project root or the netconfig directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netconfig.store import SQLiteStore
+from netconfig.catalog import get_catalog
+from netconfig.parser import parse_cached
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ('phrase', 'regex')
+
+MAX_HITS = 1000
+
+# unicode61 tokens: letters and digits; '_' and punctuation separate tokens
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def required_terms(pattern):
+    """FTS5 terms that every line matching `pattern` contains, or [] if none can be derived
+
+    Only literal text outside groups, classes and optional parts counts.
+    A word cut off by the end of a literal run becomes a prefix term; a word
+    cut off at its start is skipped because it may be the tail of a longer one.
+    """
+    if '|' in pattern:
+        return []
+
+    runs = []
+    current, anchored = '', False
+
+    def end_run():
+        nonlocal current, anchored
+        if current:
+            runs.append((current, anchored))
+        current, anchored = '', False
+
+    i, depth = 0, 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if escaped and not escaped.isalnum():
+                if depth == 0:
+                    current += escaped
+                continue
+            end_run()
+        elif ch == '[':
+            end_run()
+            i = pattern.find(']', i + 2)
+            if i < 0:
+                return []
+            i += 1
+        elif ch in '()':
+            end_run()
+            depth += 1 if ch == '(' else -1
+            i += 1
+        elif ch in '?*{':
+            # The character before the quantifier may be absent
+            current = current[:-1]
+            end_run()
+            i = pattern.find('}', i) + 1 if ch == '{' else i + 1
+            if i == 0:
+                return []
+        elif ch == '+':
+            end_run()
+            i += 1
+        elif ch == '^' and i == 0:
+            anchored = True
+            i += 1
+        elif ch in '.^$':
+            end_run()
+            i += 1
+        else:
+            if depth == 0:
+                current += ch
+            i += 1
+    end_run()
+
+    terms = []
+    for run, run_anchored in runs:
+        for match in TOKEN_PATTERN.finditer(run):
+            if match.start() == 0 and not run_anchored:
+                continue
+            token = match.group().replace('"', '""')
+            terms.append(f'"{token}"' if match.end() < len(run) else f'"{token}"*')
+    return terms
+
+
+def phrase_query(text):
+    """FTS5 phrase for `text`, its last word matched as a prefix"""
+    tokens = TOKEN_PATTERN.findall(text)
+    return f'"{" ".join(tokens)}"*' if tokens else None
+
+
+class ConfigSearchIndex(SQLiteStore):
+    """Line-level FTS5 index over every distinct configuration in the backup catalog"""
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS config_search_docs (
+            id INTEGER PRIMARY KEY,
+            checksum TEXT NOT NULL UNIQUE,
+            line_count INTEGER NOT NULL,
+            indexed_at TEXT NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS config_search_lines (
+            id INTEGER PRIMARY KEY,
+            doc_id INTEGER NOT NULL,
+            line_no INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            line TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_config_search_lines_doc ON config_search_lines (doc_id, line_no)",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS config_search_fts USING fts5(
+            line, content='config_search_lines', content_rowid='id'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS config_search_lines_ai AFTER INSERT ON config_search_lines BEGIN
+            INSERT INTO config_search_fts (rowid, line) VALUES (new.id, new.line);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS config_search_lines_ad AFTER DELETE ON config_search_lines BEGIN
+            INSERT INTO config_search_fts (config_search_fts, rowid, line) VALUES ('delete', old.id, old.line);
+        END"""
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def index_entry(self, entry, content=None):
+        """Index the configuration of a catalog entry unless its checksum is indexed; return True if added"""
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM config_search_docs WHERE checksum = ?", (entry['checksum'],)).fetchone():
+            return False
+
+        content = content if content is not None else get_catalog().read(entry)
+        tree = parse_cached(content, entry['checksum'])
+        lines = [(node.line_no, ' > '.join(node.path), node.text) for node in tree.walk()]
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO config_search_docs (checksum, line_count, indexed_at) VALUES (?, ?, ?)",
+                (entry['checksum'], len(lines), datetime.now().isoformat())
+            )
+            # Another worker indexed the same content first
+            if cursor.rowcount == 0:
+                return False
+            conn.executemany(
+                "INSERT INTO config_search_lines (doc_id, line_no, section, line) VALUES (?, ?, ?, ?)",
+                ((cursor.lastrowid, *line) for line in lines)
+            )
+        return True
+
+    def sync(self):
+        """Index catalogued configurations that are not in the index yet; return how many were added"""
+        catalog = get_catalog()
+        entries = self._connection().execute(
+            f"""SELECT {', '.join('b.' + column for column in catalog.COLUMNS)} FROM backup_catalog b
+                LEFT JOIN config_search_docs d ON d.checksum = b.checksum
+                WHERE d.checksum IS NULL GROUP BY b.checksum"""
+        ).fetchall()
+        added = 0
+        for row in entries:
+            entry = dict(zip(catalog.COLUMNS, row))
+            try:
+                added += self.index_entry(entry)
+            except OSError as e:
+                logger.warning(f"Cannot index {entry['file_name']}: {e}")
+        if added:
+            logger.info(f"Indexed {added} configurations for search")
+        return added
+
+    def start(self, interval_seconds=60):
+        """Sync now and then periodically on a daemon thread; a no-op if already running"""
+        def run_sync():
+            while True:
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"Configuration search sync failed: {e}")
+                if self._stop.wait(interval_seconds):
+                    return
+
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+            self._stop.clear()
+            self._thread = threading.Thread(target=run_sync, name='config-search-sync', daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def stop(self):
+        """Stop the periodic sync thread"""
+        self._stop.set()
+
+    def search(self, query, mode='phrase', device_name=None, backup_type='running-config',
+               history=False, limit=200):
+        """Matching lines, grouped by device: {'hits': [...], 'devices': [...], 'truncated': bool, ...}
+
+        Only the newest backup of each device is searched unless `history` is set.
+        Raises ValueError for an unknown mode or an invalid regular expression.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        limit = max(1, min(int(limit), MAX_HITS))
+        started = time.perf_counter()
+
+        if mode == 'regex':
+            try:
+                matcher = re.compile(query).search
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression: {e}") from e
+            terms = required_terms(query)
+            fts_query = ' AND '.join(terms) or None
+        else:
+            needle = query.strip().lower()
+            matcher = lambda line: needle in line.lower()
+            fts_query = phrase_query(query)
+            if fts_query is None:
+                raise ValueError("Search text must contain letters or digits")
+
+        conditions, params = [], []
+        if fts_query:
+            source = """config_search_fts f JOIN config_search_lines l ON l.id = f.rowid"""
+            conditions.append("config_search_fts MATCH ?")
+            params.append(fts_query)
+        else:
+            # Nothing to narrow the expression with: scan every line in scope
+            source = "config_search_lines l"
+        for condition, value in (('b.device_name = ?', device_name), ('b.backup_type = ?', backup_type)):
+            if value:
+                conditions.append(condition)
+                params.append(value)
+        if not history:
+            conditions.append("""b.id = (
+                SELECT id FROM backup_catalog
+                WHERE device_name = b.device_name AND backup_type = b.backup_type
+                ORDER BY created_at DESC, id DESC LIMIT 1)""")
+
+        rows = self._connection().execute(
+            f"""SELECT b.id, b.device_name, b.backup_type, b.file_name, b.created_at, l.line_no, l.section, l.line
+                FROM {source} JOIN config_search_docs d ON d.id = l.doc_id
+                JOIN backup_catalog b ON b.checksum = d.checksum
+                WHERE {' AND '.join(conditions) or '1'}""",
+            params
+        )
+        hits = []
+        truncated = False
+        for backup_id, device, hit_type, file_name, created_at, line_no, section, line in rows:
+            if not matcher(line):
+                continue
+            if len(hits) == limit:
+                truncated = True
+                break
+            hits.append({
+                'backup_id': backup_id,
+                'device': device,
+                'type': hit_type,
+                'file_name': file_name,
+                'date': created_at,
+                'line_no': line_no,
+                'section': section,
+                'line': line
+            })
+        # Sorted here rather than in SQL so the scan can stop at `limit`
+        hits.sort(key=lambda hit: (hit['date'], hit['backup_id'], -hit['line_no']), reverse=True)
+        hits.sort(key=lambda hit: hit['device'])
+        return {
+            'hits': hits,
+            'devices': sorted({hit['device'] for hit in hits}),
+            'truncated': truncated,
+            'prefiltered': fts_query is not None,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+
+
+# Global configuration search index instance
+search_index = None
+
+
+def get_search_index():
+    """Get global configuration search index stored next to the backup catalog"""
+    global search_index
+    if search_index is None:
+        # The catalog creates the backup_catalog table the searches join against
+        get_catalog()
+        search_index = ConfigSearchIndex()
+    return search_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search stored device configurations")
+    parser.add_argument('query', help="phrase to find, or a regular expression with --regex")
+    parser.add_argument('--regex', action='store_true', help="treat the query as a regular expression")
+    parser.add_argument('--device', help="only this device")
+    parser.add_argument('--type', default='running-config', help="backup type (default: running-config)")
+    parser.add_argument('--history', action='store_true', help="search every backup, not just the newest")
+    parser.add_argument('--limit', type=int, default=200)
+    args = parser.parse_args()
+
+    index = get_search_index()
+    index.sync()
+    try:
+        result = index.search(args.query, 'regex' if args.regex else 'phrase', args.device,
+                              args.type, args.history, args.limit)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for hit in result['hits']:
+        section = f"[{hit['section']}] " if hit['section'] else ''
+        print(f"{hit['device']:<16} {hit['date']}  {hit['line_no']:>5}: {section}{hit['line']}")
+    more = ' (truncated)' if result['truncated'] else ''
+    print(f"\n🔍 {len(result['hits'])} lines on {len(result['devices'])} devices{more} in {result['elapsed_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+SQLite plumbing shared by the netconfig stores
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKUP_DIR = os.getenv('BACKUP_DIR', os.path.join(PROJECT_ROOT, 'backups'))
+CATALOG_PATH = os.getenv('BACKUP_CATALOG_PATH', os.path.join(BACKUP_DIR, 'catalog.db'))
+DEVICES_CONFIG = os.path.join(PROJECT_ROOT, 'config', 'devices_config.yaml')
+
+
+class SQLiteStore:
+    """Per-thread WAL connections to one SQLite file, with SCHEMA created on first use"""
+
+    SCHEMA = []
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
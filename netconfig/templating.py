@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Configuration templates with per-device variables
+
+Templates use Jinja2 syntax; the existing ``{{ntp_server1}}`` style
+templates work unchanged. Each distinct template source is compiled once
+and kept in an LRU keyed by its checksum. render_batch() renders one
+template for many devices: it first checks that every variable the
+template uses is defined for every device and raises
+TemplateVariableError listing the gaps before anything is rendered, so
+a push never stops halfway through the fleet on a typo.
+
+Variables come from, in increasing priority: the template's defaults
+(the ``variables`` column of config_templates), values common to the
+batch, and the device's inventory entry in devices_config.yaml
+(``name``, ``management_ip``, ``real_hostname``, ...). Inventory values
+that are null count as undefined.
+
+    python netconfig/templating.py config/templates/ntp.txt --var ntp_server=10.0.0.1
+"""
+import os
+import sys
+import hashlib
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+
+from jinja2 import Environment, StrictUndefined, TemplateSyntaxError, UndefinedError, meta
+
+# Allow running as a script from the project root or the netconfig directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netconfig.store import DEVICES_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Connection secrets never become template variables
+PRIVATE_FIELDS = ('password', 'secret', 'username')
+
+
+class TemplateVariableError(ValueError):
+    """Variables a template needs that are not defined, per device"""
+
+    def __init__(self, missing):
+        self.missing = missing
+        summary = '; '.join(f"{device}: {', '.join(names)}" for device, names in list(missing.items())[:5])
+        more = f" (and {len(missing) - 5} more devices)" if len(missing) > 5 else ''
+        super().__init__(f"Undefined template variables - {summary}{more}")
+
+
+class CompiledTemplate:
+    """A compiled template and the variables it reads"""
+
+    __slots__ = ('checksum', 'template', 'variables')
+
+    def __init__(self, checksum, template, variables):
+        self.checksum = checksum
+        self.template = template
+        self.variables = variables
+
+    def render(self, context):
+        return self.template.render(context)
+
+
+def inventory_variables(device):
+    """Template variables of an inventory entry: every non-null field except credentials"""
+    return {key: value for key, value in device.items() if value is not None and key not in PRIVATE_FIELDS}
+
+
+def load_inventory(config_file=DEVICES_CONFIG):
+    """Devices from devices_config.yaml"""
+    import yaml
+
+    with open(config_file, 'r') as f:
+        return (yaml.safe_load(f) or {}).get('devices', [])
+
+
+class TemplateEngine:
+    """Compiles templates once and renders them for batches of devices"""
+
+    def __init__(self, max_templates=256):
+        self.environment = Environment(
+            undefined=StrictUndefined,
+            autoescape=False,
+            keep_trailing_newline=True,
+            # Compiled templates are cached below, by content
+            cache_size=0
+        )
+        self.max_templates = max_templates
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, source):
+        """Compiled template for a source text; raises ValueError on syntax errors"""
+        checksum = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        with self._lock:
+            compiled = self._compiled.get(checksum)
+            if compiled is not None:
+                self._compiled.move_to_end(checksum)
+                return compiled
+
+        try:
+            ast = self.environment.parse(source)
+            template = self.environment.from_string(ast)
+        except TemplateSyntaxError as e:
+            raise ValueError(f"Template syntax error on line {e.lineno}: {e.message}") from e
+        # Globals such as range() are always defined
+        variables = frozenset(meta.find_undeclared_variables(ast) - self.environment.globals.keys())
+        compiled = CompiledTemplate(checksum, template, variables)
+
+        with self._lock:
+            self._compiled[checksum] = compiled
+            while len(self._compiled) > self.max_templates:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def contexts(self, compiled, devices, defaults=None, common=None):
+        """{device name: variables} for a batch; raises TemplateVariableError if any are missing"""
+        base = {**(defaults or {}), **(common or {})}
+        contexts = OrderedDict()
+        missing = OrderedDict()
+        for device in devices:
+            name = device.get('name', device.get('host'))
+            context = {**base, **inventory_variables(device)}
+            absent = sorted(compiled.variables - context.keys())
+            if absent:
+                missing[name] = absent
+            contexts[name] = context
+        if missing:
+            raise TemplateVariableError(missing)
+        return contexts
+
+    def render_batch(self, source, devices, defaults=None, common=None):
+        """Render a template for every device: {device name: configuration text}
+
+        Raises ValueError for syntax errors and TemplateVariableError for
+        undefined variables. Top-level variables are checked for every
+        device before anything is rendered.
+        """
+        compiled = self.compile(source)
+        contexts = self.contexts(compiled, devices, defaults, common)
+        rendered = OrderedDict()
+        failed = OrderedDict()
+        for name, context in contexts.items():
+            try:
+                rendered[name] = compiled.render(context)
+            except UndefinedError as e:
+                failed[name] = [e.message]
+        if failed:
+            raise TemplateVariableError(failed)
+        return rendered
+
+    def render(self, source, variables):
+        """Render a template once with the given variables"""
+        return self.render_batch(source, [{'name': 'preview'}], common=variables)['preview']
+
+
+# Global template engine instance
+template_engine = None
+
+
+def get_template_engine():
+    """Get global template engine"""
+    global template_engine
+    if template_engine is None:
+        template_engine = TemplateEngine()
+    return template_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a configuration template for the inventory")
+    parser.add_argument('template', help="template file")
+    parser.add_argument('--var', action='append', default=[], metavar='NAME=VALUE',
+                        help="variable common to all devices (repeatable)")
+    parser.add_argument('--device', action='append', help="only these devices (repeatable)")
+    parser.add_argument('--inventory', default=DEVICES_CONFIG, help="devices_config.yaml to read devices from")
+    args = parser.parse_args()
+
+    with open(args.template, 'r') as f:
+        source = f.read()
+    common = dict(item.split('=', 1) for item in args.var)
+    devices = [device for device in load_inventory(args.inventory)
+               if not args.device or device.get('name') in args.device]
+
+    try:
+        rendered = get_template_engine().render_batch(source, devices, common=common)
+    except TemplateVariableError as e:
+        print("❌ Undefined variables:")
+        for device, names in e.missing.items():
+            print(f"   {device}: {', '.join(names)}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for device, text in rendered.items():
+        print(f"===== {device} =====")
+        print(text)
+    print(f"\n✅ Rendered for {len(rendered)} devices")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,16 @@ import time
 from netmiko import ConnectHandler
 from datetime import datetime
 import yaml
+import sys
 import logging
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('../logs/backup_restore.log'),
-        logging.StreamHandler()
-    ]
-)
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logtools import configure_logging, device_logger, timed_command
+from netconfig import get_catalog, diff_with_previous, get_search_index, parse_config
+
+# Set up logging (queued writes, JSON lines in logs/backup_restore.log)
+configure_logging('backup_restore.log')
 
 # Function to load device configurations from the YAML file
 def load_device_config(config_file='config/devices_config.yaml'):
@@ -26,6 +25,7 @@ def load_device_config(config_file='config/devices_config.yaml'):
 
 # Function to backup a device's configuration
 def backup_device(device):
+    log = device_logger(device.get('name', device['host']))
     try:
         # Clean device config for netmiko - remove metadata fields
         clean_config = {
@@ -43,46 +43,52 @@ def backup_device(device):
         # Establish console telnet connection to the device
         connection = ConnectHandler(**clean_config)
         connection.enable()  # Enter enable mode
-        logging.info(f"Connected to {device.get('name', device['host'])} via console")
+        log.info(f"Connected to {device.get('name', device['host'])} via console")
 
         # Get the current device configuration
-        config = connection.send_command('show running-config')
-        startup_config = connection.send_command('show startup-config')
-
-        # Create backup directory if it doesn't exist
-        backup_dir = "backups"
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
+        with timed_command(log, 'show running-config'):
+            config = connection.send_command('show running-config')
+        with timed_command(log, 'show startup-config'):
+            startup_config = connection.send_command('show startup-config')
 
-        # Save the configuration to a file
-        timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        device_name = device.get('name', device['host']).replace(' ', '_')
-        
-        # Save running config
-        running_backup_filename = f"{backup_dir}/{device_name}_running_config_{timestamp}.txt"
-        with open(running_backup_filename, 'w') as backup_file:
-            backup_file.write(config)
-        
-        # Save startup config
-        startup_backup_filename = f"{backup_dir}/{device_name}_startup_config_{timestamp}.txt"
-        with open(startup_backup_filename, 'w') as backup_file:
-            backup_file.write(startup_config)
+        # Write both configs atomically and record them in the backup catalog
+        catalog = get_catalog()
+        timestamp = datetime.now()
+        device_name = device.get('name', device['host'])
+        running_backup = catalog.record_backup(device_name, 'running-config', config, timestamp)
+        startup_backup = catalog.record_backup(device_name, 'startup-config', startup_config, timestamp)
         
-        logging.info(f"Backup of {device.get('name', device['host'])} saved to {running_backup_filename}")
+        log.info(f"Backup of {device_name} saved to {running_backup['file_name']}")
+
+        # Precompute the diff against the previous backup so the web view is instant
+        try:
+            changes = diff_with_previous(running_backup)
+            if changes and not changes['identical']:
+                log.info(f"Running config of {device_name} changed: {changes['added']} lines added, {changes['removed']} removed")
+        except Exception as e:
+            log.warning(f"Could not diff {device_name} against its previous backup: {e}")
+
+        # Make the new configs searchable right away
+        try:
+            search_index = get_search_index()
+            search_index.index_entry(running_backup, config)
+            search_index.index_entry(startup_backup, startup_config)
+        except Exception as e:
+            log.warning(f"Could not index {device_name} configs for search: {e}")
 
         # Close the SSH connection
         connection.disconnect()
         return True
     except Exception as e:
-        logging.error(f"Failed to backup {device.get('name', device['host'])}: {e}")
+        log.error(f"Failed to backup {device.get('name', device['host'])}: {e}")
         return False
 
 # Function to restore configuration to a device
 def restore_device(device, config_file):
     try:
-        # Read the configuration file
+        # Read the configuration file; the parser drops comments and "show" headers
         with open(config_file, 'r') as file:
-            config_lines = file.readlines()
+            config_lines = parse_config(file.read()).lines()
         
         # Establish SSH connection to the device
         connection = ConnectHandler(**device)
@@ -94,10 +100,8 @@ def restore_device(device, config_file):
         
         # Apply configuration line by line
         for line in config_lines:
-            line = line.strip()
-            if line and not line.startswith('!'):  # Skip empty lines and comments
-                connection.send_command(line)
-                time.sleep(0.1)  # Small delay between commands
+            connection.send_command(line.strip())
+            time.sleep(0.1)  # Small delay between commands
 
         # Save configuration
         connection.send_command('end')
@@ -129,14 +133,10 @@ def backup_all_devices():
     logging.info(f"Backup completed: {successful_backups}/{total_devices} devices successful")
 
 # Function to list available backup files
-def list_backup_files():
-    backup_dir = "../backups"
-    if not os.path.exists(backup_dir):
-        logging.warning("No backup directory found")
-        return []
-    
-    backup_files = [f for f in os.listdir(backup_dir) if f.endswith('.txt')]
-    return backup_files
+def list_backup_files(device_name=None, limit=100):
+    """Newest catalogued backup file names, optionally for one device"""
+    page = get_catalog().list_backups(limit=limit, device_name=device_name)
+    return [entry['file_name'] for entry in page['items']]
 
 if __name__ == "__main__":
     backup_all_devices()
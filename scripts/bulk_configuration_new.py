@@ -8,18 +8,16 @@ Uses hybrid SSH-console setup with real device data.
 import os
 import time
 import yaml
+import sys
 import logging
 from netmiko import ConnectHandler
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(__file__), '../logs/bulk_configuration.log')),
-        logging.StreamHandler()
-    ]
-)
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logtools import configure_logging, device_logger, timed_command
+
+# Set up logging (queued writes, JSON lines in logs/bulk_configuration.log)
+configure_logging('bulk_configuration.log')
 
 def load_device_config():
     """Load device configurations from YAML file"""
@@ -54,6 +52,7 @@ def load_configuration_commands():
 
 def apply_bulk_configuration(device, config_commands):
     """Apply configuration to a single device"""
+    log = device_logger(device.get('name', device['host']))
     try:
         # Clean device config for netmiko - remove metadata fields
         clean_config = {
@@ -68,34 +67,36 @@ def apply_bulk_configuration(device, config_commands):
             'global_delay_factor': device.get('global_delay_factor', 2)
         }
         
-        logging.info(f"Connecting to {device['name']} ({device['host']}:{device['port']}) via console")
+        log.info(f"Connecting to {device['name']} ({device['host']}:{device['port']}) via console")
         
         # Establish console telnet connection to the device
         connection = ConnectHandler(**clean_config)
         connection.enable()
-        logging.info(f"Connected to {device['name']} - {device.get('real_hostname', 'Unknown')} via console")
+        log.info(f"Connected to {device['name']} - {device.get('real_hostname', 'Unknown')} via console")
 
         # Apply configuration commands using send_config_set (handles prompts automatically)
-        logging.info(f"Applying {len(config_commands)} commands to {device['name']}")
+        log.info(f"Applying {len(config_commands)} commands to {device['name']}")
         
         # Filter out comments and empty lines
         clean_commands = [cmd.strip() for cmd in config_commands 
                          if cmd.strip() and not cmd.strip().startswith('#')]
         
         # Apply all commands at once
-        result = connection.send_config_set(clean_commands)
-        logging.info(f"Configuration output for {device['name']}: {result[:200]}...")
+        with timed_command(log, f"send_config_set ({len(clean_commands)} commands)"):
+            result = connection.send_config_set(clean_commands)
+        log.info(f"Configuration output for {device['name']}: {result[:200]}...")
         
         # Save configuration
-        save_result = connection.send_command('write memory')
-        logging.info(f"Save result for {device['name']}: {save_result}")
+        with timed_command(log, 'write memory'):
+            save_result = connection.send_command('write memory')
+        log.info(f"Save result for {device['name']}: {save_result}")
 
-        logging.info(f"Configuration applied to {device['name']} ({device.get('real_hostname')}) successfully.")
+        log.info(f"Configuration applied to {device['name']} ({device.get('real_hostname')}) successfully.")
         connection.disconnect()
         return True
         
     except Exception as e:
-        logging.error(f"Failed to apply configuration to {device['name']}: {e}")
+        log.error(f"Failed to apply configuration to {device['name']}: {e}")
         return False
 
 def main():
@@ -1,19 +1,18 @@
 import time
 from netmiko import ConnectHandler
 import yaml
+import os
+import sys
 import logging
 import getpass
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('../logs/password_rotation.log'),
-        logging.StreamHandler()
-    ]
-)
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logtools import configure_logging
+
+# Set up logging (queued writes, JSON lines in logs/password_rotation.log)
+configure_logging('password_rotation.log')
 
 # Load device configurations from YAML file
 def load_device_config(config_file='../config/devices_config.yaml'):
@@ -14,17 +14,11 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
 from database.connection import DatabaseManager, initialize_database
+from logtools import configure_logging
 
 def setup_logging():
     """Setup logging configuration"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('logs/database_setup.log', encoding='utf-8')
-        ]
-    )
+    configure_logging('database_setup.log')
 
 def load_environment():
     """Load environment variables"""
@@ -13,15 +13,10 @@ from netmiko import ConnectHandler
 from datetime import datetime
 import time
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/ssh_setup.log'),
-        logging.StreamHandler()
-    ]
-)
+from logtools import configure_logging
+
+# Set up logging (queued writes, JSON lines in logs/ssh_setup.log)
+configure_logging('ssh_setup.log')
 
 def load_console_config():
     """Load console configuration for initial connection"""
@@ -0,0 +1,41 @@
+import pytest
+
+
+
+
+@pytest.fixture
+def sqlite_config(monkeypatch):
+    """DatabaseConfig for a private in-memory SQLite database
+
+    One pooled connection, so every cursor sees the same database.
+    """
+    monkeypatch.setenv('DB_BACKEND', 'sqlite')
+    monkeypatch.setenv('DB_SQLITE_PATH', ':memory:')
+    monkeypatch.setenv('DB_POOL_SIZE', '1')
+    monkeypatch.setenv('DB_REPLICA_HOSTS', '')
+    monkeypatch.setenv('DB_REPLICA_SQLITE_PATHS', '')
+    from database.connection import DatabaseConfig
+    return DatabaseConfig()
+
+
+@pytest.fixture
+def db_connection(sqlite_config):
+    """DatabaseConnection with every migration applied"""
+    from database.connection import DatabaseConnection
+    from database.migration_manager import MigrationManager
+
+    connection = DatabaseConnection(sqlite_config)
+    assert MigrationManager(connection).run_migrations()
+    return connection
+
+
+@pytest.fixture
+def db_manager(sqlite_config):
+    """DatabaseManager on a private in-memory SQLite database with every migration applied"""
+    from database.connection import DatabaseManager
+
+    manager = DatabaseManager()
+    assert manager.initialize()
+    yield manager
+    if manager.log_writer is not None:
+        manager.log_writer.close()
@@ -0,0 +1,16 @@
+"""pytest plugin: collect the project root as a plain directory
+
+The root __init__.py imports the device scripts, which configure logging
+at import time, so it must not be imported as a test package.
+"""
+import os
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collect_directory(path, parent):
+    if str(path) == PROJECT_ROOT:
+        return pytest.Dir.from_parent(parent, path=path)
@@ -0,0 +1,76 @@
+"""Backup catalog writes and listings (netconfig.catalog.BackupCatalog)"""
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from netconfig.catalog import BackupCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return BackupCatalog(str(tmp_path / 'catalog.db'), str(tmp_path / 'backups'))
+
+
+def test_record_backup_writes_file_and_row(catalog):
+    entry = catalog.record_backup('R1', 'running-config', 'hostname R1\n', datetime(2025, 1, 1, 10, 0, 0))
+    assert entry['device_name'] == 'R1'
+    assert entry['file_name'] == 'R1_running_config_2025-01-01_10-00-00.txt'
+    with open(catalog.path_for(entry)) as f:
+        assert f.read() == 'hostname R1\n'
+
+
+def test_same_file_name_returns_its_own_entry(catalog):
+    stamp = datetime(2025, 1, 1, 10, 0, 0)
+    catalog.record_backup('R1', 'running-config', 'first', stamp)
+    catalog.record_backup('R2', 'running-config', 'other device', stamp)
+    entry = catalog.record_backup('R1', 'running-config', 'second', stamp)
+    assert entry['device_name'] == 'R1'
+    assert entry['file_name'] == 'R1_running_config_2025-01-01_10-00-00-1.txt'
+    with open(catalog.path_for(entry)) as f:
+        assert f.read() == 'second'
+
+
+def test_existing_file_is_never_overwritten(catalog):
+    stamp = datetime(2025, 1, 1, 10, 0, 0)
+    first = catalog.record_backup('R1', 'running-config', 'first', stamp)
+    catalog.record_backup('R1', 'running-config', 'second', stamp)
+    with open(catalog.path_for(first)) as f:
+        assert f.read() == 'first'
+
+
+def test_failed_insert_removes_only_the_new_file(catalog, monkeypatch):
+    stamp = datetime(2025, 1, 1, 10, 0, 0)
+    first = catalog.record_backup('R1', 'running-config', 'first', stamp)
+    catalog._connection().execute(
+        "CREATE TRIGGER reject BEFORE INSERT ON backup_catalog BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    )
+    with pytest.raises(sqlite3.IntegrityError):
+        catalog.record_backup('R1', 'running-config', 'second', stamp)
+    assert sorted(os.listdir(catalog.backup_dir)) == [first['file_name']]
+
+
+def test_suffixed_files_are_imported(catalog, tmp_path):
+    stamp = datetime(2025, 1, 1, 10, 0, 0)
+    catalog.record_backup('R1', 'running-config', 'first', stamp)
+    catalog.record_backup('R1', 'running-config', 'second', stamp)
+    fresh = BackupCatalog(str(tmp_path / 'fresh.db'), catalog.backup_dir)
+    assert fresh.import_directory() == 2
+
+
+def test_list_backups_pages_through_ties(catalog):
+    stamp = datetime(2025, 1, 1, 10, 0, 0)
+    for index in range(5):
+        catalog.record_backup(f"R{index}", 'running-config', 'config', stamp)
+    catalog.record_backup('R9', 'running-config', 'config', stamp + timedelta(minutes=1))
+
+    seen = []
+    cursor = None
+    while True:
+        page = catalog.list_backups(limit=2, cursor=cursor)
+        seen.extend(entry['device_name'] for entry in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == ['R9', 'R4', 'R3', 'R2', 'R1', 'R0']
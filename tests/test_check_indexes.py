@@ -0,0 +1,39 @@
+"""EXPLAIN QUERY PLAN regression check for the composite indexes (migration 005)"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.check_indexes import HOT_QUERIES, explain_sqlite
+
+
+@pytest.fixture
+def seeded(db_connection):
+    now = datetime.now()
+    with db_connection.cursor(commit=True) as cursor:
+        cursor.executemany(
+            "INSERT INTO devices (name, hostname, ip_address) VALUES (%s, %s, %s)",
+            [(f"R{i}", f"R{i}", f"10.0.0.{i + 1}") for i in range(10)]
+        )
+        cursor.executemany(
+            "INSERT INTO backups (device_name, backup_type, file_path, created_at) VALUES (%s, %s, %s, %s)",
+            [(f"R{i % 10}", 'running-config', f"backups/R{i % 10}_{i}.txt", now - timedelta(minutes=i))
+             for i in range(500)]
+        )
+        cursor.executemany(
+            "INSERT INTO operation_logs (operation_type, device_name, status, created_at) VALUES (%s, %s, %s, %s)",
+            [('backup', f"R{i % 10}", 'success', now - timedelta(minutes=i)) for i in range(500)]
+        )
+        cursor.executemany(
+            "INSERT INTO user_sessions (user_id, session_token, expires_at) VALUES (%s, %s, %s)",
+            [(1, f"token-{i}", now + timedelta(hours=i % 24 - 12)) for i in range(200)]
+        )
+        cursor.execute("ANALYZE")
+    return db_connection
+
+
+@pytest.mark.parametrize('query', HOT_QUERIES, ids=[query['name'] for query in HOT_QUERIES])
+def test_hot_query_uses_its_index(seeded, query):
+    with seeded.cursor() as cursor:
+        index, problems = explain_sqlite(cursor, query)
+    assert index in query['indexes']['sqlite']
+    assert problems == []
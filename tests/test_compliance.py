@@ -0,0 +1,27 @@
+"""Compliance result store and process pool (netconfig.compliance)"""
+from netconfig import compliance
+from netconfig.compliance import ComplianceStore
+
+RULES = [{'id': 'ssh-v2', 'description': 'SSH version 2', 'severity': 'high', 'present': '^ip ssh version 2$'}]
+
+
+def test_saving_one_ruleset_keeps_the_others(tmp_path):
+    store = ComplianceStore(str(tmp_path / 'catalog.db'))
+    store.save('rules-a', {'c1': [{'id': 'a', 'passed': True, 'details': []}]})
+    store.save('rules-b', {'c1': [{'id': 'b', 'passed': False, 'details': ['x']}]})
+    assert store.load('rules-a', ['c1']) == {'c1': [{'id': 'a', 'passed': True, 'details': []}]}
+    assert store.load('rules-b', ['c1']) == {'c1': [{'id': 'b', 'passed': False, 'details': ['x']}]}
+
+
+def test_pool_does_not_fork_the_caller(tmp_path):
+    paths = []
+    for index, text in enumerate(['ip ssh version 2\n', 'hostname R2\n']):
+        path = tmp_path / f'R{index}.txt'
+        path.write_text(text)
+        paths.append(str(path))
+    try:
+        results = compliance._evaluate_in_pool(paths, RULES, workers=1)
+        assert [result[0]['passed'] for result in results] == [True, False]
+        assert compliance.get_compliance_pool()._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        compliance._discard_compliance_pool(compliance.get_compliance_pool())
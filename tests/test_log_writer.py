@@ -0,0 +1,129 @@
+"""Operation log batching, spooling and replay (database.log_writer.OperationLogWriter)"""
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from database.connection import DatabaseUnavailableError
+from database.log_writer import OperationLogWriter
+
+
+@pytest.fixture
+def writer(db_connection, tmp_path):
+    with db_connection.cursor(commit=True) as cursor:
+        cursor.execute("INSERT INTO devices (name, hostname, ip_address) VALUES ('R1', 'R1', '10.0.0.1')")
+    writer = OperationLogWriter(db_connection, batch_size=10, spool_path=str(tmp_path / 'operation_logs.spool'))
+    yield writer
+    writer.close()
+
+
+def rows(count, status='success'):
+    return [('backup', 'R1', status, str(index), datetime(2025, 1, 1, 10, 0, index % 60)) for index in range(count)]
+
+
+def stored(writer):
+    with writer.db_connection.cursor() as cursor:
+        cursor.execute("SELECT details FROM operation_logs ORDER BY id")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def spooled(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['details'] for line in f]
+
+
+def go_down(monkeypatch, writer):
+    def unavailable(rows):
+        raise DatabaseUnavailableError("database down")
+    monkeypatch.setattr(writer, '_execute', unavailable)
+
+
+def test_batches_are_written(writer):
+    writer.start()
+    for operation_type, device_name, status, details, _ in rows(25):
+        writer.write(operation_type, device_name, status, details)
+    assert writer.flush()
+    assert stored(writer) == [str(index) for index in range(25)]
+
+
+def test_rows_are_spooled_while_the_database_is_down(writer, monkeypatch):
+    go_down(monkeypatch, writer)
+    writer._flush_batch(rows(3))
+    assert spooled(writer.spool_path) == ['0', '1', '2']
+    # Later batches go straight to the spool until retry_interval passes
+    writer._flush_batch(rows(2))
+    assert spooled(writer.spool_path) == ['0', '1', '2', '0', '1']
+
+
+def test_replay_inserts_spooled_rows_once(writer):
+    writer._spool(rows(25))
+    writer._replay_spool()
+    assert stored(writer) == [str(index) for index in range(25)]
+    assert not os.path.exists(writer.spool_path)
+    assert not os.path.exists(writer.spool_path + '.replay')
+    writer._replay_spool()
+    assert len(stored(writer)) == 25
+
+
+def test_replay_respools_rows_the_database_did_not_take(writer, monkeypatch):
+    writer._spool(rows(25))
+    execute = writer._execute
+    calls = []
+
+    def fail_after_first_batch(batch):
+        calls.append(len(batch))
+        if len(calls) > 1:
+            raise DatabaseUnavailableError("database down")
+        execute(batch)
+    monkeypatch.setattr(writer, '_execute', fail_after_first_batch)
+
+    writer._replay_spool()
+    assert stored(writer) == [str(index) for index in range(10)]
+    assert spooled(writer.spool_path) == [str(index) for index in range(10, 25)]
+    assert not os.path.exists(writer.spool_path + '.replay')
+
+
+def test_replay_keeps_unsent_rows_when_the_spool_cannot_be_written(writer, monkeypatch):
+    writer._spool(rows(25))
+    execute = writer._execute
+    calls = []
+
+    def fail_after_first_batch(batch):
+        calls.append(len(batch))
+        if len(calls) > 1:
+            raise DatabaseUnavailableError("database down")
+        execute(batch)
+    monkeypatch.setattr(writer, '_execute', fail_after_first_batch)
+    monkeypatch.setattr(writer, '_spool', lambda rows, fsync=True: False)
+
+    writer._replay_spool()
+    assert stored(writer) == [str(index) for index in range(10)]
+    # Only the unsent rows are left for the next replay, so nothing is lost or written twice
+    assert spooled(writer.spool_path + '.replay') == [str(index) for index in range(10, 25)]
+
+    monkeypatch.undo()
+    writer._db_down_until = 0.0
+    writer._replay_spool()
+    assert stored(writer) == [str(index) for index in range(25)]
+    assert not os.path.exists(writer.spool_path + '.replay')
+
+
+def test_rejected_rows_are_set_aside(writer):
+    batch = rows(5)
+    batch[2] = (None, 'R1', 'success', '2', batch[2][4])
+    writer._flush_batch(batch)
+    assert stored(writer) == ['0', '1', '3', '4']
+    assert spooled(writer.spool_path + '.rejected') == ['2']
+    assert spooled(writer.spool_path) == []
+
+
+def test_full_queue_does_not_write_on_the_callers_thread(db_connection, tmp_path):
+    writer = OperationLogWriter(db_connection, max_queue_size=5, enqueue_timeout=0,
+                                spool_path=str(tmp_path / 'operation_logs.spool'))
+    for index in range(7):
+        writer.write('backup', 'R1', 'success', str(index))
+    assert writer.stats()['pending'] == 7
+    assert not os.path.exists(writer.spool_path)
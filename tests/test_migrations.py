@@ -0,0 +1,64 @@
+"""Migration script splitting and application (database.migration_manager)"""
+from database.migration_manager import MigrationManager, split_sql_statements
+
+
+def test_split_on_semicolons():
+    assert split_sql_statements("SELECT 1;\nSELECT 2;\n") == ["SELECT 1", "SELECT 2"]
+
+
+def test_last_statement_without_semicolon():
+    assert split_sql_statements("SELECT 1; SELECT 2") == ["SELECT 1", "SELECT 2"]
+
+
+def test_semicolons_inside_quotes():
+    assert split_sql_statements(
+        "INSERT INTO a VALUES ('x;y', 'it''s; ok', 'back\\'slash;'); SELECT \"q;\", `we;ird` FROM a;"
+    ) == [
+        "INSERT INTO a VALUES ('x;y', 'it''s; ok', 'back\\'slash;')",
+        "SELECT \"q;\", `we;ird` FROM a",
+    ]
+
+
+def test_comments_are_dropped():
+    assert split_sql_statements(
+        "-- header; not a statement\nSELECT 1; /* block; comment */ SELECT 2 # tail;\n;"
+    ) == ["SELECT 1", "SELECT 2"]
+
+
+def test_empty_statements_are_skipped():
+    assert split_sql_statements(";;\n-- only a comment\n;") == []
+
+
+def test_migrations_apply_once(db_connection):
+    manager = MigrationManager(db_connection)
+    executed = manager.get_executed_migrations()
+    assert executed
+    assert set(executed) >= {'001_create_initial_tables.sql', '005_composite_indexes.sql'}
+    # A second run finds nothing to do
+    assert manager.run_migrations()
+    assert manager.get_executed_migrations() == executed
+
+
+def test_failed_migration_is_rolled_back_as_a_whole(db_connection, tmp_path):
+    manager = MigrationManager(db_connection)
+    manager.migrations_dir = str(tmp_path)
+    (tmp_path / '001_broken.sql').write_text(
+        "CREATE TABLE half_done (id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(50), INDEX idx_name (name));\n"
+        "INSERT INTO half_done (name) VALUES ('a;b');\n"
+        "INSERT INTO no_such_table VALUES (1);\n"
+    )
+    assert not manager.run_migrations()
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'half_done%'")
+        assert cursor.fetchall() == []
+        cursor.execute("SELECT COUNT(*) FROM migrations WHERE migration_name = '001_broken.sql'")
+        assert cursor.fetchone() == (0,)
+
+    (tmp_path / '001_broken.sql').write_text(
+        "CREATE TABLE half_done (id INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(50), INDEX idx_name (name));\n"
+        "INSERT INTO half_done (name) VALUES ('a;b');\n"
+    )
+    assert manager.run_migrations()
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM half_done")
+        assert cursor.fetchall() == [('a;b',)]
@@ -0,0 +1,88 @@
+"""Keyset pagination of backups and operation logs (DatabaseManager._fetch_page)"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.connection import decode_page_cursor, encode_page_cursor
+
+
+def seed_backups(db_manager, created_at):
+    """Insert one backup per timestamp, in the given order"""
+    db_manager.execute_query("INSERT INTO devices (name, hostname, ip_address) VALUES ('R1', 'R1', '10.0.0.1')")
+    for index, value in enumerate(created_at):
+        db_manager.execute_query(
+            "INSERT INTO backups (device_name, backup_type, file_path, created_at) VALUES (%s, %s, %s, %s)",
+            ('R1', 'running-config', f"backups/R1_{index}.txt", value)
+        )
+
+
+def all_pages(db_manager, limit, **filters):
+    pages = []
+    cursor = None
+    while True:
+        page = db_manager.get_backups_page(limit=limit, cursor=cursor, **filters)
+        pages.append([row['id'] for row in page['items']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 7, 29, 13, 26, 58)
+    assert decode_page_cursor(encode_page_cursor({'created_at': created_at, 'id': 42})) == (created_at, 42)
+
+
+def test_malformed_cursor_raises_value_error(db_manager):
+    with pytest.raises(ValueError):
+        db_manager.get_backups_page(cursor='not a cursor')
+
+
+def test_exactly_one_full_page_has_no_next_cursor(db_manager):
+    start = datetime(2025, 1, 1)
+    seed_backups(db_manager, [start + timedelta(minutes=i) for i in range(5)])
+    page = db_manager.get_backups_page(limit=5)
+    assert len(page['items']) == 5
+    assert page['next_cursor'] is None
+
+
+def test_one_row_over_a_page_gets_a_cursor(db_manager):
+    start = datetime(2025, 1, 1)
+    seed_backups(db_manager, [start + timedelta(minutes=i) for i in range(6)])
+    assert all_pages(db_manager, limit=5) == [[6, 5, 4, 3, 2], [1]]
+
+
+def test_ties_on_created_at_are_ordered_by_id(db_manager):
+    # Every row shares one timestamp, so only the id keeps pages apart
+    seed_backups(db_manager, [datetime(2025, 1, 1)] * 7)
+    assert all_pages(db_manager, limit=3) == [[7, 6, 5], [4, 3, 2], [1]]
+
+
+def test_page_boundary_inside_a_tie(db_manager):
+    start = datetime(2025, 1, 1)
+    seed_backups(db_manager, [start, start + timedelta(minutes=1), start + timedelta(minutes=1),
+                              start + timedelta(minutes=1), start + timedelta(minutes=2)])
+    assert all_pages(db_manager, limit=2) == [[5, 4], [3, 2], [1]]
+
+
+def test_rows_added_while_paging_do_not_shift_pages(db_manager):
+    start = datetime(2025, 1, 1)
+    seed_backups(db_manager, [start + timedelta(minutes=i) for i in range(4)])
+    first = db_manager.get_backups_page(limit=2)
+    db_manager.execute_query(
+        "INSERT INTO backups (device_name, backup_type, file_path, created_at) VALUES (%s, %s, %s, %s)",
+        ('R1', 'running-config', 'backups/R1_new.txt', start + timedelta(hours=1))
+    )
+    second = db_manager.get_backups_page(limit=2, cursor=first['next_cursor'])
+    assert [row['id'] for row in second['items']] == [2, 1]
+
+
+def test_filters_apply_on_every_page(db_manager):
+    start = datetime(2025, 1, 1)
+    seed_backups(db_manager, [start + timedelta(minutes=i) for i in range(6)])
+    assert all_pages(db_manager, limit=2, since=start + timedelta(minutes=2)) == [[6, 5], [4, 3]]
+
+
+def test_limit_is_clamped(db_manager):
+    seed_backups(db_manager, [datetime(2025, 1, 1)] * 3)
+    assert len(db_manager.get_backups_page(limit=0)['items']) == 1
+    assert len(db_manager.get_backups_page(limit=10 ** 6)['items']) == 3
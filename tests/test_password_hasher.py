@@ -0,0 +1,37 @@
+"""bcrypt worker pool (database.password_hasher.PasswordHasher)"""
+import threading
+
+from database import password_hasher
+from database.password_hasher import PasswordHasher
+
+
+def test_pool_does_not_fork_the_caller():
+    hasher = PasswordHasher(workers=1, rounds=4)
+    try:
+        hashed = hasher.hash_password('secret')
+        assert hasher.verify_password('secret', hashed)
+        assert not hasher.verify_password('wrong', hashed)
+        assert hasher._executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        hasher.shutdown()
+
+
+def test_rounds_are_calibrated_once(monkeypatch):
+    calls = []
+    started = threading.Event()
+
+    def calibrate(target_ms):
+        calls.append(target_ms)
+        started.wait(1)
+        return 4
+    monkeypatch.setattr(password_hasher, 'calibrate_rounds', calibrate)
+
+    hasher = PasswordHasher(workers=0, target_ms=50)
+    threads = [threading.Thread(target=lambda: hasher.rounds) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [50]
+    assert hasher.rounds == 4
@@ -0,0 +1,52 @@
+"""Read routing between replicas and the primary (database.replicas.ReplicaRouter)"""
+import copy
+
+import pytest
+
+from database.connection import DatabaseConnection
+from database.replicas import ReplicaRouter
+
+
+@pytest.fixture
+def router(sqlite_config, tmp_path):
+    sqlite_config.pool_max_overflow = 0
+
+    def database(name):
+        config = copy.copy(sqlite_config)
+        config.sqlite_path = str(tmp_path / name)
+        return DatabaseConnection(config)
+    return ReplicaRouter(database('primary.db'), [database('replica.db')], check_interval=3600)
+
+
+def test_reads_go_to_a_healthy_replica(router):
+    with router.acquire_read():
+        pass
+    assert router.primary.pool_stats()['acquired'] == 0
+    assert router.replicas[0].pool_stats()['acquired'] == 1
+
+
+def test_busy_replica_stays_in_rotation(router):
+    replica = router.replicas[0]
+    held = replica.get_connection()
+    try:
+        with router.acquire_read():
+            pass
+        # The read fell back to the primary without taking the replica out of rotation
+        assert router.primary.pool_stats()['acquired'] == 1
+        assert router.status()[0]['healthy']
+    finally:
+        replica.return_connection(held)
+
+    with router.acquire_read():
+        pass
+    assert replica.pool_stats()['acquired'] == 2
+
+
+def test_unreachable_replica_is_marked_down(router, tmp_path):
+    router.replicas[0].config.sqlite_path = str(tmp_path / 'missing' / 'dir' / 'replica.db')
+    router.replicas[0].backend.path = router.replicas[0].config.sqlite_path
+    (tmp_path / 'missing').write_text('a file where the directory should be')
+    with router.acquire_read():
+        pass
+    assert not router.status()[0]['healthy']
+    assert router.primary.pool_stats()['acquired'] == 1
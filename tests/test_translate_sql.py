@@ -0,0 +1,78 @@
+"""MySQL to SQLite statement translation (database.backends.translate_sql)"""
+import sqlite3
+
+from database.backends import translate_sql
+
+
+def test_placeholders():
+    assert translate_sql("SELECT * FROM t WHERE a = %s AND b = %(name)s") == \
+        ("SELECT * FROM t WHERE a = ? AND b = :name",)
+
+
+def test_escaped_percent_outside_literals():
+    assert translate_sql("SELECT a %% 2 FROM t WHERE b = %s") == ("SELECT a % 2 FROM t WHERE b = ?",)
+
+
+def test_on_duplicate_key_update():
+    assert translate_sql(
+        "INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = VALUES(b), n = n + 1"
+    ) == ("INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = excluded.b, n = n + 1",)
+
+
+def test_on_duplicate_key_update_runs_on_sqlite():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (a TEXT PRIMARY KEY, b TEXT, n INTEGER DEFAULT 0)")
+    (upsert,) = translate_sql(
+        "INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = VALUES(b), n = n + 1"
+    )
+    conn.execute(upsert, ('x', 'first'))
+    conn.execute(upsert, ('x', 'second'))
+    assert conn.execute("SELECT a, b, n FROM t").fetchall() == [('x', 'second', 1)]
+
+
+def test_delete_with_limit():
+    assert translate_sql("DELETE FROM user_sessions WHERE expires_at <= NOW() LIMIT 1000") == (
+        "DELETE FROM user_sessions WHERE rowid IN (SELECT rowid FROM user_sessions "
+        "WHERE expires_at <= (datetime('now','localtime')) LIMIT 1000)",
+    )
+
+
+def test_delete_with_limit_runs_on_sqlite():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (n INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(n,) for n in range(10)])
+    (delete,) = translate_sql("DELETE FROM t WHERE n < %s LIMIT %s")
+    conn.execute(delete, (8, 3))
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (7,)
+
+
+def test_string_literals_are_left_alone():
+    assert translate_sql("SELECT 'NOW() %s; -- not a comment', b FROM t -- trailing\n") == \
+        ("SELECT 'NOW() %s; -- not a comment', b FROM t",)
+
+
+def test_mysql_escapes_in_literals():
+    assert translate_sql("INSERT INTO t (s) VALUES ('a\\'b\\nc', 'it''s')") == \
+        ("INSERT INTO t (s) VALUES ('a''b\nc', 'it''s')",)
+
+
+def test_create_table_moves_inline_indexes():
+    statements = translate_sql(
+        "CREATE TABLE IF NOT EXISTS t (id INT AUTO_INCREMENT PRIMARY KEY, "
+        "s ENUM('a', 'b') NOT NULL, u TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
+        "INDEX idx_s (s), UNIQUE KEY uq_u (u)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    )
+    assert statements == (
+        "CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY AUTOINCREMENT, s TEXT NOT NULL, "
+        "u TIMESTAMP DEFAULT (datetime('now','localtime')))",
+        "CREATE INDEX IF NOT EXISTS t_idx_s ON t (s)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS t_uq_u ON t (u)",
+    )
+    conn = sqlite3.connect(':memory:')
+    for statement in statements:
+        conn.execute(statement)
+
+
+def test_insert_ignore_and_for_update():
+    assert translate_sql("INSERT IGNORE INTO t (a) VALUES (%s)") == ("INSERT OR IGNORE INTO t (a) VALUES (?)",)
+    assert translate_sql("SELECT * FROM t WHERE a = %s FOR UPDATE") == ("SELECT * FROM t WHERE a = ?",)
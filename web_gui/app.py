@@ -4,7 +4,6 @@ Provides a web-based GUI for network automation tasks with authentication
 """
 
 from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for, flash, make_response
-from flask_session import Session
 import subprocess
 import json
 import os
@@ -12,15 +11,10 @@ import sys
 import threading
 import time
 from datetime import datetime, timedelta
-import yaml
 import logging
-from werkzeug.security import check_password_hash, generate_password_hash
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
 import io
+from job_store import get_job_store, import_redis
+from session_store import create_session_interface
 
 # Configure logging first
 logging.basicConfig(level=logging.INFO)
@@ -29,42 +23,72 @@ logger = logging.getLogger(__name__)
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import database integration
+# Import database integration (managers are created on first use, not at import)
 try:
     from database_integration import (
         db_integration, init_database_integration, 
         get_devices_hybrid, log_operation_hybrid
     )
-    from database.user_manager import UserManager
-    from database.connection import DatabaseManager
     DATABASE_ENABLED = True
     
-    # Initialize user manager
-    db_manager = DatabaseManager()
-    user_manager = UserManager(db_manager)
-    
 except ImportError as e:
     logger.warning(f"Database integration not available: {e}")
     DATABASE_ENABLED = False
-    user_manager = None
+
+_user_manager = None
+_user_manager_lock = threading.Lock()
+
+def get_user_manager():
+    """Get the UserManager, creating it and the DB background jobs on first use"""
+    global _user_manager
+    if not DATABASE_ENABLED:
+        return None
+    if _user_manager is None:
+        with _user_manager_lock:
+            if _user_manager is None:
+                from database.connection import get_db_manager
+                from database.user_manager import UserManager
+                from database.log_retention import OperationLogMaintenance
+                
+                db_manager = get_db_manager()
+                manager = UserManager(db_manager)
+                manager.start_session_cleanup()
+                
+                # Hourly rollups and retention for operation_logs
+                OperationLogMaintenance(db_manager).start()
+                _user_manager = manager
+    return _user_manager
 
 app = Flask(__name__)
-app.secret_key = 'solange-network-automation-2025-secure-key'
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = False
-app.config['SESSION_USE_SIGNER'] = True
-app.config['SESSION_KEY_PREFIX'] = 'solange:'
+app.secret_key = os.getenv('FLASK_SECRET_KEY', 'solange-network-automation-2025-secure-key')
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)
 
-# Initialize session
-Session(app)
+# Session storage shared by every worker. SESSION_BACKEND is one of:
+# database (user_sessions rows), memory (single process), cookie, or
+# redis (Flask-Session, for workers spread over several hosts)
+SESSION_REDIS_URL = os.getenv('SESSION_REDIS_URL')
+SESSION_BACKEND = os.getenv('SESSION_BACKEND') or (
+    'redis' if SESSION_REDIS_URL else 'database' if DATABASE_ENABLED else 'cookie'
+)
+if SESSION_BACKEND == 'redis':
+    redis = import_redis('SESSION_BACKEND=redis')
+    from flask_session import Session
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_PERMANENT'] = False
+    app.config['SESSION_USE_SIGNER'] = True
+    app.config['SESSION_KEY_PREFIX'] = 'solange:'
+    app.config['SESSION_REDIS'] = redis.Redis.from_url(SESSION_REDIS_URL or 'redis://localhost:6379/0')
+    Session(app)
+else:
+    app.session_interface = create_session_interface(
+        SESSION_BACKEND, app.permanent_session_lifetime.total_seconds(), get_user_manager
+    )
 
-# Default users (in production, store in database)
-USERS = {
-    'admin': generate_password_hash('admin123'),
-    'operator': generate_password_hash('operator123'),
-    'viewer': generate_password_hash('viewer123')
-}
+def create_app():
+    """Return the configured app for WSGI servers (gunicorn 'app:create_app()')"""
+    if app.secret_key == 'solange-network-automation-2025-secure-key':
+        logger.warning("FLASK_SECRET_KEY is not set; using the built-in development key")
+    return app
 
 # User roles
 USER_ROLES = {
@@ -75,7 +99,16 @@ USER_ROLES = {
 
 # Authentication helpers
 def is_logged_in():
-    return 'user' in session and 'logged_in' in session and session['logged_in']
+    if not ('user' in session and 'logged_in' in session and session['logged_in']):
+        return False
+    
+    # Check the database session is still valid (served from the session cache)
+    session_token = session.get('session_token')
+    if DATABASE_ENABLED and session_token:
+        if not get_user_manager().validate_session(session_token):
+            session.clear()
+            return False
+    return True
 
 def get_current_user():
     return session.get('user', None)
@@ -121,38 +154,6 @@ def require_permission(permission):
         return decorated_function
     return decorator
 
-# Global variables for operation status
-current_operation = None
-operation_logs = []
-
-class OperationManager:
-    def __init__(self):
-        self.current_operation = None
-        self.logs = []
-        self.progress = 0
-        
-    def start_operation(self, operation_name):
-        self.current_operation = operation_name
-        self.logs = []
-        self.progress = 0
-        
-    def add_log(self, message, level='info'):
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.logs.append({
-            'timestamp': timestamp,
-            'level': level,
-            'message': message
-        })
-        
-    def update_progress(self, progress):
-        self.progress = progress
-        
-    def complete_operation(self):
-        self.current_operation = None
-        self.progress = 100
-
-operation_manager = OperationManager()
-
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Login page and authentication"""
@@ -165,12 +166,13 @@ def login():
             return render_template('login.html')
         
         # Use database authentication if available
-        if DATABASE_ENABLED and user_manager:
+        if DATABASE_ENABLED:
             try:
-                auth_result = user_manager.authenticate_user(
+                auth_result = get_user_manager().authenticate_user(
                     username, 
                     password, 
-                    request.remote_addr
+                    request.remote_addr,
+                    request.headers.get('User-Agent')
                 )
                 
                 if auth_result['success']:
@@ -185,6 +187,9 @@ def login():
                     flash(f'Welcome, {user_data["username"]}!', 'success')
                     next_page = request.args.get('next')
                     return redirect(next_page or url_for('index'))
+                elif auth_result.get('busy'):
+                    flash(auth_result['message'], 'error')
+                    return render_template('login.html'), 503
                 else:
                     flash(auth_result['message'], 'error')
             except Exception as e:
@@ -203,9 +208,9 @@ def logout():
     session_token = session.get('session_token')
     
     # Invalidate database session if available
-    if DATABASE_ENABLED and user_manager and session_token:
+    if DATABASE_ENABLED and session_token:
         try:
-            user_manager.invalidate_session(session_token)
+            get_user_manager().invalidate_session(session_token)
         except Exception as e:
             logger.error(f"Error invalidating session: {e}")
     
@@ -221,8 +226,9 @@ def register():
     password_min_length = 8
     password_require_special = True
     
-    if DATABASE_ENABLED and user_manager:
+    if DATABASE_ENABLED:
         try:
+            user_manager = get_user_manager()
             registration_enabled = user_manager.get_setting('user_registration_enabled', False)
             password_min_length = user_manager.get_setting('password_min_length', 8)
             password_require_special = user_manager.get_setting('password_require_special', True)
@@ -252,9 +258,9 @@ def register():
                                  password_require_special=password_require_special)
         
         # Create user
-        if DATABASE_ENABLED and user_manager:
+        if DATABASE_ENABLED:
             try:
-                result = user_manager.create_user(
+                result = get_user_manager().create_user(
                     username=username,
                     email=email,
                     password=password,
@@ -293,12 +299,12 @@ def index():
 def discover_devices():
     """Discover devices using the GNS3 connection script"""
     try:
-        operation_manager.start_operation('Device Discovery')
+        get_job_store().start_operation('Device Discovery')
         
         # Run the device discovery script in a separate thread
         def run_discovery():
             try:
-                operation_manager.add_log('Starting device discovery...')
+                get_job_store().add_log('Starting device discovery...')
                 
                 # Change to the correct directory and run the script
                 script_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'connectionGNS3', 'enable_hybrid.py')
@@ -311,16 +317,16 @@ def discover_devices():
                 )
                 
                 if result.returncode == 0:
-                    operation_manager.add_log('Device discovery completed successfully')
+                    get_job_store().add_log('Device discovery completed successfully')
                     # The hybrid script already saves devices_cache.json, so just reload it
-                    operation_manager.add_log('Device cache updated with latest discovery results')
+                    get_job_store().add_log('Device cache updated with latest discovery results')
                 else:
-                    operation_manager.add_log(f'Device discovery failed: {result.stderr}', 'error')
+                    get_job_store().add_log(f'Device discovery failed: {result.stderr}', 'error')
                     
             except Exception as e:
-                operation_manager.add_log(f'Error during discovery: {str(e)}', 'error')
+                get_job_store().add_log(f'Error during discovery: {str(e)}', 'error')
             finally:
-                operation_manager.complete_operation()
+                get_job_store().complete_operation()
         
         # Start discovery in background
         threading.Thread(target=run_discovery, daemon=True).start()
@@ -346,11 +352,11 @@ def get_devices():
 def backup_all_devices():
     """Backup all device configurations"""
     try:
-        operation_manager.start_operation('Backup All Devices')
+        get_job_store().start_operation('Backup All Devices')
         
         def run_backup():
             try:
-                operation_manager.add_log('Starting backup operation...')
+                get_job_store().add_log('Starting backup operation...')
                 
                 # Run the backup script
                 script_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'scripts', 'backup_restore.py')
@@ -363,14 +369,14 @@ def backup_all_devices():
                 )
                 
                 if result.returncode == 0:
-                    operation_manager.add_log('Backup completed successfully')
+                    get_job_store().add_log('Backup completed successfully')
                 else:
-                    operation_manager.add_log(f'Backup failed: {result.stderr}', 'error')
+                    get_job_store().add_log(f'Backup failed: {result.stderr}', 'error')
                     
             except Exception as e:
-                operation_manager.add_log(f'Error during backup: {str(e)}', 'error')
+                get_job_store().add_log(f'Error during backup: {str(e)}', 'error')
             finally:
-                operation_manager.complete_operation()
+                get_job_store().complete_operation()
         
         threading.Thread(target=run_backup, daemon=True).start()
         
@@ -383,6 +389,8 @@ def backup_all_devices():
 @app.route('/api/config/apply', methods=['POST'])
 def apply_configuration():
     """Apply bulk configuration to devices"""
+    from netconfig.templating import get_template_engine, load_inventory, TemplateVariableError
+    
     try:
         data = request.get_json()
         commands = data.get('commands', '')
@@ -390,11 +398,19 @@ def apply_configuration():
         if not commands:
             return jsonify({'success': False, 'error': 'No commands provided'}), 400
         
-        operation_manager.start_operation('Apply Configuration')
+        # Commands may use inventory variables; reject undefined ones before any device is touched
+        try:
+            get_template_engine().render_batch(commands, load_inventory())
+        except TemplateVariableError as e:
+            return jsonify({'success': False, 'error': str(e), 'missing': e.missing}), 400
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        get_job_store().start_operation('Apply Configuration')
         
         def run_config():
             try:
-                operation_manager.add_log('Applying configuration...')
+                get_job_store().add_log('Applying configuration...')
                 
                 # Save commands to bulk config file
                 config_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'bulk_config_commands.txt')
@@ -412,14 +428,14 @@ def apply_configuration():
                 )
                 
                 if result.returncode == 0:
-                    operation_manager.add_log('Configuration applied successfully')
+                    get_job_store().add_log('Configuration applied successfully')
                 else:
-                    operation_manager.add_log(f'Configuration failed: {result.stderr}', 'error')
+                    get_job_store().add_log(f'Configuration failed: {result.stderr}', 'error')
                     
             except Exception as e:
-                operation_manager.add_log(f'Error applying configuration: {str(e)}', 'error')
+                get_job_store().add_log(f'Error applying configuration: {str(e)}', 'error')
             finally:
-                operation_manager.complete_operation()
+                get_job_store().complete_operation()
         
         threading.Thread(target=run_config, daemon=True).start()
         
@@ -442,11 +458,11 @@ def manage_passwords():
         if not password:
             return jsonify({'success': False, 'error': 'Password required'}), 400
         
-        operation_manager.start_operation(f'Password {action.title()}')
+        get_job_store().start_operation(f'Password {action.title()}')
         
         def run_password_operation():
             try:
-                operation_manager.add_log(f'Starting password {action}...')
+                get_job_store().add_log(f'Starting password {action}...')
                 
                 # Run the password rotation script
                 script_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'scripts', 'password_rotation.py')
@@ -476,16 +492,16 @@ def manage_passwords():
                     )
                     
                     if result.returncode == 0:
-                        operation_manager.add_log(f'Password {action} completed successfully')
+                        get_job_store().add_log(f'Password {action} completed successfully')
                     else:
-                        operation_manager.add_log(f'Password {action} failed: {result.stderr}', 'error')
+                        get_job_store().add_log(f'Password {action} failed: {result.stderr}', 'error')
                 finally:
                     os.unlink(temp_file)
                     
             except Exception as e:
-                operation_manager.add_log(f'Error during password {action}: {str(e)}', 'error')
+                get_job_store().add_log(f'Error during password {action}: {str(e)}', 'error')
             finally:
-                operation_manager.complete_operation()
+                get_job_store().complete_operation()
         
         threading.Thread(target=run_password_operation, daemon=True).start()
         
@@ -498,123 +514,423 @@ def manage_passwords():
 @app.route('/api/operation/status', methods=['GET'])
 def get_operation_status():
     """Get current operation status and logs"""
-    operation_complete = operation_manager.current_operation is None
+    status = get_job_store().status()
     return jsonify({
         'success': True,
-        'current_operation': operation_manager.current_operation,
-        'operation_complete': operation_complete,
-        'logs': operation_manager.logs,
-        'progress': operation_manager.progress
+        'current_operation': status['current_operation'],
+        'operation_complete': status['current_operation'] is None,
+        'logs': status['logs'],
+        'progress': status['progress']
     })
 
+LOG_FILES = [
+    'logs/gns3_automation.log',
+    'logs/backup_restore.log',
+    'logs/bulk_configuration.log',
+    'logs/password_rotation.log'
+]
+
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
-    """Get system logs"""
+    """Get system logs
+    
+    Query parameters: ``lines`` (last N lines per file, default 50),
+    ``source`` (one log file name) and ``since_offset`` (with ``source``:
+    only lines written after this byte offset). ``offsets`` in the response
+    holds each file's end offset for the next follow request.
+    """
+    from logtools import tail_lines, read_since, parse_line
+    
     try:
-        log_files = [
-            'logs/gns3_automation.log',
-            'logs/backup_restore.log',
-            'logs/bulk_configuration.log',
-            'logs/password_rotation.log'
-        ]
+        lines = min(request.args.get('lines', 50, type=int), 1000)
+        source = request.args.get('source')
+        since_offset = request.args.get('since_offset', type=int)
+        
+        log_files = LOG_FILES
+        if source:
+            log_files = [log_file for log_file in LOG_FILES if os.path.basename(log_file) == source]
+            if not log_files:
+                return jsonify({'success': False, 'error': f'Unknown log source: {source}'}), 400
+        elif since_offset is not None:
+            return jsonify({'success': False, 'error': 'since_offset requires source'}), 400
         
         all_logs = []
+        offsets = {}
         base_dir = os.path.dirname(os.path.dirname(__file__))
         
         for log_file in log_files:
             log_path = os.path.join(base_dir, log_file)
             if os.path.exists(log_path):
                 try:
-                    with open(log_path, 'r') as f:
-                        lines = f.readlines()
-                        for line in lines[-50:]:  # Last 50 lines
-                            if line.strip():
-                                all_logs.append({
-                                    'source': os.path.basename(log_file),
-                                    'content': line.strip()
-                                })
+                    if since_offset is not None:
+                        entries, offset = read_since(log_path, since_offset)
+                    else:
+                        entries, offset = tail_lines(log_path, lines)
+                    offsets[os.path.basename(log_file)] = offset
+                    for line in entries:
+                        if line.strip():
+                            # JSON lines are shown as "time - LEVEL - message" like the console
+                            parsed = parse_line(line.strip())
+                            logged_at, level, message, device = parsed or (None, None, line.strip(), None)
+                            all_logs.append({
+                                'source': os.path.basename(log_file),
+                                'content': f"{logged_at} - {level} - {message}" if parsed else message,
+                                'time': logged_at,
+                                'level': level,
+                                'message': message,
+                                'device': device
+                            })
                 except Exception as e:
                     logger.error(f"Error reading {log_file}: {e}")
         
-        return jsonify({'success': True, 'logs': all_logs})
+        return jsonify({'success': True, 'logs': all_logs, 'offsets': offsets})
         
     except Exception as e:
         logger.error(f"Error getting logs: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# Seconds between background passes that index new log lines for search
+LOG_INDEX_INTERVAL = int(os.getenv('LOG_INDEX_INTERVAL', 10))
+
+@app.route('/api/logs/search', methods=['GET'])
+@require_auth
+def search_logs():
+    """Search the indexed logs
+    
+    Query parameters: ``q`` (words), ``device``, ``level``, ``since`` and
+    ``until`` ('YYYY-MM-DD HH:MM[:SS]'), ``source``, ``limit`` and
+    ``before_id`` (``next_before_id`` of the previous page).
+    """
+    from logtools import get_log_index
+    
+    try:
+        level = request.args.get('level', '').upper() or None
+        if level and level not in LOG_LEVELS:
+            return jsonify({'success': False, 'error': f'Unknown log level: {level}'}), 400
+        limit = max(1, min(request.args.get('limit', 100, type=int), 500))
+        
+        # New lines are indexed in the background, never inside the request
+        log_index = get_log_index()
+        log_index.start(interval_seconds=LOG_INDEX_INTERVAL)
+        entries = log_index.search(
+            text=request.args.get('q'),
+            device=request.args.get('device') or None,
+            level=level,
+            since=request.args.get('since') or None,
+            until=request.args.get('until') or None,
+            source=request.args.get('source') or None,
+            limit=limit,
+            before_id=request.args.get('before_id', type=int)
+        )
+        return jsonify({
+            'success': True,
+            'entries': entries,
+            'next_before_id': entries[-1]['id'] if len(entries) == limit else None
+        })
+        
+    except Exception as e:
+        logger.error(f"Error searching logs: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _backup_view(entry):
+    """Render a backup catalog entry for the backup history table"""
+    return {
+        'id': entry['id'],
+        'name': entry['file_name'],
+        'device': entry['device_name'],
+        'type': entry['backup_type'],
+        'size': f"{entry['file_size'] / 1024:.1f} KB",
+        'checksum': entry['checksum'],
+        'date': entry['created_at']
+    }
+
 @app.route('/api/backups', methods=['GET'])
 @require_auth
 def get_backup_history():
-    """Get backup file history"""
+    """Get backup history from the backup catalog, newest first (keyset paginated)"""
+    from netconfig import get_catalog
+    
     try:
-        backup_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'backups')
-        backups = []
-        
-        if os.path.exists(backup_dir):
-            for filename in os.listdir(backup_dir):
-                if filename.endswith('.txt'):
-                    file_path = os.path.join(backup_dir, filename)
-                    stat = os.stat(file_path)
-                    backups.append({
-                        'name': filename,
-                        'size': f"{stat.st_size / 1024:.1f} KB",
-                        'date': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                        'device': filename.split('_')[0] if '_' in filename else 'Unknown'
-                    })
-        
-        backups.sort(key=lambda x: x['date'], reverse=True)
-        return jsonify({'success': True, 'backups': backups})
+        page = get_catalog().list_backups(**_page_filters('device_name', 'backup_type'))
+        return jsonify({
+            'success': True,
+            'backups': [_backup_view(entry) for entry in page['items']],
+            'next_cursor': page['next_cursor']
+        })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting backup history: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/backups/diff', methods=['GET'])
+@require_auth
+def get_backup_diff():
+    """Diff two catalogued backups (from, to), a backup against its predecessor (to),
+    or a backup against the device's running config (from, live=true)
+
+    live=true needs the configure permission and only starts a job that fetches
+    the running config; the job log names the running checksum, and
+    from=<id>&running=<checksum> returns the finished diff."""
+    from netconfig import get_catalog, diff_backups, diff_with_previous, cached_diff_with_running
+    
+    try:
+        catalog = get_catalog()
+        from_id = request.args.get('from', type=int)
+        to_id = request.args.get('to', type=int)
+        live = request.args.get('live') == 'true'
+        running = request.args.get('running')
+        if (from_id is None if live or running else to_id is None):
+            return jsonify({'success': False, 'error': "'to' is required ('from' with live=true or running)"}), 400
+        if live and not has_permission('configure'):
+            return jsonify({'success': False, 'error': 'Insufficient permissions'}), 403
+        
+        entries = {backup_id: catalog.get(backup_id) for backup_id in (from_id, to_id) if backup_id is not None}
+        missing = [str(backup_id) for backup_id, entry in entries.items() if entry is None]
+        if missing:
+            return jsonify({'success': False, 'error': f"Unknown backup id: {', '.join(missing)}"}), 404
+        
+        if live:
+            operation = start_live_diff(entries[from_id])
+            return jsonify({'success': True, 'message': 'Fetching running config', 'operation': operation}), 202
+        elif running:
+            diff = cached_diff_with_running(entries[from_id], running)
+            if diff is None:
+                return jsonify({'success': False, 'error': 'No diff against this running config; fetch it again with live=true'}), 404
+        elif from_id is not None:
+            diff = diff_backups(entries[from_id], entries[to_id])
+        else:
+            diff = diff_with_previous(entries[to_id])
+            if diff is None:
+                return jsonify({'success': False, 'error': 'No earlier backup of this device to compare with'}), 404
+        return jsonify({'success': True, 'diff': diff})
+        
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error computing backup diff: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def start_live_diff(entry):
+    """Fetch a device's running config in a background job and cache its diff against a backup"""
+    from netconfig import diff_with_running
+    from netconfig.diff import fetch_running_config
+    
+    operation = f"Live diff {entry['device_name']} (backup {entry['id']})"
+    get_job_store().start_operation(operation)
+    
+    def run_live_diff():
+        try:
+            get_job_store().add_log(f"Fetching running config from {entry['device_name']}...")
+            diff = diff_with_running(entry, fetch_running_config(entry['device_name']))
+            checksum = diff['new']['checksum']
+            get_job_store().add_log(
+                f"Live diff ready: {diff['added']} added, {diff['removed']} removed; "
+                f"GET /api/backups/diff?from={entry['id']}&running={checksum}"
+            )
+        except Exception as e:
+            get_job_store().add_log(f"Error fetching running config from {entry['device_name']}: {e}", 'error')
+        finally:
+            get_job_store().complete_operation()
+    
+    threading.Thread(target=run_live_diff, daemon=True).start()
+    return operation
+
+# Seconds between background passes that index catalogued backups missed at backup time
+CONFIG_INDEX_INTERVAL = int(os.getenv('CONFIG_INDEX_INTERVAL', 60))
+
+@app.route('/api/configs/search', methods=['GET'])
+@require_auth
+def search_configs():
+    """Search stored configurations for a phrase or regular expression (mode=phrase|regex)"""
+    from netconfig import get_search_index
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': "'q' is required"}), 400
+    try:
+        search_index = get_search_index()
+        # backup_device() indexes new backups; anything else is picked up in the background
+        search_index.start(interval_seconds=CONFIG_INDEX_INTERVAL)
+        result = search_index.search(
+            query,
+            mode=request.args.get('mode', 'phrase'),
+            device_name=request.args.get('device') or None,
+            backup_type=request.args.get('type', 'running-config') if request.args.get('type') != 'all' else None,
+            history=request.args.get('history') == 'true',
+            limit=request.args.get('limit', 200, type=int)
+        )
+        return jsonify({'success': True, **result})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error searching configurations: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/compliance', methods=['GET'])
+@require_auth
+def get_compliance_report():
+    """Check the newest backup of every device against the compliance rules"""
+    from netconfig.compliance import run_compliance
+    
+    try:
+        report = run_compliance(device_name=request.args.get('device') or None)
+        if request.args.get('failed') == 'true':
+            report['devices'] = [device for device in report['devices'] if not device['compliant']]
+        return jsonify({'success': True, **report})
+        
+    except ValueError as e:
+        # Invalid rule file
+        return jsonify({'success': False, 'error': str(e)}), 500
+    except Exception as e:
+        logger.error(f"Error running compliance checks: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _page_filters(*names):
+    """Read limit/cursor/since/until plus the given filter names from the query string"""
+    filters = {
+        'limit': request.args.get('limit', 100, type=int),
+        'cursor': request.args.get('cursor') or None
+    }
+    for name in ('since', 'until'):
+        value = request.args.get(name)
+        filters[name] = datetime.fromisoformat(value) if value else None
+    for name in names:
+        filters[name] = request.args.get(name) or None
+    return filters
+
+def _paginated_response(fetch_page, *filter_names):
+    """Run a keyset-paginated DB query and render it as JSON"""
+    if not DATABASE_ENABLED or not db_integration.is_available():
+        return jsonify({'success': False, 'error': 'Database not available'}), 503
+    try:
+        page = fetch_page(**_page_filters(*filter_names))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if page is None:
+        return jsonify({'success': False, 'error': 'Database query failed'}), 500
+    return jsonify({'success': True, 'items': page['items'], 'next_cursor': page['next_cursor']})
+
+@app.route('/api/operation-logs', methods=['GET'])
+@require_auth
+def get_operation_log_records():
+    """Get operation logs from the database, newest first (keyset paginated)"""
+    return _paginated_response(
+        db_integration.get_operation_logs_page, 'device_name', 'operation_type', 'status'
+    )
+
+@app.route('/api/operation-stats', methods=['GET'])
+@require_auth
+def get_operation_stats():
+    """Get operation counts and success rates from the hourly rollups"""
+    if not DATABASE_ENABLED or not db_integration.is_available():
+        return jsonify({'success': False, 'error': 'Database not available'}), 503
+    try:
+        filters = _page_filters('device_name', 'operation_type')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    stats = db_integration.get_operation_stats(
+        since=filters['since'], until=filters['until'],
+        device_name=filters['device_name'], operation_type=filters['operation_type'],
+        hourly=request.args.get('hourly') == 'true'
+    )
+    if stats is None:
+        return jsonify({'success': False, 'error': 'Database query failed'}), 500
+    return jsonify({'success': True, 'stats': stats})
+
+@app.route('/api/backup-records', methods=['GET'])
+@require_auth
+def get_backup_records():
+    """Get backup records from the database, newest first (keyset paginated)"""
+    return _paginated_response(db_integration.get_backups_page, 'device_name', 'backup_type')
+
+@app.route('/api/templates/render', methods=['POST'])
+@require_auth
+def render_template_preview():
+    """Render template content for inventory devices without touching them"""
+    from netconfig.templating import get_template_engine, load_inventory, TemplateVariableError
+    
+    data = request.get_json(silent=True) or {}
+    content = data.get('content', '')
+    if not content:
+        return jsonify({'success': False, 'error': 'No template content provided'}), 400
+    try:
+        devices = load_inventory()
+        if data.get('devices'):
+            devices = [device for device in devices if device.get('name') in data['devices']]
+        rendered = get_template_engine().render_batch(
+            content, devices, defaults=data.get('defaults'), common=data.get('variables')
+        )
+        return jsonify({'success': True, 'rendered': rendered})
+        
+    except TemplateVariableError as e:
+        return jsonify({'success': False, 'error': str(e), 'missing': e.missing}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Template render error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/templates', methods=['GET'])
+@require_auth
 def get_templates():
-    """Get configuration templates"""
+    """Get configuration templates ordered by name (keyset paginated, ?q= filters)
+    
+    Served from the in-memory template store; the ETag changes with the
+    library, so unchanged pages are answered with 304 Not Modified.
+    """
+    from database.template_store import template_store
+    
     try:
-        templates_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'templates')
-        templates = []
-        
-        # Default templates
-        default_templates = [
-            {
-                'name': 'Basic OSPF Configuration',
-                'description': 'Configure OSPF routing protocol',
-                'content': 'router ospf 1\nnetwork 192.168.1.0 0.0.0.255 area 0\nexit'
-            },
-            {
-                'name': 'DHCP Server Setup',
-                'description': 'Configure DHCP server settings',
-                'content': 'ip dhcp pool LAN\nnetwork 192.168.1.0 255.255.255.0\ndefault-router 192.168.1.1\ndns-server 8.8.8.8\nexit'
-            },
-            {
-                'name': 'Security Hardening',
-                'description': 'Apply basic security settings',
-                'content': 'line vty 0 4\nlogin local\ntransport input ssh\nexec-timeout 5 0\nexit\nip ssh time-out 60\nip ssh authentication-retries 3'
-            }
-        ]
-        
-        templates.extend(default_templates)
-        
-        # Load custom templates if they exist
-        if os.path.exists(templates_dir):
-            for filename in os.listdir(templates_dir):
-                if filename.endswith('.txt'):
-                    with open(os.path.join(templates_dir, filename), 'r') as f:
-                        content = f.read()
-                        templates.append({
-                            'name': filename[:-4],  # Remove .txt extension
-                            'description': 'Custom template',
-                            'content': content
-                        })
-        
-        return jsonify({'success': True, 'templates': templates})
+        page = template_store.list_templates(
+            _template_db_manager(),
+            limit=request.args.get('limit', 100, type=int),
+            cursor=request.args.get('cursor') or None,
+            query=request.args.get('q', '').strip() or None
+        )
+        response = jsonify({
+            'success': True,
+            'templates': page['items'],
+            'total': page['total'],
+            'next_cursor': page['next_cursor']
+        })
+        response.set_etag(page['etag'])
+        return response.make_conditional(request)
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting templates: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/templates/<template_key>', methods=['GET'])
+@require_auth
+def get_template(template_key):
+    """Get one configuration template by id or name"""
+    from database.template_store import template_store
+    
+    try:
+        template = template_store.get_template(_template_db_manager(), template_key)
+        if template is None:
+            return jsonify({'success': False, 'error': f"Unknown template: {template_key}"}), 404
+        response = jsonify({'success': True, 'template': template})
+        response.set_etag(template['etag'])
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        logger.error(f"Error getting template {template_key}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _template_db_manager():
+    """Database manager for the template store, or None to serve built-in and file templates only"""
+    if DATABASE_ENABLED and db_integration.is_available():
+        return db_integration.db_manager
+    return None
+
 # Helper functions
 def parse_discovery_output(output):
     """Parse the output from device discovery script"""
@@ -657,6 +973,12 @@ def save_devices_cache(devices):
 
 def generate_backup_pdf(backup_data):
     """Generate PDF report for backup history"""
+    # reportlab is heavy to import, so it is only loaded when a report is requested
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    
     buffer = io.BytesIO()
     
     # Create the PDF document
@@ -729,29 +1051,24 @@ def generate_backup_pdf(backup_data):
 @require_auth
 def download_backup_pdf():
     """Download backup history as PDF"""
+    from netconfig import get_catalog
+    
     try:
-        # Get backup data (same as get_backup_history)
-        backup_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'backups')
+        # Walk the whole catalog page by page (newest first)
+        catalog = get_catalog()
         backups = []
-        
-        if os.path.exists(backup_dir):
-            for file in os.listdir(backup_dir):
-                if file.endswith('.cfg') or file.endswith('.txt'):
-                    file_path = os.path.join(backup_dir, file)
-                    stat = os.path.stat(file_path)
-                    
-                    # Extract device name from filename
-                    device_name = file.split('_')[0] if '_' in file else file.split('.')[0]
-                    
-                    backups.append({
-                        'device': device_name,
-                        'filename': file,
-                        'size': f"{stat.st_size / 1024:.1f} KB",
-                        'date': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                    })
-        
-        # Sort by date (newest first)
-        backups.sort(key=lambda x: x['date'], reverse=True)
+        cursor = None
+        while True:
+            page = catalog.list_backups(limit=500, cursor=cursor)
+            backups.extend({
+                'device': entry['device_name'],
+                'filename': entry['file_name'],
+                'size': f"{entry['file_size'] / 1024:.1f} KB",
+                'date': entry['created_at']
+            } for entry in page['items'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
         
         # Generate PDF
         pdf_buffer = generate_backup_pdf(backups)
@@ -788,6 +1105,8 @@ if __name__ == '__main__':
     print("=" * 60)
     print("  Starting web server...")
     print("  Open your browser to: http://localhost:5001")
+    print("  For production use: gunicorn -c gunicorn.conf.py wsgi:app")
     print("=" * 60)
     
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    # Development server only; debugging is on unless FLASK_DEBUG=0
+    create_app().run(debug=os.getenv('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=5001)
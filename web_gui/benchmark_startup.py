@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark for the web interface
+
+Imports app.py in fresh interpreters (what every gunicorn worker pays on
+boot) and reports import time and time to the first served request.
+Use --importtime to list the slowest modules from ``python -X importtime``.
+
+    python web_gui/benchmark_startup.py --runs 10
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+WEB_GUI_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs inside each fresh interpreter and prints its timings as JSON
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/login')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+    'status': response.status_code
+}))
+"""
+
+
+def run_probe():
+    """Start one interpreter, import the app and serve one request"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=WEB_GUI_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit):
+    """Return the modules with the highest cumulative import time"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=WEB_GUI_DIR, capture_output=True, text=True, check=True
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line.split('|')
+        timings.append((int(cumulative), module.strip()))
+    return sorted(timings, reverse=True)[:limit]
+
+
+def summarize(label, values):
+    print(f"  {label:<18} min {min(values):7.1f} ms   "
+          f"median {statistics.median(values):7.1f} ms   max {max(values):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure web_gui cold start time")
+    parser.add_argument('--runs', type=int, default=5, help="number of fresh interpreters to start")
+    parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                        help="also list the N slowest imports")
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.runs)]
+    print(f"Cold start over {args.runs} runs ({sys.executable}):")
+    summarize("import app", [sample['import_ms'] for sample in samples])
+    summarize("first request", [sample['first_request_ms'] for sample in samples])
+
+    if args.importtime:
+        print(f"\nSlowest imports (cumulative):")
+        for micros, module in slowest_imports(args.importtime):
+            print(f"  {micros / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,18 +22,24 @@ class DatabaseIntegration:
     """Handles database operations for the web interface"""
     
     def __init__(self):
-        self.db_manager = None
+        self._db_manager = None
+        self._init_failed = False
         self.logger = logging.getLogger(__name__)
         
-        if DATABASE_AVAILABLE:
+        if not DATABASE_AVAILABLE:
+            self.logger.warning("Database not available - running in file-only mode")
+    
+    @property
+    def db_manager(self):
+        """Database manager, created on first use so importing this module stays cheap"""
+        if self._db_manager is None and DATABASE_AVAILABLE and not self._init_failed:
             try:
-                self.db_manager = get_db_manager()
-                self.logger.info("Database manager initialized")
+                self._db_manager = get_db_manager()
+                self.logger.info(f"Database manager initialized ({self._db_manager.config.backend} backend)")
             except Exception as e:
                 self.logger.error(f"Failed to initialize database manager: {e}")
-                self.db_manager = None
-        else:
-            self.logger.warning("Database not available - running in file-only mode")
+                self._init_failed = True
+        return self._db_manager
     
     def is_available(self):
         """Check if database is available"""
@@ -109,6 +115,18 @@ class DatabaseIntegration:
             self.logger.error(f"Error getting operation logs: {e}")
             return []
     
+    def get_operation_logs_page(self, **filters):
+        """Get one keyset-paginated page of operation logs"""
+        if not self.is_available():
+            return None
+        return self.db_manager.get_operation_logs_page(**filters)
+    
+    def get_operation_stats(self, **filters):
+        """Get operation counts and success rates from the hourly rollups"""
+        if not self.is_available():
+            return None
+        return self.db_manager.get_operation_stats(**filters)
+    
     def save_backup_info(self, device_name, backup_type, file_path, file_size=None):
         """Save backup information to database"""
         if not self.is_available():
@@ -135,6 +153,12 @@ class DatabaseIntegration:
             self.logger.error(f"Error getting backups: {e}")
             return []
 
+    def get_backups_page(self, **filters):
+        """Get one keyset-paginated page of backup records"""
+        if not self.is_available():
+            return None
+        return self.db_manager.get_backups_page(**filters)
+
 # Global database integration instance
 db_integration = DatabaseIntegration()
 
@@ -153,7 +177,11 @@ def init_database_integration():
             logging.info("Database integration initialized successfully")
             return True
         else:
-            logging.error("Database initialization failed")
+            backend = get_db_manager().config.backend
+            logging.error(
+                f"Database initialization failed ({backend} backend) - "
+                f"check DB_BACKEND and the connection settings in database/.env"
+            )
             return False
     except Exception as e:
         logging.error(f"Database integration initialization error: {e}")
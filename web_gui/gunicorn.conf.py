@@ -0,0 +1,17 @@
+"""
+Gunicorn settings for the web interface (gunicorn -c gunicorn.conf.py wsgi:app)
+
+Sessions and operation status live in shared stores, so any number of
+workers can serve requests. Database pools and background jobs are created
+lazily inside each worker, after the fork.
+"""
+import os
+import multiprocessing
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threads keep the status polling responsive while SSH jobs hold a worker
+threads = int(os.getenv('WEB_THREADS', 4))
+timeout = int(os.getenv('WEB_TIMEOUT', 120))
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,195 @@
+"""
+Shared job state for the web interface
+
+The GUI runs one automation job at a time and every worker process must see
+the same progress and log lines, so the state lives outside the process:
+a local SQLite file by default, or Redis when JOB_STORE_URL is a redis:// URL
+(needed once workers run on more than one host).
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'job_store.db')
+
+
+class LocalJobStore:
+    """Job state in a SQLite file shared by all worker processes on this host"""
+
+    def __init__(self, path=DEFAULT_JOB_STORE_PATH, max_logs=1000):
+        self.path = path
+        self.max_logs = max_logs
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def start_operation(self, operation_name):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM job_logs")
+            conn.execute(
+                "INSERT OR REPLACE INTO job_state (id, current_operation, progress, updated_at) "
+                "VALUES (1, ?, 0, ?)",
+                (operation_name, time.time())
+            )
+
+    def add_log(self, message, level='info'):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO job_logs (timestamp, level, message) VALUES (?, ?, ?)",
+                (timestamp, level, message)
+            )
+            conn.execute("DELETE FROM job_logs WHERE seq <= ?", (cursor.lastrowid - self.max_logs,))
+
+    def update_progress(self, progress):
+        with self._transaction() as conn:
+            conn.execute("UPDATE job_state SET progress = ?, updated_at = ? WHERE id = 1", (progress, time.time()))
+
+    def complete_operation(self):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE job_state SET current_operation = NULL, progress = 100, updated_at = ? WHERE id = 1",
+                (time.time(),)
+            )
+
+    def status(self):
+        """Return the current operation, its progress and log lines"""
+        conn = self._connection()
+        row = conn.execute("SELECT current_operation, progress FROM job_state WHERE id = 1").fetchone()
+        logs = conn.execute("SELECT timestamp, level, message FROM job_logs ORDER BY seq").fetchall()
+        return {
+            'current_operation': row[0] if row else None,
+            'progress': row[1] if row else 0,
+            'logs': [{'timestamp': ts, 'level': level, 'message': message} for ts, level, message in logs]
+        }
+
+    def _connection(self):
+        """One connection per thread, created with the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._ensure_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    current_operation TEXT,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_logs (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    message TEXT NOT NULL
+                )
+            """)
+            self._schema_ready = True
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+def import_redis(setting):
+    """Import the optional redis package, or fail naming the package and the setting that needs it"""
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError(f"{setting} needs the redis package, which is not installed (pip install redis)") from None
+    return redis
+
+
+class RedisJobStore:
+    """Job state in Redis, shared by workers on any host"""
+
+    def __init__(self, url, prefix='solange:jobs', max_logs=1000):
+        redis = import_redis('JOB_STORE_URL')
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.state_key = f"{prefix}:state"
+        self.logs_key = f"{prefix}:logs"
+        self.max_logs = max_logs
+
+    def start_operation(self, operation_name):
+        pipe = self.redis.pipeline()
+        pipe.delete(self.logs_key)
+        pipe.hset(self.state_key, mapping={'current_operation': operation_name, 'progress': 0})
+        pipe.execute()
+
+    def add_log(self, message, level='info'):
+        entry = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\t{level}\t{message}"
+        pipe = self.redis.pipeline()
+        pipe.rpush(self.logs_key, entry)
+        pipe.ltrim(self.logs_key, -self.max_logs, -1)
+        pipe.execute()
+
+    def update_progress(self, progress):
+        self.redis.hset(self.state_key, 'progress', progress)
+
+    def complete_operation(self):
+        pipe = self.redis.pipeline()
+        pipe.hdel(self.state_key, 'current_operation')
+        pipe.hset(self.state_key, 'progress', 100)
+        pipe.execute()
+
+    def status(self):
+        """Return the current operation, its progress and log lines"""
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self.state_key)
+        pipe.lrange(self.logs_key, 0, -1)
+        state, entries = pipe.execute()
+        logs = []
+        for entry in entries:
+            timestamp, level, message = entry.split('\t', 2)
+            logs.append({'timestamp': timestamp, 'level': level, 'message': message})
+        return {
+            'current_operation': state.get('current_operation'),
+            'progress': int(state.get('progress', 0)),
+            'logs': logs
+        }
+
+
+def create_job_store(url=None):
+    """Create a job store from a URL: redis://..., sqlite:///path, or empty for the local default"""
+    url = url if url is not None else os.getenv('JOB_STORE_URL', '')
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        logger.info("Using Redis job store")
+        return RedisJobStore(url)
+    path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else DEFAULT_JOB_STORE_PATH
+    logger.info(f"Using local job store at {path}")
+    return LocalJobStore(path)
+
+
+# Global job store instance
+job_store = None
+
+
+def get_job_store():
+    """Get global job store configured from JOB_STORE_URL"""
+    global job_store
+    if job_store is None:
+        job_store = create_job_store()
+    return job_store
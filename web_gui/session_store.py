@@ -0,0 +1,237 @@
+"""
+Session backends for the web interface
+
+SESSION_BACKEND selects where session data lives:
+
+- ``cookie``   - everything in the signed session cookie (small payloads)
+- ``memory``   - in this process with a TTL (single-process deployments only)
+- ``database`` - in the ``user_sessions`` row of the logged-in user, shared by
+                 all workers; sessions without a login stay in the cookie
+
+Server-side backends keep only the session id and a write counter in the
+signed cookie. Each worker caches session data in memory and reloads it only
+when the cookie carries a newer counter, so a request is a dict lookup.
+Writes are compare-and-set on the counter: when two requests change the same
+session at once, the first write wins and the other picks up its version.
+"""
+import time
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface, session_json_serializer
+from itsdangerous import BadSignature
+
+logger = logging.getLogger(__name__)
+
+
+class StoredSession(SecureCookieSession):
+    """Session that remembers which server-side entry it was loaded from"""
+
+    def __init__(self, initial=None, sid=None, version=0):
+        super().__init__(initial)
+        self.sid = sid
+        self.version = version
+        self.opened_token = self.get('session_token')
+
+
+class MemorySessionStore:
+    """Session data in this process, evicted after ``ttl`` seconds or LRU"""
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_sid(self, data):
+        return secrets.token_urlsafe(32)
+
+    def get(self, sid, version=None):
+        """Return (data, version) for a session id, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            data, stored_version, valid_until = entry
+            if time.time() >= valid_until:
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return dict(data), stored_version
+
+    def set(self, sid, data, version):
+        """Store data as `version`; False if the entry is no longer at version - 1"""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None and entry[1] != version - 1:
+                return False
+            self._entries[sid] = (dict(data), version, time.time() + self.ttl)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def put(self, sid, data, version):
+        """Cache an entry read from elsewhere, whatever version it replaces"""
+        with self._lock:
+            self._entries[sid] = (dict(data), version, time.time() + self.ttl)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class DatabaseSessionStore:
+    """Session data in user_sessions.session_data, keyed by the login token
+
+    The per-process cache is trusted only while its write counter matches the
+    cookie, so a write made by another worker is picked up on the next request.
+    """
+
+    def __init__(self, get_user_manager, ttl, max_entries=10000):
+        self.get_user_manager = get_user_manager
+        self.cache = MemorySessionStore(ttl, max_entries)
+
+    def new_sid(self, data):
+        # Only logged-in sessions have a user_sessions row to store into
+        return data.get('session_token')
+
+    def get(self, sid, version=None):
+        cached = self.cache.get(sid)
+        if cached is not None and cached[1] == version:
+            return cached
+
+        user_manager = self.get_user_manager()
+        stored = user_manager.get_session_data(sid) if user_manager else None
+        if stored is None:
+            self.cache.delete(sid)
+            return None
+        payload, stored_version = stored
+        try:
+            data = session_json_serializer.loads(payload)['data']
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Discarding unreadable session data: {e}")
+            return None
+        self.cache.put(sid, data, stored_version)
+        return data, stored_version
+
+    def set(self, sid, data, version):
+        """Store data as `version`; False if the row is gone or no longer at version - 1"""
+        user_manager = self.get_user_manager()
+        stored = session_json_serializer.dumps({'data': data, 'version': version})
+        if not user_manager or not user_manager.save_session_data(sid, stored, version - 1):
+            self.cache.delete(sid)
+            return False
+        self.cache.put(sid, data, version)
+        return True
+
+    def delete(self, sid):
+        self.cache.delete(sid)
+
+
+class StoreSessionInterface(SecureCookieSessionInterface):
+    """Signed-cookie sessions whose payload is moved into a server-side store
+
+    With ``store=None`` this is plain cookie-only storage. When the store
+    declines a session (no session id), its payload stays in the cookie.
+    """
+
+    session_class = StoredSession
+
+    def __init__(self, store=None):
+        self.store = store
+
+    def open_session(self, app, request):
+        serializer = self.get_signing_serializer(app)
+        if serializer is None:
+            return None
+        value = request.cookies.get(self.get_cookie_name(app))
+        if not value:
+            return self.session_class()
+        try:
+            payload = serializer.loads(value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+        except BadSignature:
+            return self.session_class()
+
+        if '_sid' not in payload:
+            return self.session_class(payload)
+        if self.store is None:
+            return self.session_class()
+        entry = self.store.get(payload['_sid'], payload.get('_v'))
+        if entry is None:
+            # Expired or logged out elsewhere
+            return self.session_class()
+        data, version = entry
+        return self.session_class(data, sid=payload['_sid'], version=version)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        cookie_options = {
+            'domain': self.get_cookie_domain(app),
+            'path': self.get_cookie_path(app),
+            'secure': self.get_cookie_secure(app),
+            'partitioned': self.get_cookie_partitioned(app),
+            'samesite': self.get_cookie_samesite(app),
+            'httponly': self.get_cookie_httponly(app)
+        }
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                if session.sid and self.store is not None:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, **cookie_options)
+                response.vary.add('Cookie')
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        data = dict(session)
+        if session.modified and self.store is not None:
+            self._persist(session, data)
+
+        payload = {'_sid': session.sid, '_v': session.version} if session.sid else data
+        value = self.get_signing_serializer(app).dumps(payload)
+        response.set_cookie(name, value, expires=self.get_expiration_time(app, session), **cookie_options)
+        response.vary.add('Cookie')
+
+    def _persist(self, session, data):
+        """Write the session to the store, under a new id after login or logout"""
+        if session.sid and session.get('session_token') != session.opened_token:
+            self.store.delete(session.sid)
+            session.sid = None
+            session.version = 0
+
+        sid = session.sid or self.store.new_sid(data)
+        if not sid:
+            session.sid = None
+        elif self.store.set(sid, data, session.version + 1):
+            session.sid = sid
+            session.version += 1
+        else:
+            # Another request saved this session first; keep its version rather than overwrite it
+            current = self.store.get(sid)
+            if current is not None and current[1] != session.version:
+                logger.warning("Session changed by a concurrent request, dropping this request's changes")
+                session.sid = sid
+                session.version = current[1]
+            else:
+                session.sid = None
+
+
+def create_session_interface(backend, ttl, get_user_manager=None):
+    """Build the session interface for a SESSION_BACKEND name"""
+    if backend == 'memory':
+        return StoreSessionInterface(MemorySessionStore(ttl))
+    if backend == 'database':
+        return StoreSessionInterface(DatabaseSessionStore(get_user_manager, ttl))
+    if backend == 'cookie':
+        return StoreSessionInterface()
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -3,6 +3,7 @@ let devices = [];
 let activeTab = 'dashboard';
 let operationInProgress = false;
 let statusCheckInterval = null;
+let loadedTemplates = {};
 
 // API base URL
 const API_BASE = '/api';
@@ -340,6 +341,10 @@ function renderBackupHistory(backups) {
                     <i class="fas fa-download"></i>
                     Download
                 </button>
+                <button class="btn secondary" onclick="compareBackup(${backup.id})">
+                    <i class="fas fa-code-compare"></i>
+                    Changes
+                </button>
                 <button class="btn warning" onclick="restoreBackup('${backup.name}')">
                     <i class="fas fa-upload"></i>
                     Restore
@@ -353,6 +358,96 @@ function renderBackupHistory(backups) {
     `).join('');
 }
 
+// Show what changed since the previous backup of the same device
+async function compareBackup(backupId) {
+    try {
+        const response = await fetch(`${API_BASE}/backups/diff?to=${backupId}`);
+        const result = await response.json();
+        
+        if (!result.success) {
+            throw new Error(result.error || 'Failed to compare backups');
+        }
+        
+        const diff = result.diff;
+        const body = diff.identical
+            ? '<p>No configuration changes since the previous backup.</p>'
+            : `<p>${diff.added} lines added, ${diff.removed} removed</p>
+               <pre class="config-diff">${diff.unified.map(line => {
+                   const cls = line.startsWith('+') ? 'diff-added' : line.startsWith('-') ? 'diff-removed' : '';
+                   return `<span class="${cls}">${escapeText(line)}</span>`;
+               }).join('\n')}</pre>`;
+        showModal(`Changes: ${escapeText(diff.new.file_name)}`, body);
+    } catch (error) {
+        addActivityLog(`Compare failed: ${error.message}`, 'error');
+    }
+}
+
+// Search stored configurations and list the matching lines per device
+async function searchConfigs() {
+    const query = document.getElementById('configSearch').value.trim();
+    const results = document.getElementById('configSearchResults');
+    if (!query) return;
+    
+    const params = new URLSearchParams({
+        q: query,
+        mode: document.getElementById('configSearchMode').value,
+        history: document.getElementById('configSearchHistory').checked
+    });
+    
+    try {
+        const response = await fetch(`${API_BASE}/configs/search?${params}`);
+        const result = await response.json();
+        
+        if (!result.success) {
+            throw new Error(result.error || 'Search failed');
+        }
+        
+        if (result.hits.length === 0) {
+            results.innerHTML = '<p class="text-center">No matching lines</p>';
+            return;
+        }
+        
+        const summary = `<p>${result.hits.length} lines on ${result.devices.length} devices` +
+            `${result.truncated ? ' (more not shown)' : ''} - ${result.elapsed_ms} ms</p>`;
+        results.innerHTML = summary + result.hits.map(hit => `
+            <div class="log-line">
+                <strong>${escapeText(hit.device)}</strong> ${escapeText(hit.date)} line ${hit.line_no}:
+                ${hit.section ? `<em>${escapeText(hit.section)}</em> &gt; ` : ''}${escapeText(hit.line)}
+            </div>
+        `).join('');
+    } catch (error) {
+        results.innerHTML = `<p class="text-center">${escapeText(error.message)}</p>`;
+    }
+}
+
+// Check the latest backups against the compliance rules
+async function runCompliance() {
+    const results = document.getElementById('complianceResults');
+    results.innerHTML = '<p class="text-center">Running checks...</p>';
+    
+    try {
+        const response = await fetch(`${API_BASE}/compliance`);
+        const report = await response.json();
+        
+        if (!report.success) {
+            throw new Error(report.error || 'Compliance check failed');
+        }
+        
+        const summary = report.summary;
+        const descriptions = Object.fromEntries(report.rules.map(rule => [rule.id, rule.description]));
+        results.innerHTML = `<p>${summary.compliant}/${summary.devices} devices compliant - ${summary.elapsed_ms} ms</p>` +
+            report.devices.filter(device => !device.compliant).map(device => `
+                <div class="log-line ${device.highest_severity === 'high' ? 'error' : 'warning'}">
+                    <strong>${escapeText(device.device)}</strong>:
+                    ${device.failed.map(id => escapeText(descriptions[id] || id)).join('; ')}
+                </div>
+            `).join('');
+        addActivityLog(`Compliance: ${summary.non_compliant} non-compliant devices`, summary.non_compliant ? 'warning' : 'success');
+    } catch (error) {
+        results.innerHTML = `<p class="text-center">${escapeText(error.message)}</p>`;
+    }
+}
+
 // Backup PDF download function
 async function downloadBackupPDF() {
     try {
@@ -439,23 +534,27 @@ async function applyConfiguration() {
     }
 }
 
-async function loadTemplates() {
+async function loadTemplates(cursor = null) {
     try {
-        const response = await fetch(`${API_BASE}/templates`);
+        const params = new URLSearchParams({limit: 100});
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`${API_BASE}/templates?${params}`);
         const result = await response.json();
         
         if (result.success) {
-            renderTemplates(result.templates);
+            if (!cursor) loadedTemplates = {};
+            result.templates.forEach(template => loadedTemplates[template.name] = template);
+            renderTemplates(result.templates, cursor !== null, result.next_cursor);
         }
     } catch (error) {
         console.error('Error loading templates:', error);
     }
 }
 
-function renderTemplates(templates) {
+function renderTemplates(templates, append = false, nextCursor = null) {
     const templateList = document.getElementById('templateList');
     
-    templateList.innerHTML = templates.map(template => `
+    const html = templates.map(template => `
         <div class="template-item">
             <div>
                 <div class="template-name">${template.name}</div>
@@ -473,6 +572,22 @@ function renderTemplates(templates) {
             </div>
         </div>
     `).join('');
+    
+    const more = templateList.querySelector('.template-more');
+    if (more) more.remove();
+    if (append) {
+        templateList.insertAdjacentHTML('beforeend', html);
+    } else {
+        templateList.innerHTML = html;
+    }
+    if (nextCursor) {
+        templateList.insertAdjacentHTML('beforeend', `
+            <button class="btn secondary template-more" onclick="loadTemplates('${nextCursor}')">
+                <i class="fas fa-chevron-down"></i>
+                Load more
+            </button>
+        `);
+    }
 }
 
 // Security functions
@@ -642,6 +757,56 @@ function renderLogs(logs) {
     logViewer.scrollTop = logViewer.scrollHeight;
 }
 
+async function searchLogs() {
+    const params = new URLSearchParams();
+    const filters = {
+        q: document.getElementById('logSearch').value.trim(),
+        device: document.getElementById('logDevice').value.trim(),
+        since: document.getElementById('logSince').value,
+        until: document.getElementById('logUntil').value,
+        level: document.getElementById('logLevel').value
+    };
+    Object.entries(filters).forEach(([key, value]) => {
+        if (value && value !== 'all') params.append(key, value);
+    });
+    
+    try {
+        const response = await fetch(`${API_BASE}/logs/search?${params}`);
+        const result = await response.json();
+        
+        if (result.success) {
+            renderLogEntries(result.entries.reverse());
+        } else {
+            addActivityLog(`Log search failed: ${result.error}`, 'error');
+        }
+    } catch (error) {
+        console.error('Error searching logs:', error);
+    }
+}
+
+function renderLogEntries(entries) {
+    const logViewer = document.getElementById('logViewer');
+    
+    if (entries.length === 0) {
+        logViewer.innerHTML = '<div class="log-line info">No matching log entries</div>';
+        return;
+    }
+    
+    logViewer.innerHTML = entries.map(entry => {
+        const level = (entry.level || 'info').toLowerCase();
+        const device = entry.device ? ` ${escapeText(entry.device)}:` : '';
+        return `<div class="log-line ${level}">[${entry.logged_at || '-'}] ${escapeText(entry.source)}${device} ${escapeText(entry.message)}</div>`;
+    }).join('');
+    
+    logViewer.scrollTop = logViewer.scrollHeight;
+}
+
+function escapeText(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
 function detectLogLevel(content) {
     if (content.includes('ERROR') || content.includes('Failed')) return 'error';
     if (content.includes('WARNING') || content.includes('Warning')) return 'warning';
@@ -1210,27 +1375,16 @@ function loadTemplate(name) {
     alert(`Loading template: ${name}`);
 }
 
+function viewTemplate(name) {
+    const template = loadedTemplates[name];
+    if (template) {
+        alert(`${template.name} (version ${template.version})\n\n${template.content}`);
+    }
+}
+
 function useTemplate(name) {
-    // Simulate loading template content
-    const templates = {
-        'Basic OSPF Configuration': `router ospf 1
-network 192.168.1.0 0.0.0.255 area 0
-exit`,
-        'DHCP Server Setup': `ip dhcp pool LAN
-network 192.168.1.0 255.255.255.0
-default-router 192.168.1.1
-dns-server 8.8.8.8
-exit`,
-        'Security Hardening': `line vty 0 4
-login local
-transport input ssh
-exec-timeout 5 0
-exit
-ip ssh time-out 60
-ip ssh authentication-retries 3`
-    };
-    
-    document.getElementById('configCommands').value = templates[name] || '';
+    const template = loadedTemplates[name];
+    document.getElementById('configCommands').value = template ? template.content : '';
     addActivityLog(`Loaded template: ${name}`, 'info');
 }
 
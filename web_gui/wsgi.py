@@ -0,0 +1,16 @@
+"""
+WSGI entry point for production serving of the web interface
+
+    cd web_gui
+    gunicorn -c gunicorn.conf.py wsgi:app
+    uvicorn --interface wsgi --workers 4 --port 5001 wsgi:app
+"""
+import os
+import sys
+
+# Make app.py and its sibling modules importable when started from elsewhere
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+app = create_app()